@@ -1,9 +1,76 @@
 const { spawn } = require('child_process');
 const path = require('path');
+const readline = require('readline');
 
 const ML_SERVICE_PATH = path.join(__dirname, '../ml_service');
 
+// Set ML_WORKER=1 to route calls through one long-lived worker.py process
+// (models stay loaded) instead of spawning a script per call.
+const USE_WORKER = process.env.ML_WORKER === '1';
+
+const WORKER_OPS = {
+    'predict.py': 'predict',
+    'schedule.py': 'schedule',
+    'ml_trainer.py': 'train'
+};
+
+let worker = null;
+let nextRequestId = 1;
+const pendingRequests = new Map();
+
+function getWorker() {
+    if (worker) return worker;
+
+    worker = spawn('python', [path.join(ML_SERVICE_PATH, 'worker.py')]);
+
+    const lines = readline.createInterface({ input: worker.stdout });
+    lines.on('line', (line) => {
+        let response;
+        try {
+            response = JSON.parse(line);
+        } catch (e) {
+            console.error('Failed to parse ML worker output:', line);
+            return;
+        }
+        const pending = pendingRequests.get(response.id);
+        if (!pending) return;
+        pendingRequests.delete(response.id);
+        if (response.error) {
+            pending.reject(new Error(response.error));
+        } else {
+            pending.resolve(response.result);
+        }
+    });
+
+    worker.stderr.on('data', (data) => {
+        console.log('[ML Debug]', data.toString().trim()); // Log debug output
+    });
+
+    worker.on('close', (code) => {
+        console.error(`ML worker exited with code ${code}`);
+        worker = null;
+        for (const pending of pendingRequests.values()) {
+            pending.reject(new Error('ML worker exited'));
+        }
+        pendingRequests.clear();
+    });
+
+    return worker;
+}
+
+function runWorkerRequest(op, data) {
+    return new Promise((resolve, reject) => {
+        const id = nextRequestId++;
+        pendingRequests.set(id, { resolve, reject });
+        getWorker().stdin.write(JSON.stringify({ id, op, data }) + '\n');
+    });
+}
+
 function runPythonScript(scriptName, data) {
+    if (USE_WORKER && WORKER_OPS[scriptName]) {
+        return runWorkerRequest(WORKER_OPS[scriptName], data);
+    }
+
     return new Promise((resolve, reject) => {
         const pythonProcess = spawn('python', [path.join(ML_SERVICE_PATH, scriptName)]);
 
@@ -39,6 +106,50 @@ function runPythonScript(scriptName, data) {
     });
 }
 
+// Spawn scriptName with args and call onLine(record) for every NDJSON line it
+// prints, as soon as it arrives. Resolves with the last record (the "end" line).
+function streamPythonScript(scriptName, args, data, onLine) {
+    return new Promise((resolve, reject) => {
+        const pythonProcess = spawn('python', [path.join(ML_SERVICE_PATH, scriptName), ...args]);
+
+        let last = null;
+        let error = '';
+
+        pythonProcess.stdin.write(JSON.stringify(data));
+        pythonProcess.stdin.end();
+
+        const lines = readline.createInterface({ input: pythonProcess.stdout });
+        lines.on('line', (line) => {
+            if (!line.trim()) return;
+            try {
+                last = JSON.parse(line);
+            } catch (e) {
+                console.error('Failed to parse ML stream output:', line);
+                return;
+            }
+            // A failed run ends with { error }; that rejects below instead
+            if (!last.error) onLine(last);
+        });
+
+        pythonProcess.stderr.on('data', (data) => {
+            const stderr = data.toString();
+            console.log('[ML Debug]', stderr.trim()); // Log debug output
+            error += stderr;
+        });
+
+        // 'close' fires after stdout has ended, so every line has been read
+        pythonProcess.on('close', (code) => {
+            if (code !== 0) {
+                reject(new Error(error || 'Python script failed'));
+            } else if (last && last.error) {
+                reject(new Error(last.error));
+            } else {
+                resolve(last);
+            }
+        });
+    });
+}
+
 async function predictTime(category, size, userId, extraFeatures = {}) {
     try {
         const output = await runPythonScript('predict.py', {
@@ -54,27 +165,64 @@ async function predictTime(category, size, userId, extraFeatures = {}) {
     }
 }
 
-async function generateSchedule(userId, routine, tasks, routine_blocks = [], completed_today = {}) {
+async function generateSchedule(userId, routine, tasks, routine_blocks = [], completed_today = {}, horizon_days = null, engine = null) {
     try {
         const output = await runPythonScript('schedule.py', {
             user_id: userId,
             routine,
             tasks,
             routine_blocks,
-            completed_today
+            completed_today,
+            ...(horizon_days ? { horizon_days } : {}),
+            ...(engine ? { engine } : {})
         });
-        return output.schedule;
+        if (output.objective) {
+            // Optimizer engines report their objective against the greedy plan
+            console.log('Schedule objective:', output.objective);
+        }
+        // Horizon mode returns { schedule, plan, unscheduled }
+        return horizon_days ? output : output.schedule;
     } catch (err) {
         console.error('Scheduling Error:', err.message);
         return [];
     }
 }
 
-async function trainModel(userId, completedTasks) {
+// Stream the schedule as NDJSON records ({ entry }, { date, entry },
+// { unscheduled }, then { end }), see schedule.py --ndjson. onLine gets each
+// record as soon as it is serialized. Always spawns schedule.py, even with
+// ML_WORKER=1, since worker responses are one line per request.
+async function streamSchedule(userId, routine, tasks, routine_blocks = [], completed_today = {}, horizon_days = null, engine = null, onLine = () => {}) {
+    return streamPythonScript('schedule.py', ['--ndjson'], {
+        user_id: userId,
+        routine,
+        tasks,
+        routine_blocks,
+        completed_today,
+        ...(horizon_days ? { horizon_days } : {}),
+        ...(engine ? { engine } : {})
+    }, onLine);
+}
+
+// Patch the worker's cached plan for userId with deltas (task_added, task_updated,
+// task_removed, task_progress, session_completed). Returns { schedule, diff }, or
+// null when there is no worker or no cached plan - the caller then regenerates.
+async function updateSchedule(userId, deltas) {
+    if (!USE_WORKER) return null;
+    try {
+        return await runWorkerRequest('schedule_update', { user_id: userId, deltas });
+    } catch (err) {
+        console.log('Incremental schedule update unavailable:', err.message);
+        return null;
+    }
+}
+
+async function trainModel(userId, completedTasks, mode = 'full') {
     try {
         const output = await runPythonScript('ml_trainer.py', {
             user_id: userId,
-            completed_tasks: completedTasks
+            completed_tasks: completedTasks,
+            mode
         });
         return output;
     } catch (err) {
@@ -83,4 +231,4 @@ async function trainModel(userId, completedTasks) {
     }
 }
 
-module.exports = { predictTime, generateSchedule, trainModel };
+module.exports = { predictTime, generateSchedule, streamSchedule, updateSchedule, trainModel };
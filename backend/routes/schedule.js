@@ -3,55 +3,80 @@ const router = express.Router();
 const db = require('../db');
 const mlClient = require('../ml_client');
 
-router.post('/generate', async (req, res) => {
-    try {
-        const { userId } = req.body;
+async function loadScheduleInput(userId) {
+    // 1. Fetch User Routine
+    const userRes = await db.query('SELECT routine_config FROM users WHERE id = $1', [userId]);
+    if (userRes.rows.length === 0) return null;
+    const routine = userRes.rows[0].routine_config;
+
+    // 2. Fetch Routine Blocks (for smart scheduling)
+    const blocksRes = await db.query('SELECT * FROM routine_blocks WHERE user_id = $1', [userId]);
+    const routine_blocks = blocksRes.rows.map(block => ({
+        activity_type: block.activity_type,
+        start_time: block.start_time,
+        end_time: block.end_time,
+        days: block.days
+    }));
 
-        // 1. Fetch User Routine
-        const userRes = await db.query('SELECT routine_config FROM users WHERE id = $1', [userId]);
-        if (userRes.rows.length === 0) return res.status(404).json({ error: 'User not found' });
-        const routine = userRes.rows[0].routine_config;
+    // 3. Fetch Pending Tasks
+    const tasksRes = await db.query("SELECT * FROM tasks WHERE user_id = $1 AND status = 'Pending'", [userId]);
+    const tasks = tasksRes.rows.map(t => ({
+        id: t.id,
+        title: t.title,
+        category: t.category,
+        estimated_size: t.estimated_size,
+        predicted_time: t.manual_time || t.ml_predicted_time || t.default_expected_time,
+        deadline: t.deadline,
+        priority: t.priority,
+        complexity: t.complexity || 'Medium',
+        progress: t.progress || 0
+    }));
 
-        // 2. Fetch Routine Blocks (for smart scheduling)
-        const blocksRes = await db.query('SELECT * FROM routine_blocks WHERE user_id = $1', [userId]);
-        const routine_blocks = blocksRes.rows.map(block => ({
-            activity_type: block.activity_type,
-            start_time: block.start_time,
-            end_time: block.end_time
-        }));
+    // 4. Fetch Completed Sessions for Today
+    const todaySessionsRes = await db.query(
+        `SELECT task_id, SUM(duration_minutes) as total_minutes 
+         FROM sessions 
+         WHERE user_id = $1 
+         AND start_time >= CURRENT_DATE 
+         GROUP BY task_id`,
+        [userId]
+    );
 
-        // 3. Fetch Pending Tasks
-        const tasksRes = await db.query("SELECT * FROM tasks WHERE user_id = $1 AND status = 'Pending'", [userId]);
-        const tasks = tasksRes.rows.map(t => ({
-            id: t.id,
-            title: t.title,
-            category: t.category,
-            estimated_size: t.estimated_size,
-            predicted_time: t.manual_time || t.ml_predicted_time || t.default_expected_time,
-            deadline: t.deadline,
-            priority: t.priority,
-            complexity: t.complexity || 'Medium',
-            progress: t.progress || 0
-        }));
+    const completed_today = {};
+    todaySessionsRes.rows.forEach(row => {
+        completed_today[row.task_id] = parseInt(row.total_minutes);
+    });
 
-        // 4. Fetch Completed Sessions for Today
-        const todaySessionsRes = await db.query(
-            `SELECT task_id, SUM(duration_minutes) as total_minutes 
-             FROM sessions 
-             WHERE user_id = $1 
-             AND start_time >= CURRENT_DATE 
-             GROUP BY task_id`,
-            [userId]
-        );
+    return { routine, routine_blocks, tasks, completed_today };
+}
 
-        const completed_today = {};
-        todaySessionsRes.rows.forEach(row => {
-            completed_today[row.task_id] = parseInt(row.total_minutes);
-        });
+router.post('/generate', async (req, res) => {
+    try {
+        // horizonDays (optional): plan every session across the next N days in one call
+        // engine (optional): 'greedy' (default) or 'local_search'
+        // stream (optional): respond with NDJSON lines as the plan is serialized
+        const { userId, horizonDays, engine, stream } = req.body;
+
+        const input = await loadScheduleInput(userId);
+        if (!input) return res.status(404).json({ error: 'User not found' });
+        const { routine, routine_blocks, tasks, completed_today } = input;
+
+        if (stream) {
+            res.setHeader('Content-Type', 'application/x-ndjson');
+            try {
+                await mlClient.streamSchedule(userId, routine, tasks, routine_blocks, completed_today, horizonDays, engine,
+                    (line) => res.write(JSON.stringify(line) + '\n'));
+            } catch (err) {
+                // Headers are already sent: report the failure as the last line
+                console.error('Schedule stream error:', err.message);
+                res.write(JSON.stringify({ error: err.message }) + '\n');
+            }
+            return res.end();
+        }
 
         // 5. Call ML Service to Schedule (with routine_blocks and completed_today)
         console.log('Calling ML service with:', { userId, tasksCount: tasks.length, routineBlocksCount: routine_blocks.length, completedTodayCount: Object.keys(completed_today).length });
-        const schedule = await mlClient.generateSchedule(userId, routine, tasks, routine_blocks, completed_today);
+        const schedule = await mlClient.generateSchedule(userId, routine, tasks, routine_blocks, completed_today, horizonDays, engine);
         console.log('ML Service returned schedule:', schedule);
 
         res.json(schedule);
@@ -61,4 +86,26 @@ router.post('/generate', async (req, res) => {
     }
 });
 
+// Patch today's plan after a small change instead of regenerating it, e.g.
+// { userId, deltas: [{ type: 'task_progress', task_id: 12, progress: 40 }] }.
+// Responds { schedule, diff }; falls back to a full rebuild ({ schedule }) if the
+// ML worker has no cached plan for the user.
+router.post('/update', async (req, res) => {
+    try {
+        const { userId, deltas = [] } = req.body;
+
+        const patched = await mlClient.updateSchedule(userId, deltas);
+        if (patched) return res.json(patched);
+
+        const input = await loadScheduleInput(userId);
+        if (!input) return res.status(404).json({ error: 'User not found' });
+        const { routine, routine_blocks, tasks, completed_today } = input;
+        const schedule = await mlClient.generateSchedule(userId, routine, tasks, routine_blocks, completed_today);
+        res.json({ schedule });
+    } catch (err) {
+        console.error('Schedule update error:', err);
+        res.status(500).json({ error: err.message });
+    }
+});
+
 module.exports = router;
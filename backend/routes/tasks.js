@@ -169,7 +169,8 @@ router.put('/:taskId/status', async (req, res) => {
 
                         if (historyResult.rows.length >= 3) {
                             console.log(`[ML] Triggering auto-training for user ${task.user_id}`);
-                            await mlClient.trainModel(task.user_id, historyResult.rows);
+                            // Incremental: only tasks not yet folded into the user's model are processed
+                            await mlClient.trainModel(task.user_id, historyResult.rows, 'incremental');
                         }
                     } catch (mlErr) {
                         console.error('[ML] Auto-training failed:', mlErr);
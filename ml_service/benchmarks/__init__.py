@@ -0,0 +1,4 @@
+"""
+Benchmarks for the ML service.
+Run from ml_service/, e.g.: python -m benchmarks.inference
+"""
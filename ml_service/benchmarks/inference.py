@@ -0,0 +1,123 @@
+"""
+Inference benchmark: sklearn pipeline vs compiled encoder vs flat tree arrays.
+
+Checks that all paths agree on a seeded sample of tasks before timing them.
+
+    python -m benchmarks.inference [--n 2000]
+"""
+
+import argparse
+import os
+import random
+import time
+import warnings
+
+import joblib
+import numpy as np
+
+from improved_predictor import ImprovedTimePredictor
+from model_registry import ModelRegistry
+from compiled_encoder import encoder_for, predict_raw
+from flat_trees import load_flat_model, FLAT_MODEL_FILENAME
+from model_store import ModelStore
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+
+CATEGORIES = ["Revision", "Problems", "Writing", "Reading", "Presentation", "Project", "Other"]
+
+
+def random_task(rng: random.Random) -> dict:
+    task = {
+        "user_id": "bench",
+        "category": rng.choice(CATEGORIES),
+        "size": rng.choice([0.5, 1, 2, 3.5, 5, 8, "4", None]),
+        "title": rng.choice(["", "Essay draft", "Chapter 4 problem set", "x" * 60]),
+        "complexity": rng.choice(["Low", "Medium", "High", None]),
+        "priority": rng.choice(["Low", "Medium", "High", "Urgent"]),
+        "num_pages": rng.randint(0, 40),
+        "num_slides": rng.randint(0, 30),
+        "num_questions": rng.randint(0, 30),
+    }
+    if rng.random() < 0.5:
+        task["time_of_day"] = rng.choice(["morning", "afternoon", "evening", "night"])
+    return task
+
+
+def check_equivalence(predictor: ImprovedTimePredictor, pipeline, flat_model, tasks: list):
+    encoder = encoder_for(pipeline, predictor.metadata)
+    assert encoder is not None, "pipeline could not be compiled"
+
+    df = predictor._prepare_frame(tasks)
+    expected_vectors = pipeline[:-1].transform(df)
+    expected_raw = pipeline.predict(df)
+
+    vectors = encoder.encode_batch(tasks)
+    raw = np.array([predict_raw(pipeline, v) for v in vectors])
+
+    np.testing.assert_allclose(vectors, expected_vectors, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(raw, expected_raw, rtol=1e-9, atol=1e-9)
+
+    # Flat trees must reproduce pipeline.predict exactly
+    np.testing.assert_array_equal(flat_model.encoder.encode_batch(tasks), vectors)
+    np.testing.assert_array_equal(flat_model.predict_vectors(vectors), expected_raw)
+
+    fast = [predictor.predict(t) for t in tasks]
+    slow = predictor.predict_batch(tasks)
+    assert fast == slow, "predict() and predict_batch() disagree"
+
+
+def time_per_call(fn, tasks: list) -> float:
+    start = time.perf_counter()
+    for task in tasks:
+        fn(task)
+    return (time.perf_counter() - start) / len(tasks) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark single-row inference.')
+    parser.add_argument('--n', type=int, default=2000, help='Number of tasks')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    rng = random.Random(42)
+    tasks = [random_task(rng) for _ in range(args.n)]
+
+    predictor = ImprovedTimePredictor("bench")
+    base_dir = ModelStore(os.path.join(MODEL_DIR, 'store')).current_path('base') or MODEL_DIR
+    pipeline = joblib.load(os.path.join(base_dir, 'base_model.joblib'))
+    flat_model = load_flat_model(os.path.join(base_dir, FLAT_MODEL_FILENAME))
+    if flat_model is None:
+        raise SystemExit("Run `python train_base_model.py --export-trees` first")
+
+    check_equivalence(predictor, pipeline, flat_model, tasks)
+    print(f"Equivalence: OK on {len(tasks)} tasks")
+
+    sample = tasks[:min(len(tasks), 500)]
+    encoder = encoder_for(pipeline, predictor.metadata)
+    pipeline_us = time_per_call(lambda t: pipeline.predict(predictor._prepare_frame([t])), sample)
+    encoder_us = time_per_call(lambda t: predict_raw(pipeline, encoder.encode(t)), sample)
+    flat_us = time_per_call(lambda t: flat_model.predict_vectors(flat_model.encoder.encode(t)), tasks)
+    predict_us = time_per_call(predictor.predict, tasks)
+
+    start = time.perf_counter()
+    predictor.predict_batch(tasks)
+    batch_us = (time.perf_counter() - start) / len(tasks) * 1e6
+
+    # Repeat predictions through the registry's result cache
+    registry = ModelRegistry(prediction_cache_entries=len(tasks))
+    cached_predictor = ImprovedTimePredictor("bench", registry=registry)
+    for task in tasks:
+        cached_predictor.predict(task)
+    cached_us = time_per_call(cached_predictor.predict, tasks)
+
+    print(f"sklearn pipeline (1-row DataFrame):    {pipeline_us:9.1f} us/prediction")
+    print(f"compiled encoder + sklearn regressor:  {encoder_us:9.1f} us/prediction")
+    print(f"compiled encoder + flat trees:         {flat_us:9.1f} us/prediction")
+    print(f"ImprovedTimePredictor.predict():       {predict_us:9.1f} us/prediction")
+    print(f"ImprovedTimePredictor.predict_batch(): {batch_us:9.1f} us/prediction (batch of {len(tasks)})")
+    print(f"ImprovedTimePredictor.predict(), cached: {cached_us:7.1f} us/prediction "
+          f"(hit rate {registry.prediction_cache.stats()['hit_rate']:.2f})")
+
+
+if __name__ == "__main__":
+    main()
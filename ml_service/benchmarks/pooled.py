@@ -0,0 +1,96 @@
+"""
+Pooled personal model benchmark (see pooled_model.py).
+
+Builds a pooled model for --users synthetic users in a temporary directory
+and reports what per-user personalization costs with it:
+
+  - fit_user() throughput (a user's first fit appends them to the model)
+  - bytes on disk per user, and the time to open the model cold
+  - batch prediction over tasks of many users: predict_batch_for_users()
+    (one base pass + gather + dot product) against one predict_batch() per
+    user, after checking that both give the same results
+
+    python -m benchmarks.pooled [--users 10000] [--tasks 2000]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+from improved_predictor import ImprovedTimePredictor, predict_batch_for_users
+from model_registry import ModelRegistry
+from pooled_model import PooledPersonalModel
+from benchmarks.inference import random_task
+
+HISTORY = 20  # completed tasks per user
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the pooled personal model.')
+    parser.add_argument('--users', type=int, default=10000, help='Number of users')
+    parser.add_argument('--tasks', type=int, default=2000, help='Tasks in the prediction batch')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    rng = random.Random(42)
+    path = tempfile.mkdtemp(prefix='pooled-bench-')
+    try:
+        registry = ModelRegistry()
+        registry.pooled = PooledPersonalModel(path)
+        base = ImprovedTimePredictor(None, registry=registry)
+        if base.base_flat_model is None and base.base_pipeline is None:
+            raise SystemExit("No base model; run `python train_base_model.py` first")
+
+        history = [random_task(rng) for _ in range(HISTORY)]
+        base_log, _ = base._raw_predictions(*base._select_pipeline()[:1], history)
+        started = time.perf_counter()
+        for u in range(args.users):
+            pace = rng.lognormvariate(0, 0.4)
+            actual = np.expm1(base_log) * pace * np.array([rng.lognormvariate(0, 0.2) for _ in history])
+            registry.pooled.fit_user(f"u{u}", history, base_log, np.maximum(actual, 1), base.base_model_version)
+        fit_seconds = time.perf_counter() - started
+
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        started = time.perf_counter()
+        cold = PooledPersonalModel(path)
+        cold.personalized("u0", base.base_model_version)
+        open_ms = (time.perf_counter() - started) * 1e3
+
+        tasks = [random_task(rng) for _ in range(args.tasks)]
+        user_ids = [f"u{rng.randrange(args.users)}" for _ in tasks]
+
+        started = time.perf_counter()
+        pooled = predict_batch_for_users(user_ids, tasks, registry)
+        pooled_us = (time.perf_counter() - started) / len(tasks) * 1e6
+
+        started = time.perf_counter()
+        by_user = {}
+        for i, user_id in enumerate(user_ids):
+            by_user.setdefault(user_id, []).append(i)
+        per_user = [None] * len(tasks)
+        for user_id, indices in by_user.items():
+            results = ImprovedTimePredictor(user_id, registry=registry).predict_batch([tasks[i] for i in indices])
+            for i, result in zip(indices, results):
+                per_user[i] = result
+        per_user_us = (time.perf_counter() - started) / len(tasks) * 1e6
+        assert pooled == per_user, "predict_batch_for_users() and predict_batch() disagree"
+
+        print(f"users:                           {args.users:9d}")
+        print(f"fit_user():                      {fit_seconds / args.users * 1e3:9.2f} ms/user ({HISTORY} tasks)")
+        print(f"on disk:                         {size / args.users:9.0f} bytes/user ({size / 1e6:.1f} MB)")
+        print(f"cold open + first lookup:        {open_ms:9.2f} ms")
+        print(f"predict_batch_for_users():       {pooled_us:9.1f} us/prediction "
+              f"({len(tasks)} tasks, {len(by_user)} users)")
+        print(f"predict_batch() per user:        {per_user_us:9.1f} us/prediction")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Scheduler benchmark suite.
+
+Times, on seeded synthetic workloads (see workloads.py):
+
+  - schedule.get_free_slots          per routine kind
+  - schedule.break_task_into_sessions per task
+  - schedule.schedule                the CLI entry point, JSON in/out (stdin/stdout),
+                                     and with --ndjson (streamed lines)
+  - main.generate_schedule           the FastAPI /schedule handler
+
+for routines that are fragmented, wrap past midnight or are dense, and
+task sets of 10 to 10k tasks. Each case reports ops/s, p50/p99 latency and
+the peak memory (tracemalloc) of one call.
+
+Results can be saved as a JSON baseline and compared on a later commit;
+the run exits with status 1 if a case got slower (p50) or uses more memory
+than the baseline allows:
+
+    python -m benchmarks.scheduler --save benchmarks/baselines/$(hostname).json
+    python -m benchmarks.scheduler --compare benchmarks/baselines/$(hostname).json
+
+Baselines are only comparable on the same machine, so keep one per box.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import schedule
+from task_records import task_records
+from benchmarks import workloads
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+DEFAULT_TOLERANCE = 0.25
+MIN_SAMPLES = 5
+MAX_SAMPLES = 2000
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def peak_memory_kb(fn) -> float:
+    """Peak Python/numpy allocation of one call, above what was allocated before it"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return round((peak - base) / 1024, 1)
+
+
+def measure(fn, min_time: float) -> dict:
+    """
+    Call fn repeatedly for about min_time seconds (at least MIN_SAMPLES,
+    at most MAX_SAMPLES calls) after one warm-up call.
+    """
+    fn()
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < MAX_SAMPLES and (len(samples) < MIN_SAMPLES or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return stats(samples, peak_memory_kb(fn))
+
+
+def measure_each(fn, items: list, min_time: float) -> dict:
+    """Like measure(), but every call handles the next item of `items` (cycling)"""
+    fn(items[0])
+    samples = []
+    started = time.perf_counter()
+    i = 0
+    while len(samples) < MAX_SAMPLES and (i < len(items) or time.perf_counter() - started < min_time):
+        item = items[i % len(items)]
+        t0 = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - t0)
+        i += 1
+    peak = max(peak_memory_kb(lambda: fn(item)) for item in items[:20])
+    return stats(samples, peak)
+
+
+def stats(samples: list, peak_kb: float) -> dict:
+    samples = sorted(samples)
+    total = sum(samples)
+    return {
+        "ops_per_sec": round(len(samples) / total, 1) if total > 0 else None,
+        "p50_ms": round(percentile(samples, 50) * 1e3, 4),
+        "p99_ms": round(percentile(samples, 99) * 1e3, 4),
+        "peak_kb": peak_kb,
+        "samples": len(samples)
+    }
+
+
+def run_cli(payload_json: str, args: list = ()):
+    """schedule.schedule() with the payload on stdin; returns its stdout"""
+    stdin, stdout, argv = sys.stdin, sys.stdout, sys.argv
+    sys.stdin, sys.stdout, sys.argv = io.StringIO(payload_json), io.StringIO(), ['schedule.py', *args]
+    try:
+        schedule.schedule()
+        return sys.stdout.getvalue()
+    finally:
+        sys.stdin, sys.stdout, sys.argv = stdin, stdout, argv
+
+
+def cases(sizes: list, seed: int, with_api: bool):
+    """(name, thunk that measures the case) for every benchmark case"""
+    for kind in workloads.ROUTINE_KINDS:
+        payload = workloads.schedule_payload(seed, kind, 0)
+        routine, blocks = payload["routine"], payload["routine_blocks"]
+        yield (f"get_free_slots/{kind}",
+               lambda min_time, r=routine, b=blocks: measure(
+                   lambda: schedule.get_free_slots(r['wake_up'], r['sleep'], b), min_time))
+
+    records = task_records(workloads.schedule_payload(seed, "fragmented", max(sizes))["tasks"])
+    yield ("break_task_into_sessions",
+           lambda min_time: measure_each(schedule.break_task_into_sessions, records, min_time))
+
+    for kind in workloads.ROUTINE_KINDS:
+        for n in sizes:
+            payload_json = json.dumps(workloads.schedule_payload(seed, kind, n))
+            yield (f"schedule.schedule/{kind}/{n}",
+                   lambda min_time, p=payload_json: measure(lambda: run_cli(p), min_time))
+            yield (f"schedule.schedule --ndjson/{kind}/{n}",
+                   lambda min_time, p=payload_json: measure(lambda: run_cli(p, ['--ndjson']), min_time))
+
+    if not with_api:
+        return
+    # Imported late: main loads the model registry and the training queue
+    import main
+    for kind in workloads.ROUTINE_KINDS:
+        for n in sizes:
+            payload = workloads.schedule_payload(seed, kind, n)
+            request = main.ScheduleRequest(**payload)
+            yield (f"main.generate_schedule/{kind}/{n}",
+                   lambda min_time, r=request: measure(lambda: main.generate_schedule(r), min_time))
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def machine() -> dict:
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Cases whose p50 latency or peak memory grew by more than tolerance"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        for key in ("p50_ms", "peak_kb"):
+            if base.get(key) and result[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {base[key]} -> {result[key]} (+{result[key] / base[key] - 1:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the schedulers on synthetic workloads.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Task set sizes')
+    parser.add_argument('--seed', type=int, default=42, help='Workload seed')
+    parser.add_argument('--min-time', type=float, default=1.0, help='Seconds to time each case for')
+    parser.add_argument('--only', help='Run only cases whose name contains this string')
+    parser.add_argument('--no-api', action='store_true', help='Skip main.generate_schedule (no FastAPI import)')
+    parser.add_argument('--save', help='Write the results to this JSON baseline')
+    parser.add_argument('--compare', help='Compare with this JSON baseline; exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed relative growth of p50 latency / peak memory')
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'case':45s} {'ops/s':>10s} {'p50 ms':>10s} {'p99 ms':>10s} {'peak KB':>10s}")
+    # The schedulers' per-task debug output goes to stderr; keep it out of the timings' way
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stderr(devnull):
+        for name, run in cases(args.sizes, args.seed, not args.no_api):
+            if args.only and args.only not in name:
+                continue
+            result = run(args.min_time)
+            results[name] = result
+            print(f"{name:45s} {result['ops_per_sec']:10.1f} {result['p50_ms']:10.3f} "
+                  f"{result['p99_ms']:10.3f} {result['peak_kb']:10.1f}", flush=True)
+
+    report = {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": machine(),
+        "seed": args.seed,
+        "sizes": args.sizes,
+        "results": results
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("machine") != report["machine"]:
+            print("Warning: baseline was recorded on a different machine", file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressions against {args.compare} (commit {baseline.get('commit')}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions against {args.compare} (commit {baseline.get('commit')})")
+
+
+if __name__ == "__main__":
+    main()
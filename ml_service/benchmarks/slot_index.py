@@ -0,0 +1,128 @@
+"""
+Slot search benchmark: list scan (previous schedule.py loop) vs FreeSlotIndex
+vs SlotScoreMatrix (masked argmax per session, as in place_sessions).
+
+Replays the same allocation sequence through all three and checks that
+every task lands in the same slot before timing them.
+
+    python -m benchmarks.slot_index [--tasks 500] [--days 1]
+"""
+
+import argparse
+import random
+import time
+
+from schedule import find_best_slot, slot_score, SLOT_BUFFER
+from slot_index import FreeSlotIndex
+from slot_scores import SlotScoreMatrix, COMPLEXITY_CODES, OTHER_COMPLEXITY
+
+
+def fragmented_slots(rng: random.Random, days: int) -> list:
+    """Free slots of 10-45 minutes between short routine blocks, 07:00-23:00 each day"""
+    slots = []
+    for day in range(days):
+        t = day * 1440 + 7 * 60
+        day_end = day * 1440 + 23 * 60
+        while t < day_end:
+            free = rng.randint(10, 45)
+            slots.append((t, min(t + free, day_end)))
+            t += free + rng.randint(5, 20)
+    return slots
+
+
+def random_session(rng: random.Random) -> tuple:
+    return (
+        rng.choice([5, 10, 15, 20, 25, 30]),
+        rng.choice(["Low", "Medium", "High"]),
+        rng.choice(["Low", "Medium", "High", "Urgent"]),
+    )
+
+
+def scan_best_slot(free_slots: list, duration: int, complexity: str, priority: str):
+    """The previous schedule.py loop: score every slot in the list"""
+    best_slot_index = -1
+    best_slot_score = -float('inf')
+    for i, (slot_start, slot_end) in enumerate(free_slots):
+        if slot_end - slot_start >= duration + SLOT_BUFFER:
+            score = slot_score(slot_start, complexity, priority)
+            if score > best_slot_score:
+                best_slot_score = score
+                best_slot_index = i
+    return best_slot_index
+
+
+def run_scan(slots: list, sessions: list) -> list:
+    free_slots = list(slots)
+    placed = []
+    for duration, complexity, priority in sessions:
+        i = scan_best_slot(free_slots, duration, complexity, priority)
+        if i == -1:
+            placed.append(None)
+            continue
+        slot_start, slot_end = free_slots[i]
+        placed.append(slot_start)
+        new_slot_start = slot_start + duration + SLOT_BUFFER
+        if new_slot_start < slot_end:
+            free_slots[i] = (new_slot_start, slot_end)
+        else:
+            free_slots.pop(i)
+    return placed
+
+
+def run_index(slots: list, sessions: list, horizon: int) -> list:
+    free_slots = FreeSlotIndex(slots, horizon=horizon)
+    placed = []
+    for duration, complexity, priority in sessions:
+        slot = find_best_slot(free_slots, duration, complexity, priority)
+        if slot is None:
+            placed.append(None)
+            continue
+        placed.append(slot[0])
+        free_slots.allocate(slot[0], min(slot[0] + duration + SLOT_BUFFER, slot[1]))
+    return placed
+
+
+def run_matrix(slots: list, sessions: list) -> list:
+    matrix = SlotScoreMatrix(
+        slots,
+        [COMPLEXITY_CODES.get(complexity, OTHER_COMPLEXITY) for _, complexity, _ in sessions],
+        [priority == 'Urgent' for _, _, priority in sessions],
+        [duration + SLOT_BUFFER for duration, _, _ in sessions]
+    )
+    placed = []
+    for i in range(len(sessions)):
+        j = matrix.best(i)
+        placed.append(None if j is None else matrix.take(i, j)[0])
+    return placed
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark free-slot search.')
+    parser.add_argument('--tasks', type=int, default=500, help='Sessions to place')
+    parser.add_argument('--days', type=int, default=1, help='Days of fragmented free time')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    for days in sorted({1, args.days}):
+        slots = fragmented_slots(rng, days)
+        sessions = [random_session(rng) for _ in range(args.tasks * days)]
+
+        expected, scan_ms = timed(run_scan, slots, sessions)
+        actual, index_ms = timed(run_index, slots, sessions, days * 1440)
+        assert actual == expected, "FreeSlotIndex placed a session differently from the list scan"
+        actual, matrix_ms = timed(run_matrix, slots, sessions)
+        assert actual == expected, "SlotScoreMatrix placed a session differently from the list scan"
+
+        placed = sum(p is not None for p in expected)
+        print(f"{days:3d} day(s), {len(slots):5d} slots, {len(sessions):6d} sessions ({placed} placed): "
+              f"list scan {scan_ms:8.1f} ms, index {index_ms:7.1f} ms, matrix {matrix_ms:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
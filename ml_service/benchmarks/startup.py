@@ -0,0 +1,171 @@
+"""
+Cold-start benchmark and budget check for the CLI entry points.
+
+The Node backend spawns predict.py / schedule.py per request (unless
+ML_WORKER=1), so every call pays interpreter start plus imports. Each case
+runs the script once per sample in a fresh interpreter with
+`python -X importtime`, answering one real request on stdin, and reports:
+
+  - wall_ms     spawn to exit, request included
+  - import_ms   total import time (sum of the top-level cumulative times)
+  - modules     number of modules imported
+
+The run fails (exit 1) if a case imports one of its forbidden modules
+(e.g. predict.py must not pull in pandas / sklearn when the flat model
+export is available) or if its median import time exceeds its budget.
+Budgets are relative to the import time of `python -c "import numpy"`,
+measured in the same run, so they hold on slower or faster machines:
+numpy is the floor every entry point pays, and pandas / sklearn would each
+add about as much again.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --budget-scale 1.5  # noisy machine
+    python -m benchmarks.startup --save benchmarks/baselines/startup-$(hostname).json
+    python -m benchmarks.startup --compare benchmarks/baselines/startup-$(hostname).json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks import workloads
+from benchmarks.scheduler import git_commit, machine, DEFAULT_TOLERANCE
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules an inference-only process has no use for
+HEAVY_MODULES = ('pandas', 'sklearn', 'scipy', 'joblib')
+
+PREDICT_REQUEST = {
+    "user_id": "startup-bench",
+    "title": "Read chapter 4",
+    "category": "Reading",
+    "estimated_size": 2,
+    "priority": "Medium",
+    "complexity": "Medium",
+    "num_pages": 30
+}
+
+# Reference import every budget is a multiple of
+REFERENCE = ('-c', ['import numpy'])
+
+# name -> (script, args, request, import budget (x reference), forbidden top-level packages)
+CASES = {
+    "predict.py": ("predict.py", [], PREDICT_REQUEST, 1.75, HEAVY_MODULES),
+    "schedule.py": ("schedule.py", [], None, 1.5, HEAVY_MODULES),
+    "schedule.py --ndjson": ("schedule.py", ["--ndjson"], None, 1.5, HEAVY_MODULES),
+}
+
+
+def parse_importtime(stderr: str):
+    """(total import seconds, set of imported module names) from -X importtime output"""
+    total_us = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # header line
+        name = fields[2].rstrip()
+        module = name.strip()
+        modules.add(module)
+        # Nested imports are indented; only top-level ones add to the total
+        if name.startswith(' ') and not name.startswith('  '):
+            total_us += int(fields[1])
+    return total_us / 1e6, modules
+
+
+def run_once(script: str, args: list, request_json: str):
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', script, *args], input=request_json,
+                          capture_output=True, text=True, cwd=SERVICE_DIR)
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"{script} exited with {proc.returncode}: {proc.stdout[-500:]}")
+    import_seconds, modules = parse_importtime(proc.stderr)
+    return wall, import_seconds, modules
+
+
+def measure(script: str, args: list, request: dict, samples: int) -> dict:
+    request_json = json.dumps(request)
+    run_once(script, args, request_json)  # warm the page cache / bytecode
+    walls, imports, modules = [], [], set()
+    for _ in range(samples):
+        wall, import_seconds, modules = run_once(script, args, request_json)
+        walls.append(wall)
+        imports.append(import_seconds)
+    return {
+        "wall_ms": round(statistics.median(walls) * 1e3, 1),
+        "import_ms": round(statistics.median(imports) * 1e3, 1),
+        "modules": len(modules),
+        "heavy": sorted(m for m in modules if m in HEAVY_MODULES)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure and check the cold start of the CLI entry points.')
+    parser.add_argument('--samples', type=int, default=5, help='Fresh interpreters per case')
+    parser.add_argument('--only', help='Run only cases whose name contains this string')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='Multiply the import budgets (noisy machines)')
+    parser.add_argument('--save', help='Write the results to this JSON baseline')
+    parser.add_argument('--compare', help='Compare with this JSON baseline; exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed relative growth of import time')
+    args = parser.parse_args()
+
+    schedule_request = workloads.schedule_payload(42, "fragmented", 50)
+    baseline_wall = measure('-c', ['pass'], {}, args.samples)["wall_ms"]
+    reference_ms = measure(*REFERENCE, {}, args.samples)["import_ms"]
+    print(f"Interpreter start (python -c pass): {baseline_wall:.1f} ms")
+    print(f"Reference import (python -c 'import numpy'): {reference_ms:.1f} ms")
+    print(f"{'case':25s} {'wall ms':>10s} {'import ms':>10s} {'budget':>8s} {'modules':>8s}")
+
+    results, failures = {}, []
+    for name, (script, script_args, request, budget, forbidden) in CASES.items():
+        if args.only and args.only not in name:
+            continue
+        result = measure(script, script_args, request or schedule_request, args.samples)
+        results[name] = result
+        budget_ms = budget * args.budget_scale * reference_ms
+        print(f"{name:25s} {result['wall_ms']:10.1f} {result['import_ms']:10.1f} {budget_ms:8.0f} {result['modules']:8d}",
+              flush=True)
+        imported = [m for m in result['heavy'] if m in forbidden]
+        if imported:
+            failures.append(f"{name}: imports {', '.join(imported)}")
+        if result['import_ms'] > budget_ms:
+            failures.append(f"{name}: import time {result['import_ms']} ms over the {budget_ms:.0f} ms budget "
+                            f"({budget * args.budget_scale:g}x the numpy import)")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump({"commit": git_commit(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "machine": machine(), "results": results}, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("machine") != machine():
+            print("Warning: baseline was recorded on a different machine", file=sys.stderr)
+        for name, result in results.items():
+            base = baseline.get("results", {}).get(name)
+            if base and result["import_ms"] > base["import_ms"] * (1 + args.tolerance):
+                failures.append(f"{name}: import_ms {base['import_ms']} -> {result['import_ms']} "
+                                f"(baseline commit {baseline.get('commit')})")
+
+    if failures:
+        print("Startup budget exceeded:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
+    print("All entry points within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Seeded synthetic workloads for the scheduler benchmarks.
+
+Every generator takes a random.Random, so the same seed gives the same
+routine and task set on every machine. Deadlines are relative to `now`
+(default: today at 00:00), since the schedulers count days from the
+current time.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+ROUTINE_KINDS = ("fragmented", "midnight", "dense")
+
+CATEGORIES = ["Revision", "Problems", "Writing", "Reading", "Presentation", "Project", "Other"]
+PRIORITIES = ["Low", "Medium", "High", "Urgent"]
+COMPLEXITIES = ["Low", "Medium", "High"]
+ACTIVITIES = ["class", "gym", "meal", "commute", "work", "other"]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def clock(minutes: int) -> str:
+    minutes %= 1440
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _block(rng: random.Random, start: int, end: int) -> dict:
+    # Block times come from the database as "HH:MM:SS"
+    block = {"activity_type": rng.choice(ACTIVITIES), "start_time": clock(start) + ":00", "end_time": clock(end) + ":00"}
+    if rng.random() < 0.2:
+        block["days"] = rng.sample(WEEKDAYS, rng.randint(1, 5))
+    return block
+
+
+def fragmented_routine(rng: random.Random) -> dict:
+    """Short blocks every 20-60 minutes from 07:00 to 23:00: many small gaps"""
+    blocks = []
+    t = 7 * 60 + rng.randint(0, 30)
+    while t < 23 * 60:
+        length = rng.randint(10, 40)
+        blocks.append(_block(rng, t, min(t + length, 23 * 60)))
+        t += length + rng.randint(10, 45)
+    return {"routine": {"wake_up": "07:00", "sleep": "23:00"}, "routine_blocks": blocks}
+
+
+def midnight_routine(rng: random.Random) -> dict:
+    """Night-shift day: blocks that wrap past midnight and a late sleep time"""
+    wake = rng.choice([9, 10, 11]) * 60
+    blocks = [
+        _block(rng, 22 * 60 + rng.randint(0, 60), rng.randint(1, 3) * 60),  # wraps midnight
+        _block(rng, 23 * 60 + 30, 30),
+    ]
+    t = wake + rng.randint(30, 90)
+    while t < 21 * 60:
+        length = rng.randint(30, 120)
+        blocks.append(_block(rng, t, t + length))
+        t += length + rng.randint(30, 120)
+    return {"routine": {"wake_up": clock(wake), "sleep": "23:59"}, "routine_blocks": blocks}
+
+
+def dense_routine(rng: random.Random) -> dict:
+    """Back-to-back (sometimes overlapping) blocks leaving a few short gaps"""
+    blocks = []
+    t = 6 * 60
+    while t < 22 * 60:
+        length = rng.randint(45, 150)
+        blocks.append(_block(rng, t, min(t + length, 22 * 60)))
+        t += length + rng.choice([-10, 0, 0, 5, 15, 30])
+    return {"routine": {"wake_up": "06:00", "sleep": "22:00"}, "routine_blocks": blocks}
+
+
+ROUTINES = {
+    "fragmented": fragmented_routine,
+    "midnight": midnight_routine,
+    "dense": dense_routine,
+}
+
+
+def random_deadline(rng: random.Random, now: datetime):
+    """Mixed deadline formats: none, past, today, days ahead, date-only, unparseable"""
+    roll = rng.random()
+    if roll < 0.15:
+        return None
+    if roll < 0.2:
+        return "someday"
+    when = now + timedelta(days=rng.choice([-2, 0, 0, 1, 2, 3, 5, 7, 14, 30]), minutes=rng.randint(0, 1439))
+    if roll < 0.3:
+        return when.strftime("%Y-%m-%d")
+    if roll < 0.4:
+        return when.strftime("%Y-%m-%dT%H:%M:%S")
+    return when.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def random_task(rng: random.Random, i: int, now: datetime) -> dict:
+    return {
+        "id": f"t{i}",
+        "title": f"Task {i}",
+        "category": rng.choice(CATEGORIES),
+        "estimated_size": rng.choice([0.5, 1, 2, 3.5, 5, 8]),
+        "predicted_time": rng.choice([10, 20, 30, 45, 60, 90, 120, 180, 300, 600]),
+        "progress": rng.choice([0, 0, 0, 10, 25, 50, 75, 90, 100]),
+        "deadline": random_deadline(rng, now),
+        "priority": rng.choice(PRIORITIES),
+        "complexity": rng.choice(COMPLEXITIES),
+    }
+
+
+def tasks(rng: random.Random, n: int, now: datetime = None) -> list:
+    now = now or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return [random_task(rng, i, now) for i in range(n)]
+
+
+def completed_today(rng: random.Random, task_list: list) -> dict:
+    """Minutes already done today for about one task in ten"""
+    return {task["id"]: rng.choice([15, 30, 45]) for task in task_list if rng.random() < 0.1}
+
+
+def schedule_payload(seed: int, kind: str, n_tasks: int, now: datetime = None) -> dict:
+    """A schedule.py request: routine of the given kind plus n_tasks tasks"""
+    rng = random.Random(f"{seed}-{kind}-{n_tasks}")
+    payload = ROUTINES[kind](rng)
+    payload["user_id"] = "bench"
+    payload["tasks"] = tasks(rng, n_tasks, now)
+    payload["completed_today"] = completed_today(rng, payload["tasks"])
+    return payload
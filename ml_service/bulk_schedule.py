@@ -0,0 +1,215 @@
+"""
+Bulk Schedule Precomputation
+Builds today's schedule for many users in one run, e.g. every user's morning
+plan off-peak, instead of one spawned schedule.py per request.
+
+Input:  JSONL, one user per line - the same payload schedule.py reads
+        (user_id, routine, routine_blocks, tasks, completed_today, ...).
+Output: JSONL in input order, {"user_id": ..., "schedule": [...]} per user
+        (plus any other keys build_schedule returns), or
+        {"user_id": ..., "error": "..."} if that user failed.
+
+Users are sent to a ProcessPoolExecutor in chunks of --chunk-size, so the
+per-task IPC cost is amortized and throughput grows with --workers. At most
+--workers * 4 chunks are in flight, so memory stays flat however long the
+input is. Every worker process caps its address space at --max-memory-mb
+(RLIMIT_AS, where supported): a runaway payload fails with MemoryError for
+that user only. If a worker dies outright, its chunk is retried alone in a
+fresh pool and bisected down to the users that crash it. Workers are
+replaced after --max-chunks-per-worker chunks.
+
+    python bulk_schedule.py < users.jsonl > schedules.jsonl
+    python bulk_schedule.py --input users.jsonl --output schedules.jsonl --workers 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+DEFAULT_CHUNK_SIZE = 32
+DEFAULT_MAX_MEMORY_MB = 1024
+DEFAULT_MAX_CHUNKS_PER_WORKER = 200
+IN_FLIGHT_PER_WORKER = 4
+
+
+def _init_worker(max_memory_mb: int, verbose: bool):
+    """Runs once in every worker process"""
+    if max_memory_mb:
+        try:
+            import resource
+            limit = max_memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError) as e:
+            print(f"Warning: could not limit worker memory: {e}", file=sys.stderr)
+    if not verbose:
+        # build_schedule's per-task debug output would flood the nightly log
+        sys.stderr = open(os.devnull, 'w')
+
+
+def _schedule_chunk(lines: list) -> list:
+    """Executed in a worker process: (output line, failed) per input line"""
+    from schedule import build_schedule
+
+    results = []
+    for line in lines:
+        user_id = None
+        try:
+            data = json.loads(line)
+            user_id = data.get('user_id')
+            result = {"user_id": user_id}
+            result.update(build_schedule(data))
+        except MemoryError:
+            result = {"user_id": user_id, "error": "memory limit exceeded"}
+        except Exception as e:
+            result = {"user_id": user_id, "error": str(e)}
+        results.append((json.dumps(result), "error" in result))
+    return results
+
+
+def _chunks(lines, chunk_size: int):
+    chunk = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _failed_chunk(lines: list, error: str) -> list:
+    results = []
+    for line in lines:
+        try:
+            user_id = json.loads(line).get('user_id')
+        except ValueError:
+            user_id = None
+        results.append((json.dumps({"user_id": user_id, "error": error}), True))
+    return results
+
+
+def run_bulk(lines, out, workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+             max_memory_mb: int = DEFAULT_MAX_MEMORY_MB,
+             max_chunks_per_worker: int = DEFAULT_MAX_CHUNKS_PER_WORKER, verbose: bool = False) -> dict:
+    """
+    Schedule every user in `lines` (an iterable of JSONL strings) and write
+    the results to `out` in input order. Returns run statistics.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    def make_executor():
+        # spawn: same as the training queue, safe from threaded parents
+        return ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(max_memory_mb, verbose),
+            max_tasks_per_child=max_chunks_per_worker
+        )
+
+    started = time.perf_counter()
+    users = errors = 0
+    executor = make_executor()
+    in_flight = deque()
+
+    def restart_executor():
+        nonlocal executor
+        executor.shutdown(wait=False)
+        executor = make_executor()
+
+    def run_alone(chunk):
+        """
+        Run chunk on its own in the (fresh) pool. If it kills a worker again,
+        bisect it, so only the users that crash a worker are reported failed.
+        """
+        try:
+            return executor.submit(_schedule_chunk, chunk).result()
+        except BrokenProcessPool:
+            restart_executor()
+            if len(chunk) == 1:
+                return _failed_chunk(chunk, "worker process died")
+            mid = len(chunk) // 2
+            return run_alone(chunk[:mid]) + run_alone(chunk[mid:])
+
+    def drain_one():
+        nonlocal users, errors
+        chunk, future = in_flight.popleft()
+        try:
+            results = future.result()
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory) and every in-flight
+            # chunk of that pool fails the same way, so the head chunk is not
+            # necessarily the one that crashed it. Start a fresh pool, retry
+            # the head chunk alone, then resubmit the rest.
+            restart_executor()
+            resubmit = [pending for pending, _ in in_flight]
+            in_flight.clear()
+            results = run_alone(chunk)
+            for pending in resubmit:
+                in_flight.append((pending, executor.submit(_schedule_chunk, pending)))
+        except Exception as e:
+            results = _failed_chunk(chunk, str(e))
+        for line, failed in results:
+            out.write(line + "\n")
+            users += 1
+            errors += failed
+        out.flush()
+
+    try:
+        for chunk in _chunks(lines, chunk_size):
+            if len(in_flight) >= workers * IN_FLIGHT_PER_WORKER:
+                drain_one()
+            in_flight.append((chunk, executor.submit(_schedule_chunk, chunk)))
+        while in_flight:
+            drain_one()
+    finally:
+        executor.shutdown(wait=True)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "users": users,
+        "errors": errors,
+        "workers": workers,
+        "chunk_size": chunk_size,
+        "seconds": round(elapsed, 3),
+        "users_per_second": round(users / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute schedules for many users (JSONL in, JSONL out).')
+    parser.add_argument('--input', help='Input JSONL file (default: stdin)')
+    parser.add_argument('--output', help='Output JSONL file (default: stdout)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Users per worker task')
+    parser.add_argument('--max-memory-mb', type=int, default=DEFAULT_MAX_MEMORY_MB,
+                        help='Address-space limit per worker, 0 for none')
+    parser.add_argument('--max-chunks-per-worker', type=int, default=DEFAULT_MAX_CHUNKS_PER_WORKER,
+                        help='Replace a worker process after this many chunks')
+    parser.add_argument('--verbose', action='store_true', help="Keep the scheduler's debug output")
+    args = parser.parse_args()
+
+    source = open(args.input) if args.input else sys.stdin
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        stats = run_bulk(source, out, args.workers, args.chunk_size, args.max_memory_mb,
+                         args.max_chunks_per_worker, args.verbose)
+    finally:
+        if args.input:
+            source.close()
+        if args.output:
+            out.close()
+    print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
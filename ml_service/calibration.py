@@ -0,0 +1,155 @@
+"""
+Residual Calibration
+Precomputed residual quantile tables for confidence intervals.
+
+Training writes a small JSON artifact next to each model
+(base_model_calibration.json / user_{id}_calibration.json) holding the
+5th/95th residual percentiles (minutes space):
+  - globally,
+  - per category,
+  - per prediction-magnitude bucket.
+The predictor loads it once and looks intervals up with array indexing,
+instead of np.load + np.percentile over all residuals on every request.
+
+Artifacts migrated from a residuals array alone (load_base_calibration,
+python calibration.py) have empty by_category / by_bucket tables: the
+residuals carry no predictions or categories, so every lookup falls back
+to the global quantiles until the model is retrained.
+"""
+
+import os
+import sys
+import json
+import numpy as np
+
+QUANTILES = [5, 95]  # 90% interval
+BUCKET_EDGES = [30, 60, 120, 240, 480]  # predicted minutes
+MIN_SAMPLES = 20  # per category / bucket, else fall back to global
+
+
+def build_calibration(residuals, predictions=None, categories=None,
+                      bucket_edges=BUCKET_EDGES, min_samples=MIN_SAMPLES) -> dict:
+    """
+    Build the quantile tables from residuals (y_true - y_pred, in minutes).
+    predictions (minutes) and categories are optional and enable the finer tables.
+    """
+    residuals = np.asarray(residuals, dtype=float)
+    calibration = {
+        "quantiles": QUANTILES,
+        "n": int(len(residuals)),
+        "global": [float(q) for q in np.percentile(residuals, QUANTILES)],
+        "by_category": {},
+        "bucket_edges": list(bucket_edges),
+        "by_bucket": []
+    }
+
+    if categories is not None:
+        categories = np.asarray(categories, dtype=object)
+        for category in np.unique(categories.astype(str)):
+            mask = categories.astype(str) == category
+            if mask.sum() >= min_samples:
+                calibration["by_category"][category] = [float(q) for q in np.percentile(residuals[mask], QUANTILES)]
+
+    if predictions is not None:
+        buckets = np.searchsorted(bucket_edges, np.asarray(predictions, dtype=float), side='right')
+        for bucket in range(len(bucket_edges) + 1):
+            mask = buckets == bucket
+            if mask.sum() >= min_samples:
+                calibration["by_bucket"].append([float(q) for q in np.percentile(residuals[mask], QUANTILES)])
+            else:
+                calibration["by_bucket"].append(None)
+
+    return calibration
+
+
+def save_calibration(calibration: dict, path: str):
+    # Write-then-rename, so a concurrent load never sees a partial file
+    with open(path + '.tmp', 'w') as f:
+        json.dump(calibration, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def load_calibration(path: str):
+    """Load a calibration artifact, or None if missing/unreadable"""
+    try:
+        with open(path, 'r') as f:
+            return IntervalCalibrator(json.load(f))
+    except Exception:
+        return None
+
+
+def load_base_calibration(model_dir: str):
+    """
+    Load base_model_calibration.json, migrating from base_model_residuals.npy
+    (global table only) if only the legacy residuals exist.
+    """
+    calibrator = load_calibration(os.path.join(model_dir, 'base_model_calibration.json'))
+    if calibrator is None:
+        residuals_path = os.path.join(model_dir, 'base_model_residuals.npy')
+        if os.path.exists(residuals_path):
+            calibrator = IntervalCalibrator(build_calibration(np.load(residuals_path)))
+    return calibrator
+
+
+class IntervalCalibrator:
+    """
+    O(1) interval lookup from a calibration dict.
+    Category quantiles take precedence, then magnitude bucket, then global.
+    """
+
+    def __init__(self, calibration: dict):
+        self.calibration = calibration
+        self.global_offsets = np.array(calibration["global"], dtype=float)
+        self.category_offsets = {k: np.array(v, dtype=float) for k, v in calibration.get("by_category", {}).items()}
+        self.bucket_edges = np.array(calibration.get("bucket_edges", []), dtype=float)
+
+        # Buckets without enough samples inherit the global offsets
+        by_bucket = calibration.get("by_bucket") or []
+        self.bucket_offsets = np.array(
+            [v if v is not None else calibration["global"] for v in by_bucket],
+            dtype=float
+        ).reshape(-1, 2)
+
+    def offsets(self, predictions, categories=None):
+        """
+        Return (lower_offsets, upper_offsets) arrays for an array of predictions.
+        """
+        predictions = np.asarray(predictions, dtype=float)
+        n = len(predictions)
+
+        if len(self.bucket_offsets) == len(self.bucket_edges) + 1:
+            buckets = np.searchsorted(self.bucket_edges, predictions, side='right')
+            table = self.bucket_offsets[buckets]
+        else:
+            table = np.tile(self.global_offsets, (n, 1))
+
+        if categories is not None and self.category_offsets:
+            for i, category in enumerate(categories):
+                category_offsets = self.category_offsets.get(category)
+                if category_offsets is not None:
+                    table[i] = category_offsets
+
+        return table[:, 0], table[:, 1]
+
+    def intervals(self, predictions, categories=None):
+        """
+        Return (lower_bounds, upper_bounds) integer arrays, floored at 5 minutes.
+        """
+        predictions = np.asarray(predictions)
+        lower_res, upper_res = self.offsets(predictions, categories)
+
+        lower = (predictions + lower_res).astype(np.int64)
+        upper = (predictions + upper_res).astype(np.int64)
+
+        return np.maximum(5, lower), np.maximum(5, upper)
+
+
+if __name__ == "__main__":
+    # Migrate an existing residuals array (global table only):
+    #   python calibration.py [models/base_model_residuals.npy] [models/base_model_calibration.json]
+    model_dir = os.path.join(os.path.dirname(__file__), 'models')
+    residuals_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(model_dir, 'base_model_residuals.npy')
+    output_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(model_dir, 'base_model_calibration.json')
+
+    save_calibration(build_calibration(np.load(residuals_path)), output_path)
+    print(f"Wrote {output_path}")
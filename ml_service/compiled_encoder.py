@@ -0,0 +1,260 @@
+"""
+Compiled Feature Encoder
+Pandas-free single-row inference path.
+
+Compiles the fitted FeatureEngineer -> ColumnTransformer(imputer + RobustScaler,
+OneHotEncoder) steps of a pipeline into plain numpy lookup tables, so one task
+dict can be turned straight into the regressor's input vector:
+
+    [scaled numeric + derived features..., one-hot indicators...]
+
+Only numpy is imported here; the fitted sklearn objects are read once in
+from_pipeline() and never called at inference time.
+"""
+
+import json
+import math
+import weakref
+import numpy as np
+
+NUMERIC_COLS = ['estimated_size', 'title_length', 'user_experience_level', 'num_pages', 'num_slides', 'num_questions']
+CATEGORICAL_COLS = ['category', 'priority', 'time_of_day', 'day_of_week', 'complexity']
+DERIVED_COLS = ['pages_per_size', 'slides_per_size', 'questions_per_size', 'pages_x_complexity', 'slides_x_complexity', 'complexity_score']
+
+COMPLEXITY_MAP = {'Low': 1, 'Medium': 2, 'High': 3}
+
+# float64, like the ColumnTransformer output: the base model has split thresholds
+# between near-identical derived values (e.g. 14 / 2.000001), and float32 rounding
+# sends rows down the wrong branch.
+FEATURE_DTYPE = np.float64
+
+
+_MISSING = object()
+
+
+def _category_key(value):
+    """OneHotEncoder treats None and NaN alike as the 'missing' category"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return _MISSING
+    return value
+
+
+def _to_number(value):
+    """Mirror of pd.to_numeric(errors='coerce').fillna(0) for one value"""
+    if value is None or isinstance(value, bool):
+        return float(value or 0)
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(number) else number
+
+
+def _divide(numerator, denominator):
+    """Float division with numpy semantics (x/0 -> +-inf, 0/0 -> nan)"""
+    if denominator == 0:
+        return math.nan if numerator == 0 else math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+
+def normalize_task(task: dict) -> dict:
+    """
+    Apply the same aliasing, defaults and FeatureEngineer derivations as the
+    DataFrame path (ImprovedTimePredictor._prepare_frame + FeatureEngineer.transform).
+    Returns a flat dict of raw numeric, derived and categorical feature values.
+    """
+    features = {}
+
+    estimated_size = task['estimated_size'] if 'estimated_size' in task else task.get('size', 0)
+    if 'title_length' in task:
+        title_length = task['title_length']
+    elif 'title' in task:
+        title_length = len(task['title']) if task['title'] else 0
+    else:
+        title_length = 0
+
+    features['estimated_size'] = _to_number(estimated_size)
+    features['title_length'] = _to_number(title_length)
+    for col in ('user_experience_level', 'num_pages', 'num_slides', 'num_questions'):
+        features[col] = _to_number(task.get(col, 0))
+
+    for col in CATEGORICAL_COLS:
+        features[col] = task[col] if col in task else 'unknown'
+
+    complexity_score = COMPLEXITY_MAP.get(features['complexity'], 2)
+    size = features['estimated_size'] + 1e-6
+
+    features['pages_per_size'] = _divide(features['num_pages'], size)
+    features['slides_per_size'] = _divide(features['num_slides'], size)
+    features['questions_per_size'] = _divide(features['num_questions'], size)
+    features['pages_x_complexity'] = features['num_pages'] * complexity_score
+    features['slides_x_complexity'] = features['num_slides'] * complexity_score
+    features['complexity_score'] = float(complexity_score)
+
+    return features
+
+
+class CompiledFeatureEncoder:
+    """
+    Fixed-order numpy encoder equivalent to the fitted preprocessing steps.
+    """
+
+    def __init__(self, numeric_cols, medians, centers, scales, categorical_cols, categories):
+        self.numeric_cols = list(numeric_cols)
+        self.medians = np.asarray(medians, dtype=np.float64)
+        self.centers = np.asarray(centers, dtype=np.float64)
+        self.scales = np.asarray(scales, dtype=np.float64)
+        self.categorical_cols = list(categorical_cols)
+        self.categories = [list(values) for values in categories]
+
+        # One-hot index lookup: per categorical column, value -> output position
+        self.n_numeric = len(self.numeric_cols)
+        self.category_index = []
+        offset = self.n_numeric
+        for values in self.categories:
+            self.category_index.append({_category_key(value): offset + i for i, value in enumerate(values)})
+            offset += len(values)
+        self.n_features = offset
+
+        self.feature_names = (
+            [f"num__{col}" for col in self.numeric_cols] +
+            [f"cat__{col}_{value}" for col, values in zip(self.categorical_cols, self.categories) for value in values]
+        )
+
+    @classmethod
+    def from_pipeline(cls, pipeline, metadata: dict = None):
+        """
+        Compile from a fitted FeatureEngineer -> preprocessor -> regressor pipeline.
+        metadata (base_model_metadata.json) is used to check the raw feature order.
+        """
+        preprocessor = pipeline.named_steps['preprocessor']
+        transformers = {name: (transformer, cols) for name, transformer, cols in preprocessor.transformers_}
+
+        numeric_pipeline, numeric_cols = transformers['num']
+        imputer = numeric_pipeline.named_steps['imputer']
+        scaler = numeric_pipeline.named_steps['scaler']
+        one_hot, categorical_cols = transformers['cat']
+
+        if getattr(one_hot, 'drop_idx_', None) is not None:
+            raise ValueError("OneHotEncoder with drop= is not supported")
+
+        n = len(numeric_cols)
+        centers = scaler.center_ if scaler.center_ is not None else np.zeros(n)
+        scales = scaler.scale_ if scaler.scale_ is not None else np.ones(n)
+
+        if metadata and metadata.get('feature_order'):
+            raw_cols = [col for col in numeric_cols if col not in DERIVED_COLS] + list(categorical_cols)
+            if sorted(raw_cols) != sorted(metadata['feature_order']):
+                raise ValueError("Pipeline columns do not match base_model_metadata.json feature_order")
+
+        return cls(numeric_cols, imputer.statistics_, centers, scales, categorical_cols, one_hot.categories_)
+
+    def encode_features(self, features: dict, out=None):
+        """
+        Encode a normalize_task() dict into a feature vector (written into out if given).
+        """
+        if out is None:
+            out = np.zeros(self.n_features, dtype=FEATURE_DTYPE)
+        else:
+            out.fill(0)
+
+        numeric = np.fromiter((features[col] for col in self.numeric_cols), dtype=np.float64, count=self.n_numeric)
+        numeric = np.where(np.isnan(numeric), self.medians, numeric)
+        out[:self.n_numeric] = (numeric - self.centers) / self.scales
+
+        for col, index in zip(self.categorical_cols, self.category_index):
+            position = index.get(_category_key(features[col]))
+            if position is not None:
+                out[position] = 1.0
+
+        return out
+
+    def encode_feature_rows(self, rows: list):
+        """
+        Encode many normalize_task() dicts into an (n, n_features) matrix.
+        Column-wise: the numeric columns are gathered into one array and
+        scaled in a single numpy pass, one-hot positions set with one
+        fancy-index assignment (same values as encode_features per row).
+        """
+        matrix = np.zeros((len(rows), self.n_features), dtype=FEATURE_DTYPE)
+        if not rows:
+            return matrix
+
+        numeric = np.array([[features[col] for col in self.numeric_cols] for features in rows], dtype=np.float64)
+        numeric = np.where(np.isnan(numeric), self.medians, numeric)
+        matrix[:, :self.n_numeric] = (numeric - self.centers) / self.scales
+
+        row_index, positions = [], []
+        for col, index in zip(self.categorical_cols, self.category_index):
+            for i, features in enumerate(rows):
+                position = index.get(_category_key(features[col]))
+                if position is not None:
+                    row_index.append(i)
+                    positions.append(position)
+        matrix[row_index, positions] = 1.0
+        return matrix
+
+    def encode(self, task: dict, out=None):
+        """Encode one raw task dict"""
+        return self.encode_features(normalize_task(task), out)
+
+    def encode_batch(self, tasks: list):
+        """Encode many raw task dicts into an (n, n_features) matrix"""
+        return self.encode_feature_rows([normalize_task(task) for task in tasks])
+
+    def to_arrays(self) -> dict:
+        """
+        Plain arrays for np.savez (no pickled objects; categories go through JSON).
+        """
+        categories = [[None if _category_key(v) is _MISSING else v for v in values] for values in self.categories]
+        return {
+            "encoder_numeric_cols": np.array(self.numeric_cols),
+            "encoder_medians": self.medians,
+            "encoder_centers": self.centers,
+            "encoder_scales": self.scales,
+            "encoder_categorical_cols": np.array(self.categorical_cols),
+            "encoder_categories_json": np.array(json.dumps(categories))
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Inverse of to_arrays() (accepts an np.load() NpzFile)"""
+        return cls(
+            [str(col) for col in arrays["encoder_numeric_cols"]],
+            arrays["encoder_medians"],
+            arrays["encoder_centers"],
+            arrays["encoder_scales"],
+            [str(col) for col in arrays["encoder_categorical_cols"]],
+            json.loads(str(arrays["encoder_categories_json"]))
+        )
+
+
+# Compiled encoders, cached per fitted pipeline object
+_ENCODERS = weakref.WeakKeyDictionary()
+
+
+def encoder_for(pipeline, metadata: dict = None):
+    """
+    Return the (cached) compiled encoder for a pipeline, or None if it can't be compiled.
+    """
+    try:
+        return _ENCODERS[pipeline]
+    except KeyError:
+        pass
+    try:
+        encoder = CompiledFeatureEncoder.from_pipeline(pipeline, metadata)
+    except Exception:
+        encoder = None
+    _ENCODERS[pipeline] = encoder
+    return encoder
+
+
+def predict_raw(pipeline, vector):
+    """
+    Feed an encoded vector straight to the pipeline's regressor (no ColumnTransformer).
+    Returns the raw regressor output (log minutes for the base model).
+    """
+    regressor = pipeline.named_steps['regressor']
+    if hasattr(regressor, 'coef_'):
+        return float(np.dot(vector, regressor.coef_) + regressor.intercept_)
+    return float(regressor.predict(vector.reshape(1, -1))[0])
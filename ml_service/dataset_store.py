@@ -0,0 +1,299 @@
+"""
+Dataset Store
+Columnar, memory-mapped training dataset for the base model.
+
+A store is a directory with one raw binary file per column plus schema.json:
+
+    schema.json            {"version", "rows", "columns": {name: spec}}
+    estimated_size.bin     float64, NaN = missing
+    category.bin           int16 codes into the column's "categories" (-1 = missing)
+    ...
+
+Columns are the model's NUMERIC_COLS / CATEGORICAL_COLS and the target
+(actual_time_minutes). Opening a store reads schema.json and maps the
+column files (np.memmap), so a cold load costs milliseconds whatever the
+row count, and only the pages actually read are paged in.
+
+append() writes the new rows' bytes at the end of each column file and then
+atomically replaces schema.json; the "rows" count there is the commit
+point, so an interrupted append leaves the store at its previous length
+(the stray bytes are cut off by the next append). New category values get
+new codes; existing codes never change. One writer at a time.
+
+    python dataset_store.py import-csv dataset.csv [--store DIR]
+    python dataset_store.py import-history history.json [--store DIR]
+    python dataset_store.py info [--store DIR]
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from compiled_encoder import NUMERIC_COLS, CATEGORICAL_COLS
+
+SCHEMA_VERSION = 1
+SCHEMA_FILENAME = 'schema.json'
+TARGET_COL = 'actual_time_minutes'
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'training_store')
+
+NUMERIC_DTYPE = np.float64
+CODE_DTYPE = np.int16
+MAX_CATEGORIES = np.iinfo(CODE_DTYPE).max
+
+CSV_CHUNK_ROWS = 50000
+
+
+def _default_columns() -> dict:
+    columns = {}
+    for name in NUMERIC_COLS + [TARGET_COL]:
+        columns[name] = {"kind": "numeric", "dtype": np.dtype(NUMERIC_DTYPE).str}
+    for name in CATEGORICAL_COLS:
+        columns[name] = {"kind": "category", "dtype": np.dtype(CODE_DTYPE).str, "categories": []}
+    return columns
+
+
+class DatasetStore:
+    """
+    Memory-mapped columnar dataset. Columns come back as read-only memmaps
+    (numeric values or category codes); frame() decodes rows into the
+    DataFrame layout train_base_model expects.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_DIR):
+        self.path = path
+        with open(os.path.join(path, SCHEMA_FILENAME), 'r') as f:
+            schema = json.load(f)
+        if schema.get('version') != SCHEMA_VERSION:
+            raise ValueError(f"Unsupported dataset store version {schema.get('version')} in {path}")
+        self.rows = schema['rows']
+        self.columns = schema['columns']
+        self._maps = {}
+
+    @classmethod
+    def create(cls, path: str = DEFAULT_STORE_DIR):
+        """Empty store at path (replacing any store already there)"""
+        os.makedirs(path, exist_ok=True)
+        columns = _default_columns()
+        for name in columns:
+            open(cls._column_path(path, name), 'wb').close()
+        cls._write_schema(path, 0, columns)
+        return cls(path)
+
+    @classmethod
+    def open_or_create(cls, path: str = DEFAULT_STORE_DIR):
+        if os.path.exists(os.path.join(path, SCHEMA_FILENAME)):
+            return cls(path)
+        return cls.create(path)
+
+    @classmethod
+    def from_csv(cls, csv_path: str, path: str = DEFAULT_STORE_DIR, chunk_rows: int = CSV_CHUNK_ROWS):
+        """Convert a CSV into a new store, chunk by chunk (memory stays bounded)"""
+        store = cls.create(path)
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+            store.append(chunk)
+        return store
+
+    @staticmethod
+    def _column_path(path: str, name: str) -> str:
+        return os.path.join(path, f"{name}.bin")
+
+    @staticmethod
+    def _write_schema(path: str, rows: int, columns: dict):
+        tmp = os.path.join(path, SCHEMA_FILENAME + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({"version": SCHEMA_VERSION, "rows": rows, "columns": columns}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(path, SCHEMA_FILENAME))
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def refresh(self):
+        """Pick up rows appended by another process"""
+        self.__init__(self.path)
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only memmap of a column's values (numeric) or codes (category)"""
+        if name not in self._maps:
+            dtype = np.dtype(self.columns[name]['dtype'])
+            if self.rows == 0:
+                self._maps[name] = np.empty(0, dtype=dtype)
+            else:
+                self._maps[name] = np.memmap(self._column_path(self.path, name), dtype=dtype, mode='r',
+                                             shape=(self.rows,))
+        return self._maps[name]
+
+    def categories(self, name: str) -> list:
+        return self.columns[name]['categories']
+
+    def frame(self, columns: list = None, rows=None) -> pd.DataFrame:
+        """
+        DataFrame of the given columns (default: all) for the given rows (a
+        slice or an index array; default: all). Category codes are decoded
+        to their strings, missing values to NaN, as pd.read_csv would.
+        """
+        columns = columns or list(self.columns)
+        rows = slice(None) if rows is None else rows
+        data = {}
+        for name in columns:
+            values = np.asarray(self.column(name)[rows])
+            spec = self.columns[name]
+            if spec['kind'] == 'category':
+                # Code -1 (missing) picks the trailing NaN
+                lookup = np.array(spec['categories'] + [np.nan], dtype=object)
+                values = lookup[values]
+            data[name] = values
+        return pd.DataFrame(data)
+
+    def iter_frames(self, batch_rows: int = CSV_CHUNK_ROWS, columns: list = None):
+        """frame() in batches of batch_rows rows"""
+        for start in range(0, self.rows, batch_rows):
+            yield self.frame(columns, slice(start, min(start + batch_rows, self.rows)))
+
+    def sample_rows(self, n: int, seed: int = 0) -> np.ndarray:
+        """Sorted random row indices (all rows if n >= len)"""
+        if n >= self.rows:
+            return np.arange(self.rows)
+        return np.sort(np.random.RandomState(seed).choice(self.rows, n, replace=False))
+
+    def _encode(self, name: str, values: pd.Series) -> np.ndarray:
+        spec = self.columns[name]
+        if spec['kind'] == 'numeric':
+            return pd.to_numeric(values, errors='coerce').to_numpy(dtype=NUMERIC_DTYPE)
+        values = values.where(values.isna(), values.astype(str))
+        categories = spec['categories']
+        known = set(categories)
+        for value in pd.unique(values.dropna()):
+            if value not in known:
+                categories.append(value)
+                known.add(value)
+        if len(categories) > MAX_CATEGORIES:
+            raise ValueError(f"Column '{name}' has more than {MAX_CATEGORIES} categories")
+        return pd.Categorical(values, categories=categories).codes.astype(CODE_DTYPE)
+
+    def append(self, rows) -> int:
+        """
+        Append rows (a DataFrame or a list of dicts with the store's columns;
+        missing columns are stored as missing). Returns the number of rows added.
+        """
+        df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+        n = len(df)
+        if n == 0:
+            return 0
+        df = df.reset_index(drop=True)
+        encoded = {}
+        for name in self.columns:
+            values = df[name] if name in df.columns else pd.Series([None] * n, dtype=object)
+            encoded[name] = self._encode(name, values)
+
+        self._maps.clear()  # drop our maps before growing the files
+        for name, values in encoded.items():
+            itemsize = np.dtype(self.columns[name]['dtype']).itemsize
+            with open(self._column_path(self.path, name), 'r+b') as f:
+                # Cut off bytes of an earlier append that never committed
+                f.truncate(self.rows * itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(values).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        self._write_schema(self.path, self.rows + n, self.columns)
+        self.rows += n
+        return n
+
+    def info(self) -> dict:
+        size = sum(os.path.getsize(self._column_path(self.path, name)) for name in self.columns)
+        return {
+            "path": self.path,
+            "rows": self.rows,
+            "bytes": size,
+            "categories": {name: len(spec['categories']) for name, spec in self.columns.items()
+                           if spec['kind'] == 'category'}
+        }
+
+
+def _time_of_day(hour: int) -> str:
+    if 5 <= hour < 12:
+        return 'morning'
+    if 12 <= hour < 17:
+        return 'afternoon'
+    if 17 <= hour < 21:
+        return 'evening'
+    return 'night'
+
+
+def history_rows(records: list) -> list:
+    """
+    Training rows from task_history exports (task_history joined with tasks,
+    as in backend/routes/ml.js). actual_time (or manual_time) is the target;
+    time_of_day / day_of_week come from completed_at. Rows without a
+    positive time are skipped.
+    """
+    rows = []
+    for record in records:
+        actual = record.get('actual_time') or record.get('manual_time')
+        try:
+            actual = float(actual)
+        except (TypeError, ValueError):
+            continue
+        if not actual > 0:
+            continue
+        row = {col: record.get(col) for col in NUMERIC_COLS + CATEGORICAL_COLS}
+        if row['title_length'] is None and record.get('title') is not None:
+            row['title_length'] = len(record['title'])
+        completed_at = record.get('completed_at')
+        if completed_at and (row['time_of_day'] is None or row['day_of_week'] is None):
+            try:
+                when = datetime.fromisoformat(str(completed_at).replace('Z', '+00:00'))
+                row['time_of_day'] = row['time_of_day'] or _time_of_day(when.hour)
+                row['day_of_week'] = row['day_of_week'] or when.strftime('%A')
+            except ValueError:
+                pass
+        row[TARGET_COL] = actual
+        rows.append(row)
+    return rows
+
+
+def _load_records(path: str) -> list:
+    """A JSON list or JSONL file of records ("-" = stdin)"""
+    f = sys.stdin if path == '-' else open(path)
+    try:
+        text = f.read()
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    text = text.strip()
+    if text.startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the columnar training dataset store.')
+    parser.add_argument('command', choices=['import-csv', 'import-history', 'info'])
+    parser.add_argument('source', nargs='?', help='CSV (import-csv) or JSON/JSONL task_history export (import-history, "-" = stdin)')
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help='Store directory')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'import-csv':
+            store = DatasetStore.from_csv(args.source, args.store)
+        elif args.command == 'import-history':
+            store = DatasetStore.open_or_create(args.store)
+            added = store.append(history_rows(_load_records(args.source)))
+            print(f"Appended {added} rows", file=sys.stderr)
+        else:
+            store = DatasetStore(args.store)
+        print(json.dumps(store.info()))
+    except Exception as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
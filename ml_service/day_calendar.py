@@ -0,0 +1,115 @@
+"""
+Day Calendar
+Routine blocks of one /schedule request, compiled once into occupancy arrays.
+
+main.py's slot search used to re-parse every routine block with strptime on
+every attempt (up to 100 attempts per task). DayCalendar parses them once
+and answers the two questions the search asks in O(1) / O(log blocks):
+
+  - conflicts(start, end): prefix sums over a per-second occupancy mask
+    (routine times carry seconds, "%H:%M:%S", and the search starts from
+    datetime.now(), so minute resolution would not be exact),
+  - jump target: the first block, in request order, that ends after the
+    current time (the search skips to its end + 10 minutes).
+"""
+
+import bisect
+from datetime import datetime, timedelta
+
+import numpy as np
+
+SECONDS_PER_DAY = 24 * 60 * 60
+US_PER_SECOND = 1000000
+
+
+def _seconds(time_str: str) -> int:
+    t = datetime.strptime(time_str, "%H:%M:%S")
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+class DayCalendar:
+    """
+    Busy routine blocks of a day, as (start_time, end_time) "HH:MM:SS" pairs.
+    """
+
+    def __init__(self, blocks):
+        self.starts = []
+        self.ends = []
+        for start_time, end_time in blocks:
+            self.starts.append(_seconds(start_time))
+            self.ends.append(_seconds(end_time))
+
+        # occupied[k] = second k is inside some block; prefix[k] = occupied seconds before k
+        delta = np.zeros(SECONDS_PER_DAY + 1, dtype=np.int32)
+        self.empty_or_wrapping = []
+        for start, end in zip(self.starts, self.ends):
+            if start < end:
+                delta[start] += 1
+                delta[end] -= 1
+            else:
+                # Blocks compare on one date, so end <= start never covers a
+                # range; keep the exact overlap test for them
+                self.empty_or_wrapping.append((start, end))
+        occupied = np.cumsum(delta[:-1]) > 0
+        self.prefix = np.concatenate(([0], np.cumsum(occupied, dtype=np.int64)))
+
+        # Jump table: block ends sorted ascending, with the smallest request
+        # index among all blocks ending after each position
+        order = sorted(range(len(self.ends)), key=lambda i: self.ends[i])
+        self.sorted_ends = [self.ends[i] for i in order]
+        self.first_index_after = [0] * (len(order) + 1)
+        self.first_index_after[len(order)] = None
+        for pos in range(len(order) - 1, -1, -1):
+            later = self.first_index_after[pos + 1]
+            self.first_index_after[pos] = order[pos] if later is None else min(order[pos], later)
+
+    def conflicts(self, start_us: int, end_us: int) -> bool:
+        """
+        Whether (start, end), in microseconds since midnight, overlaps a block,
+        i.e. start < block_end and end > block_start for some block.
+        """
+        if self.empty_or_wrapping:
+            start_s, end_s = start_us / US_PER_SECOND, end_us / US_PER_SECOND
+            for block_start, block_end in self.empty_or_wrapping:
+                if start_s < block_end and end_s > block_start:
+                    return True
+        first = start_us // US_PER_SECOND
+        last = min(-(-end_us // US_PER_SECOND), SECONDS_PER_DAY)
+        if first >= last:
+            return False
+        return self.prefix[last] > self.prefix[first]
+
+    def first_block_ending_after(self, time_us: int):
+        """End (seconds) of the first block in request order that ends after time_us, or None"""
+        # Ends are whole seconds, so end > t  <=>  end > floor(t)
+        pos = bisect.bisect_right(self.sorted_ends, time_us // US_PER_SECOND)
+        index = self.first_index_after[pos]
+        return None if index is None else self.ends[index]
+
+    def find_next_available_slot(self, current_time: datetime, duration: int, sleep_time: datetime):
+        """
+        Same search as the previous main.find_next_available_slot: try
+        current_time; on a conflict jump to (first block ending later) + 10
+        minutes, else + 15 minutes; give up after 100 attempts or at sleep_time.
+        """
+        midnight = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        max_attempts = 100
+        attempts = 0
+        while attempts < max_attempts:
+            attempts += 1
+            end_time = current_time + timedelta(minutes=duration)
+            if end_time > sleep_time:
+                return None
+            if current_time.date() != midnight.date():
+                # Blocks are compared on current_time's date
+                midnight = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
+            start_us = (current_time - midnight) // timedelta(microseconds=1)
+            end_us = (end_time - midnight) // timedelta(microseconds=1)
+            if not self.conflicts(start_us, end_us):
+                return current_time
+            block_end = self.first_block_ending_after(start_us)
+            if block_end is not None:
+                current_time = midnight + timedelta(seconds=block_end, minutes=10)
+            else:
+                current_time += timedelta(minutes=15)
+        return None
@@ -0,0 +1,124 @@
+"""
+Prediction Explainer
+Per-row explanations from per-feature contributions.
+
+Contributions come out of the same pass that produces the prediction:
+  - flat tree model: path-based contributions from the tree walk (flat_trees.py),
+  - personal LinearRegression: coefficient x transformed value.
+This module only maps them back to the raw task fields. The column -> field
+mapping and the global importance ranking are built once per loaded model.
+"""
+
+import weakref
+import numpy as np
+
+from flat_trees import FlatTreeModel
+
+DEFAULT_TEXT = "Based on historical task patterns."
+
+
+def _format_value(value) -> str:
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+class PredictionExplainer:
+    """
+    Groups transformed columns (num__x, cat__col_value) back into raw task fields.
+    """
+
+    def __init__(self, feature_names, categorical_cols, column_importances, top_k: int = 3):
+        self.top_k = top_k
+
+        groups = []
+        for name in feature_names:
+            if name.startswith("num__"):
+                groups.append(name[len("num__"):])
+            else:
+                field = name[len("cat__"):]
+                groups.append(next((col for col in categorical_cols if field.startswith(col + "_")), field))
+
+        self.group_names = list(dict.fromkeys(groups))
+        group_index = {name: i for i, name in enumerate(self.group_names)}
+
+        # (n_columns, n_groups) 0/1 matrix: contributions @ matrix sums columns per field
+        self.group_matrix = np.zeros((len(feature_names), len(self.group_names)))
+        self.group_matrix[np.arange(len(feature_names)), [group_index[g] for g in groups]] = 1.0
+
+        self.global_importances = np.asarray(column_importances, dtype=float) @ self.group_matrix
+        self.global_ranking = np.argsort(-self.global_importances)[:top_k]
+
+    def explain(self, contributions, rows: list, raw_preds, model_source: str):
+        """
+        Returns one (explanations, explanation_text) pair per row.
+        contributions is (n_rows, n_columns) in model output units, or None.
+        """
+        if contributions is None:
+            return [self._explain_global()] * len(rows)
+
+        grouped = np.asarray(contributions) @ self.group_matrix
+
+        if model_source == "base":
+            # Log-space model: minutes the prediction would lose without this field
+            grouped = np.exp(np.asarray(raw_preds))[:, None] * (1.0 - np.exp(-grouped))
+
+        magnitude = np.abs(grouped)
+        totals = magnitude.sum(axis=1)
+        top = np.argsort(-magnitude, axis=1)[:, :self.top_k]
+
+        results = []
+        for i, row in enumerate(rows):
+            explanations = []
+            for g in top[i]:
+                if magnitude[i, g] == 0:
+                    break
+                name = self.group_names[g]
+                explanations.append({
+                    "feature": name,
+                    "value": _format_value(row.get(name, "")),
+                    "contribution": round(float(grouped[i, g]), 1),
+                    "importance": round(float(magnitude[i, g] / totals[i]), 3) if totals[i] > 0 else 0.0
+                })
+            if not explanations:
+                results.append(([], DEFAULT_TEXT))
+                continue
+            parts = [f"{e['feature']} = {e['value']} ({e['contribution']:+.0f} min)" for e in explanations[:2]]
+            results.append((explanations, f"Prediction based primarily on {', '.join(parts)}."))
+        return results
+
+    def _explain_global(self):
+        explanations = [
+            {"feature": self.group_names[g], "importance": float(self.global_importances[g])}
+            for g in self.global_ranking if self.global_importances[g] > 0
+        ]
+        if len(explanations) < 2:
+            return [], DEFAULT_TEXT
+        return explanations, f"Prediction based primarily on {explanations[0]['feature']}, {explanations[1]['feature']}."
+
+
+# Explainers, cached per loaded model object
+_EXPLAINERS = weakref.WeakKeyDictionary()
+
+
+def explainer_for(model, encoder):
+    """
+    Return the (cached) explainer for a FlatTreeModel or sklearn pipeline, or None.
+    """
+    if encoder is None:
+        return None
+    try:
+        return _EXPLAINERS[model]
+    except KeyError:
+        pass
+
+    if isinstance(model, FlatTreeModel):
+        importances = model.ensemble.feature_importances(encoder.n_features)
+    else:
+        regressor = model if hasattr(model, 'coef_') else model.named_steps['regressor']
+        if hasattr(regressor, 'coef_'):
+            importances = np.abs(regressor.coef_)
+        else:
+            importances = getattr(regressor, 'feature_importances_', np.zeros(encoder.n_features))
+
+    explainer = PredictionExplainer(encoder.feature_names, encoder.categorical_cols, importances)
+    _EXPLAINERS[model] = explainer
+    return explainer
@@ -0,0 +1,52 @@
+"""
+Feature Engineer
+The sklearn transformer at the front of the base and personal pipelines.
+
+Kept out of improved_predictor.py so that predicting with the exported
+artifacts (flat_trees.py, incremental_model.py) never imports pandas or
+sklearn; improved_predictor still resolves FeatureEngineer for pickled
+pipelines that reference it there.
+"""
+
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+class FeatureEngineer(BaseEstimator, TransformerMixin):
+    """
+    Custom transformer to create derived features:
+      - pages_per_size
+      - slides_per_size
+      - questions_per_size
+      - pages_x_complexity
+      - slides_x_complexity
+      
+    And map complexity to numeric score.
+    """
+    def __init__(self):
+        pass
+        
+    def fit(self, X, y=None):
+        return self
+        
+    def transform(self, X):
+        X = X.copy()
+        
+        # Ensure numeric columns are numeric (handle strings from API)
+        for col in ['estimated_size', 'num_pages', 'num_slides', 'num_questions', 'title_length', 'user_experience_level']:
+             if col in X.columns:
+                X[col] = pd.to_numeric(X[col], errors='coerce').fillna(0)
+        
+        # Map complexity -> complexity_score
+        complexity_map = {'Low': 1, 'Medium': 2, 'High': 3}
+        X['complexity_score'] = X['complexity'].map(complexity_map).fillna(2) # Default Medium
+        
+        # Derived features
+        # Add small epsilon to avoid division by zero
+        X['pages_per_size'] = X['num_pages'] / (X['estimated_size'] + 1e-6)
+        X['slides_per_size'] = X['num_slides'] / (X['estimated_size'] + 1e-6)
+        X['questions_per_size'] = X['num_questions'] / (X['estimated_size'] + 1e-6)
+        
+        X['pages_x_complexity'] = X['num_pages'] * X['complexity_score']
+        X['slides_x_complexity'] = X['num_slides'] * X['complexity_score']
+        
+        return X
@@ -0,0 +1,221 @@
+"""
+Flat Tree Ensemble
+Array-backed evaluator for the HistGradientBoosting base model.
+
+train_base_model.export_flat_trees() stores every tree of the fitted
+regressor as contiguous numpy arrays (feature, threshold, left, right,
+value, ...) in models/base_model_trees.npz, together with the compiled
+feature encoder. Loading it needs neither sklearn nor unpickling, and a
+whole batch of rows walks all trees at once with vectorized numpy.
+"""
+
+import numpy as np
+
+from compiled_encoder import CompiledFeatureEncoder
+
+FLAT_MODEL_FILENAME = 'base_model_trees.npz'
+
+
+class FlatTreeEnsemble:
+    """
+    Sum-of-trees regressor over concatenated node arrays.
+
+    Node indices are global (across all trees). Leaves point left/right at
+    themselves, so every row can take exactly max_depth steps without
+    branching on is_leaf.
+
+    mean holds the training-count-weighted mean leaf value below every node,
+    which gives path-based (Saabas) per-feature contributions for free during
+    the same walk: each step attributes mean[child] - mean[node] to the split
+    feature, and bias + sum(contributions) equals the prediction.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, missing_go_to_left, roots, baseline, max_depth,
+                 count=None, mean=None):
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.intp)
+        self.right = np.asarray(right, dtype=np.intp)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.missing_go_to_left = np.asarray(missing_go_to_left, dtype=bool)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.baseline = float(baseline)
+        self.max_depth = int(max_depth)
+        self.count = np.asarray(count, dtype=np.float64) if count is not None else None
+        self.mean = np.asarray(mean, dtype=np.float64) if mean is not None else None
+        self.bias = self.baseline + self.mean[self.roots].sum() if self.mean is not None else None
+
+    @property
+    def has_contributions(self) -> bool:
+        return self.mean is not None
+
+    def feature_importances(self, n_features: int):
+        """
+        Global split importance per input column (count-weighted squared-error
+        reduction of every split), normalized to sum to 1.
+        """
+        importances = np.zeros(n_features)
+        if self.count is None or self.mean is None:
+            return importances
+        internal = self.left != np.arange(len(self.left))
+        nodes = np.flatnonzero(internal)
+        left, right = self.left[nodes], self.right[nodes]
+        gain = self.count[left] * self.count[right] / self.count[nodes] * (self.mean[left] - self.mean[right]) ** 2
+        importances += np.bincount(self.feature[nodes], weights=gain, minlength=n_features)[:n_features]
+        total = importances.sum()
+        return importances / total if total > 0 else importances
+
+    @classmethod
+    def from_regressor(cls, regressor):
+        """
+        Flatten a fitted (single-output) HistGradientBoostingRegressor.
+        """
+        features, thresholds, lefts, rights, values, missing_left, roots = [], [], [], [], [], [], []
+        counts, means = [], []
+        max_depth = 0
+        offset = 0
+
+        for iteration in regressor._predictors:
+            nodes = iteration[0].nodes
+            if nodes['is_categorical'].any():
+                raise ValueError("Categorical splits are not supported")
+
+            n = len(nodes)
+            own = np.arange(offset, offset + n)
+            is_leaf = nodes['is_leaf'].astype(bool)
+
+            roots.append(offset)
+            features.append(np.where(is_leaf, 0, nodes['feature_idx']))
+            thresholds.append(nodes['num_threshold'])
+            lefts.append(np.where(is_leaf, own, nodes['left'].astype(np.int64) + offset))
+            rights.append(np.where(is_leaf, own, nodes['right'].astype(np.int64) + offset))
+            values.append(np.where(is_leaf, nodes['value'], 0.0))
+            missing_left.append(nodes['missing_go_to_left'].astype(bool))
+
+            # Count-weighted mean leaf value below each node, deepest level first
+            count = nodes['count'].astype(np.float64)
+            mean = np.where(is_leaf, nodes['value'], 0.0)
+            for depth in range(int(nodes['depth'].max()) - 1, -1, -1):
+                internal = np.flatnonzero(~is_leaf & (nodes['depth'] == depth))
+                l, r = nodes['left'][internal], nodes['right'][internal]
+                mean[internal] = (count[l] * mean[l] + count[r] * mean[r]) / (count[l] + count[r])
+            counts.append(count)
+            means.append(mean)
+
+            max_depth = max(max_depth, int(nodes['depth'].max()))
+            offset += n
+
+        return cls(
+            np.concatenate(features), np.concatenate(thresholds),
+            np.concatenate(lefts), np.concatenate(rights),
+            np.concatenate(values), np.concatenate(missing_left),
+            np.array(roots), np.ravel(regressor._baseline_prediction)[0], max_depth,
+            np.concatenate(counts), np.concatenate(means)
+        )
+
+    def _walk(self, X, contributions: bool):
+        """
+        Walk all rows through all trees. Returns (leaf node matrix, contributions or None).
+        """
+        n_rows, n_features = X.shape
+        nodes = np.broadcast_to(self.roots, (n_rows, len(self.roots))).copy()
+        contrib = np.zeros(n_rows * n_features) if contributions else None
+        row_offsets = (np.arange(n_rows) * n_features)[:, None]
+
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            x = np.take_along_axis(X, feature, axis=1)
+            go_left = (x <= self.threshold[nodes]) | (np.isnan(x) & self.missing_go_to_left[nodes])
+            children = np.where(go_left, self.left[nodes], self.right[nodes])
+            if contributions:
+                # Leaves point at themselves, so their delta is 0
+                delta = self.mean[children] - self.mean[nodes]
+                contrib += np.bincount((row_offsets + feature).ravel(), weights=delta.ravel(), minlength=contrib.size)
+            nodes = children
+
+        return nodes, (contrib.reshape(n_rows, n_features) if contributions else None)
+
+    def _sum_leaves(self, nodes):
+        leaf_values = self.value[nodes]
+
+        # Accumulate tree by tree from the baseline, in the same order as sklearn
+        raw = np.full(leaf_values.shape[0], self.baseline)
+        for tree in range(leaf_values.shape[1]):
+            raw += leaf_values[:, tree]
+        return raw
+
+    def leaves(self, X):
+        """
+        Return the (n_rows, n_trees) matrix of leaf node indices reached by each row.
+        """
+        return self._walk(np.atleast_2d(np.asarray(X, dtype=np.float64)), contributions=False)[0]
+
+    def predict(self, X):
+        """
+        Raw predictions (same scale as regressor.predict, i.e. log minutes for the base model).
+        """
+        return self._sum_leaves(self.leaves(X))
+
+    def predict_with_contributions(self, X):
+        """
+        Raw predictions plus (n_rows, n_features) per-feature contributions from the same walk.
+        bias + contributions.sum(axis=1) == predictions (up to float rounding).
+        """
+        if not self.has_contributions:
+            raise ValueError("This export has no node means; re-run the exporter")
+        nodes, contrib = self._walk(np.atleast_2d(np.asarray(X, dtype=np.float64)), contributions=True)
+        return self._sum_leaves(nodes), contrib
+
+    def to_arrays(self) -> dict:
+        return {
+            "tree_feature": self.feature.astype(np.int32),
+            "tree_threshold": self.threshold,
+            "tree_left": self.left.astype(np.int32),
+            "tree_right": self.right.astype(np.int32),
+            "tree_value": self.value,
+            "tree_missing_go_to_left": self.missing_go_to_left,
+            "tree_roots": self.roots.astype(np.int32),
+            "tree_baseline": np.array(self.baseline),
+            "tree_max_depth": np.array(self.max_depth),
+            **({"tree_count": self.count, "tree_mean": self.mean} if self.has_contributions else {})
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(
+            arrays["tree_feature"], arrays["tree_threshold"],
+            arrays["tree_left"], arrays["tree_right"],
+            arrays["tree_value"], arrays["tree_missing_go_to_left"],
+            arrays["tree_roots"], arrays["tree_baseline"], arrays["tree_max_depth"],
+            arrays["tree_count"] if "tree_count" in arrays else None,
+            arrays["tree_mean"] if "tree_mean" in arrays else None
+        )
+
+
+class FlatTreeModel:
+    """
+    Compiled encoder + flat tree ensemble: a complete, sklearn-free base model.
+    """
+
+    def __init__(self, encoder: CompiledFeatureEncoder, ensemble: FlatTreeEnsemble):
+        self.encoder = encoder
+        self.ensemble = ensemble
+
+    def predict_vectors(self, X):
+        return self.ensemble.predict(X)
+
+    def save(self, path: str):
+        np.savez(path, **self.encoder.to_arrays(), **self.ensemble.to_arrays())
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(CompiledFeatureEncoder.from_arrays(arrays), FlatTreeEnsemble.from_arrays(arrays))
+
+
+def load_flat_model(path: str):
+    """Load a FlatTreeModel, or None if missing/unreadable"""
+    try:
+        return FlatTreeModel.load(path)
+    except Exception:
+        return None
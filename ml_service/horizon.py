@@ -0,0 +1,167 @@
+"""
+Horizon Scheduling
+Lays out every session of every task across the next horizon_days days in
+one pass, instead of planning only "today" on every call.
+
+  - Each day gets its own FreeSlotIndex, built from the routine blocks that
+    apply on that weekday (routine_blocks.days).
+  - Tasks are taken in the usual priority/deadline order. A task's remaining
+    work is spread over the days up to its deadline: each day gets
+    ceil(remaining / days left), split into sessions of at most
+    MAX_SESSION_DURATION minutes. Work that does not fit on a day rolls over
+    to the next one.
+  - Work that still does not fit by the deadline is reported in
+    "unscheduled" (reason "no_free_slots"); the share of tasks due after the
+    horizon that falls past its end is reported with reason "beyond_horizon".
+
+Request: the schedule.py payload plus "horizon_days" (and optionally
+"start_date", YYYY-MM-DD). Response: {"schedule": today's entries,
+"plan": [{"date", "weekday", "schedule"}...], "unscheduled": [...]}, or
+with schedule.py --ndjson one line per entry (see horizon_lines).
+"""
+
+import math
+from datetime import datetime, timedelta
+
+from task_records import task_records
+
+from schedule import (
+    get_free_slots, find_best_slot, blocks_for_weekday, ordered_entries,
+    task_order, days_until_deadline, minutes_to_time,
+    SLOT_BUFFER, MAX_SESSION_DURATION, WEEKDAYS, DONE_KEY
+)
+
+MAX_HORIZON_DAYS = 60
+
+
+def plan_horizon(data):
+    """
+    Place every session of the horizon. Returns (dates, day_blocks,
+    day_items, unscheduled), where day_items holds per day the
+    (start minute, entry) pairs for ordered_entries().
+    """
+    routine = data.get('routine', {})
+    tasks = task_records(data.get('tasks', []))
+    routine_blocks = data.get('routine_blocks', [])
+    completed_today = data.get('completed_today', {})
+    horizon_days = max(1, min(int(data.get('horizon_days', 14)), MAX_HORIZON_DAYS))
+
+    wake_up_str = routine.get('wake_up', '07:00')
+    sleep_str = routine.get('sleep', '23:00')
+
+    now = datetime.now()
+    if data.get('start_date'):
+        now = datetime.strptime(data['start_date'], "%Y-%m-%d")
+    dates = [now.date() + timedelta(days=d) for d in range(horizon_days)]
+
+    # One free-slot index and routine block list per day
+    day_blocks = [blocks_for_weekday(routine_blocks, date.weekday()) for date in dates]
+    day_slots = [get_free_slots(wake_up_str, sleep_str, blocks) for blocks in day_blocks]
+    day_entries = [[] for _ in dates]
+    unscheduled = []
+
+    for task in sorted(tasks, key=task_order):
+        total_time = task.predicted_time
+        progress = task.progress
+        remaining_minutes = int(total_time * (1 - progress / 100.0))
+
+        # Work already logged today counts towards today's share
+        completed_mins = completed_today.get(task.id, completed_today.get(str(task.id), 0))
+        if completed_mins > 0:
+            day_entries[0].append((DONE_KEY, {
+                "task_id": task.id,
+                "title": task.title,
+                "start": "Done", # Special marker
+                "end": "Today",
+                "duration": completed_mins,
+                "type": "completed_session",
+                "status": "Completed"
+            }))
+
+        if remaining_minutes < 1:
+            continue
+
+        if task.deadline_text:
+            days_available = days_until_deadline(task, now)
+        else:
+            # Same spread as break_task_into_sessions for undated tasks
+            days_available = min(7, max(3, remaining_minutes // 30))
+        last_day = min(days_available, horizon_days)
+
+        sessions = []
+        left = remaining_minutes
+        for day in range(last_day):
+            if left <= 0:
+                break
+            allocation = math.ceil(left / (days_available - day))
+            if day == 0:
+                allocation -= completed_mins
+            while allocation > 0 and left > 0:
+                duration = min(allocation, MAX_SESSION_DURATION, left)
+                slot = find_best_slot(day_slots[day], duration, task.complexity, task.priority)
+                if slot is None:
+                    break
+                day_slots[day].allocate(slot[0], min(slot[0] + duration + SLOT_BUFFER, slot[1]))
+                sessions.append((day, slot[0], duration))
+                allocation -= duration
+                left -= duration
+
+        for num, (day, start, duration) in enumerate(sessions, 1):
+            title = task.title
+            if len(sessions) > 1:
+                title = f"{title} (Part {num}/{len(sessions)})"
+            day_entries[day].append((start, {
+                "task_id": task.id,
+                "title": title,
+                "start": minutes_to_time(start),
+                "end": minutes_to_time(start + duration),
+                "duration": duration,
+                "remaining_minutes": remaining_minutes,
+                "total_minutes": total_time,
+                "session_info": {"session_num": num, "total_sessions": len(sessions)}
+            }))
+
+        if left > 0:
+            unscheduled.append({
+                "task_id": task.id,
+                "title": task.title,
+                "unscheduled_minutes": left,
+                "deadline": task.deadline_text,
+                "reason": "beyond_horizon" if days_available > horizon_days else "no_free_slots"
+            })
+
+    return dates, day_blocks, day_entries, unscheduled
+
+
+def build_horizon_plan(data):
+    dates, day_blocks, day_items, unscheduled = plan_horizon(data)
+    plan = []
+    for date, blocks, items in zip(dates, day_blocks, day_items):
+        plan.append({
+            "date": date.isoformat(),
+            "weekday": WEEKDAYS[date.weekday()].capitalize(),
+            "schedule": list(ordered_entries(items, blocks))
+        })
+
+    return {
+        "schedule": plan[0]["schedule"],
+        "plan": plan,
+        "unscheduled": unscheduled
+    }
+
+
+def horizon_lines(data):
+    """
+    build_horizon_plan as NDJSON records (see schedule.schedule_lines): each
+    day's entries in start order, then the unscheduled work, then "end".
+    """
+    dates, day_blocks, day_items, unscheduled = plan_horizon(data)
+    count = 0
+    for date, blocks, items in zip(dates, day_blocks, day_items):
+        day = date.isoformat()
+        for entry in ordered_entries(items, blocks):
+            count += 1
+            yield {"date": day, "entry": entry}
+    for item in unscheduled:
+        yield {"unscheduled": item}
+    yield {"end": {"entries": count, "days": len(dates), "unscheduled": len(unscheduled)}}
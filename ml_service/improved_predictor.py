@@ -1,351 +1,482 @@
 
 import numpy as np
-import pandas as pd
-from sklearn.base import BaseEstimator, TransformerMixin
-from sklearn.pipeline import Pipeline
-from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder, RobustScaler
-from sklearn.linear_model import LinearRegression
-import joblib
 import os
 import json
 
+from calibration import load_calibration, load_base_calibration
+from compiled_encoder import encoder_for, normalize_task
+from flat_trees import FlatTreeModel, load_flat_model, FLAT_MODEL_FILENAME
+from explainer import explainer_for, DEFAULT_TEXT
+from prediction_cache import feature_key
+from incremental_model import IncrementalLinearModel, load_incremental_model, task_target, INCREMENTAL_MODEL_SUFFIX, MIN_TASKS
+from model_store import ModelStore, user_model_name
+from pooled_model import PooledPersonalModel
+
 # 1. DETERMINISM
 SEED = 42
 np.random.seed(SEED)
 
-class FeatureEngineer(BaseEstimator, TransformerMixin):
-    """
-    Custom transformer to create derived features:
-      - pages_per_size
-      - slides_per_size
-      - questions_per_size
-      - pages_x_complexity
-      - slides_x_complexity
-      
-    And map complexity to numeric score.
-    """
-    def __init__(self):
-        pass
-        
-    def fit(self, X, y=None):
-        return self
-        
-    def transform(self, X):
-        X = X.copy()
-        
-        # Ensure numeric columns are numeric (handle strings from API)
-        for col in ['estimated_size', 'num_pages', 'num_slides', 'num_questions', 'title_length', 'user_experience_level']:
-             if col in X.columns:
-                X[col] = pd.to_numeric(X[col], errors='coerce').fillna(0)
-        
-        # Map complexity -> complexity_score
-        complexity_map = {'Low': 1, 'Medium': 2, 'High': 3}
-        X['complexity_score'] = X['complexity'].map(complexity_map).fillna(2) # Default Medium
-        
-        # Derived features
-        # Add small epsilon to avoid division by zero
-        X['pages_per_size'] = X['num_pages'] / (X['estimated_size'] + 1e-6)
-        X['slides_per_size'] = X['num_slides'] / (X['estimated_size'] + 1e-6)
-        X['questions_per_size'] = X['num_questions'] / (X['estimated_size'] + 1e-6)
-        
-        X['pages_x_complexity'] = X['num_pages'] * X['complexity_score']
-        X['slides_x_complexity'] = X['num_slides'] * X['complexity_score']
-        
-        return X
+def __getattr__(name):
+    # Pipelines pickled before feature_engineer.py existed reference
+    # improved_predictor.FeatureEngineer; import sklearn only when one is loaded
+    if name == 'FeatureEngineer':
+        from feature_engineer import FeatureEngineer
+        return FeatureEngineer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class ImprovedTimePredictor:
     """
     Production-ready ML Predictor using sklearn Pipeline.
+    user_id=None gives a base-model-only predictor.
     """
     
-    def __init__(self, user_id: str):
+    def __init__(self, user_id: str, registry=None):
         self.user_id = user_id
+        self.registry = registry
         self.base_pipeline = None
+        self.base_flat_model = None
         self.user_pipeline = None
         self.base_pipeline_ready = False
         self.user_pipeline_ready = False
+        self.base_calibrator = None
+        self.user_calibrator = None
         self.metadata = {}
+        self.prediction_cache = None
+        self.user_model_version = None
+        self.base_model_version = None
+        self.store = registry.store if registry is not None else ModelStore()
+        self.pooled = registry.pooled if registry is not None else PooledPersonalModel()
+        # This user's correction on the pooled model (see pooled_model.py) and its version
+        self.pooled_weights = None
+        self.pooled_version = None
+        self.trained_on = None  # tasks the last train() / update() actually added (None: it failed)
         
         self.load_artifacts()
         
     def load_artifacts(self):
         """Load trained pipelines and metadata"""
+        if self.registry is not None:
+            # Shared, already-loaded artifacts (see model_registry.py), one consistent base version
+            base = self.registry.base_artifacts()
+            self.metadata = base.metadata
+            self.base_pipeline = base.pipeline
+            self.base_flat_model = base.flat_model
+            self.base_pipeline_ready = self.base_flat_model is not None or self.base_pipeline is not None
+            self.base_calibrator = base.calibrator
+            self.base_model_version = base.version
+            self.prediction_cache = self.registry.prediction_cache
+            if self.user_id is None or self._load_pooled():
+                return
+            self.user_pipeline, self.user_calibrator = self.registry.get_user_artifacts(self.user_id)
+            self.user_pipeline_ready = self.user_pipeline is not None
+            if self.user_pipeline_ready:
+                self.user_model_version = self.registry.user_model_version(self.user_id)
+            return
+            
+        # Current published versions (see model_store.py), else the flat models/ directory
         model_dir = os.path.join(os.path.dirname(__file__), 'models')
+        self.base_model_version = self.store.current('base')
+        base_dir = self.store.current_path('base') or model_dir
+        user_dir = self.store.current_path(user_model_name(self.user_id)) or model_dir
         
         # 1. Load Metadata
         try:
-            with open(os.path.join(model_dir, 'base_model_metadata.json'), 'r') as f:
+            with open(os.path.join(base_dir, 'base_model_metadata.json'), 'r') as f:
                 self.metadata = json.load(f)
         except Exception as e:
             pass
             
-        # 2. Load Base Pipeline
+        # 2. Load Base Model
+        # Prefer the flat array export (no sklearn unpickling, see flat_trees.py)
+        self.base_flat_model = load_flat_model(os.path.join(base_dir, FLAT_MODEL_FILENAME))
+        if self.base_flat_model is not None:
+            self.base_pipeline_ready = True
+            
         try:
-            base_model_path = os.path.join(model_dir, 'base_model.joblib')
-            if os.path.exists(base_model_path):
+            base_model_path = os.path.join(base_dir, 'base_model.joblib')
+            if not self.base_pipeline_ready and os.path.exists(base_model_path):
+                import joblib  # sklearn pickles only; the flat export above needs numpy alone
                 self.base_pipeline = joblib.load(base_model_path)
                 self.base_pipeline_ready = True
         except Exception as e:
             print(f"Error loading base model: {e}")
             
-        # 3. Load User Pipeline
+        # 3. Load Residual Calibration (once, see calibration.py)
+        self.base_calibrator = load_base_calibration(base_dir)
+            
+        # 4. Load User Pipeline
+        # The pooled model takes precedence; per-user files are only left from before it
+        if self.user_id is None or self._load_pooled():
+            return
+        # Incremental state (see incremental_model.py) takes precedence over a full-retrain pipeline
+        self.user_pipeline = load_incremental_model(os.path.join(user_dir, f'user_{self.user_id}{INCREMENTAL_MODEL_SUFFIX}'))
+        if self.user_pipeline is not None:
+            self.user_pipeline_ready = True
+            self.user_calibrator = load_calibration(os.path.join(user_dir, f'user_{self.user_id}_calibration.json'))
+            return
+            
         try:
-            user_model_path = os.path.join(model_dir, f'user_{self.user_id}_model.joblib')
+            user_model_path = os.path.join(user_dir, f'user_{self.user_id}_model.joblib')
             if os.path.exists(user_model_path):
+                import joblib
                 self.user_pipeline = joblib.load(user_model_path)
                 self.user_pipeline_ready = True
+                self.user_calibrator = load_calibration(os.path.join(user_dir, f'user_{self.user_id}_calibration.json'))
         except Exception as e:
              # User model might not exist yet
              pass
 
+    def _load_pooled(self) -> bool:
+        """Use this user's pooled correction if they have one (needs the base model)"""
+        pooled = self.pooled.user_weights(self.user_id, self.base_model_version) if self.base_pipeline_ready else None
+        if pooled is None:
+            return False
+        self.pooled_weights, self.pooled_version = pooled
+        return True
+
     def train(self, historical_tasks: list):
         """
-        Train a personalized model for this user.
+        Train a personalized model for this user: refit their correction on
+        the pooled model (see pooled_model.py) from this history alone.
         """
-        if len(historical_tasks) < 5:
+        if len(historical_tasks) < MIN_TASKS:
             # Too few tasks to train a reliable personal model
+            self.trained_on = 0
             return False
-            
+        return self._fit_pooled(historical_tasks, replace=True)
+
+    def update(self, completed_tasks: list):
+        """
+        Fold completed tasks into the user's pooled correction instead of
+        refitting on the full history (see pooled_model.py).
+        Tasks already folded in (by task_id) are skipped, so the backend can
+        keep sending its recent history. Returns True once the model is usable.
+        """
+        return self._fit_pooled(completed_tasks, replace=False)
+
+    def _fit_pooled(self, tasks: list, replace: bool) -> bool:
+        self.trained_on = None
         try:
-            df = pd.DataFrame(historical_tasks)
-            # Ensure target exists
-            if 'actual_time' in df.columns:
-                target = 'actual_time'
-            elif 'actual_time_minutes' in df.columns:
-                target = 'actual_time_minutes'
-            else:
+            base_model = self.base_flat_model if self.base_flat_model is not None else self.base_pipeline
+            if base_model is None:
                 return False
-                
-            # Filter valid
-            df = df[df[target] > 0].copy()
-            if len(df) < 5:
+            tasks = [task for task in tasks if task_target(task) is not None]
+            if not tasks:
+                self.trained_on = 0
+                return self.pooled.personalized(self.user_id, self.base_model_version)
+            base_log, _ = self._raw_predictions(base_model, tasks)
+            n, self.trained_on = self.pooled.fit_user(self.user_id, tasks, base_log,
+                                                      [task_target(task) for task in tasks],
+                                                      self.base_model_version, replace=replace)
+            if n < MIN_TASKS:
                 return False
                 
-            X = df.drop(columns=[target, 'manual_time'], errors='ignore')
-            y = df[target]
-            
-            # Define Pipeline (Simpler than Base Model for stability on small data)
-            # Use same feature engineering
-            numeric_cols = ['estimated_size', 'title_length', 'user_experience_level', 'num_pages', 'num_slides', 'num_questions']
-            categorical_cols = ['category', 'priority', 'time_of_day', 'day_of_week', 'complexity']
-            
-            derived_cols = ['pages_per_size', 'slides_per_size', 'questions_per_size', 'pages_x_complexity', 'slides_x_complexity', 'complexity_score']
-            full_numeric_cols = numeric_cols + derived_cols
-
-            numeric_transformer = Pipeline(steps=[
-                ('imputer', SimpleImputer(strategy='median')),
-                ('scaler', RobustScaler())
-            ])
-            
-            categorical_transformer = OneHotEncoder(handle_unknown='ignore', sparse_output=False)
-            
-            preprocessor = ColumnTransformer(
-                transformers=[
-                    ('num', numeric_transformer, full_numeric_cols),
-                    ('cat', categorical_transformer, categorical_cols)
-                ]
-            )
-            
-            # Use Linear Regression for personalization as it extrapolates better from few samples
-            # than trees which might overfit noise in small user history.
-            pipeline = Pipeline(steps=[
-                ('features', FeatureEngineer()),
-                ('preprocessor', preprocessor),
-                ('regressor', LinearRegression()) 
-            ])
-            
-            # Train
-            pipeline.fit(X, y) # Train on raw minutes (Linear Regression handles it fine usually, or could log transform)
-            
-            # Save
-            model_dir = os.path.join(os.path.dirname(__file__), 'models')
-            user_model_path = os.path.join(model_dir, f'user_{self.user_id}_model.joblib')
-            joblib.dump(pipeline, user_model_path)
-            
-            self.user_pipeline = pipeline
-            self.user_pipeline_ready = True
+            self._load_pooled()
+            self.user_pipeline, self.user_calibrator, self.user_pipeline_ready = None, None, False
+            if self.registry is not None:
+                # Drops any legacy pipeline of the user and their cached predictions
+                self.registry.invalidate(self.user_id)
             return True
             
         except Exception as e:
-            print(f"Training error: {e}")
+            print(f"Pooled training error: {e}")
             return False
 
-    def predict(self, task: dict):
+    def _prepare_frame(self, tasks: list):
         """
-        Predict time for a task using the best available model.
-        Returns: (predicted_time, confidence, explanations, explanation_text, model_source, confidence_interval)
+        Build the pipeline input DataFrame for a list of task dicts.
         """
-        # Create a copy to avoid modifying input
-        task_data = task.copy()
+        import pandas as pd  # only sklearn pipelines without a compiled encoder get here
         
-        # 1. Handle Aliases & Derived Fields
-        if 'estimated_size' not in task_data and 'size' in task_data:
-            task_data['estimated_size'] = task_data['size']
-            
-        if 'title_length' not in task_data and 'title' in task_data:
-            if task_data['title']:
-                task_data['title_length'] = len(task_data['title'])
-            else:
-                task_data['title_length'] = 0
-                
-        # Convert single dict to DataFrame for the pipeline
-        df = pd.DataFrame([task_data])
-        
-        # Fill missing fields
         required_cols = ['category', 'estimated_size', 'title_length', 'priority', 
                          'time_of_day', 'day_of_week', 'user_experience_level', 
                          'complexity', 'num_pages', 'num_slides', 'num_questions']
+        numeric_cols = ['estimated_size', 'title_length', 'user_experience_level', 'num_pages', 'num_slides', 'num_questions']
         
-        for col in required_cols:
-            if col not in df.columns:
-                if col in ['estimated_size', 'title_length', 'user_experience_level', 'num_pages', 'num_slides', 'num_questions']:
-                    df[col] = 0
+        rows = []
+        for task in tasks:
+            # Create a copy to avoid modifying input
+            task_data = task.copy()
+            
+            # 1. Handle Aliases & Derived Fields
+            if 'estimated_size' not in task_data and 'size' in task_data:
+                task_data['estimated_size'] = task_data['size']
+                
+            if 'title_length' not in task_data and 'title' in task_data:
+                if task_data['title']:
+                    task_data['title_length'] = len(task_data['title'])
                 else:
-                    df[col] = 'unknown'
-        
-        # Select Model
-        model_source = "base"
-        pipeline = self.base_pipeline
-        
+                    task_data['title_length'] = 0
+                    
+            # 2. Fill missing fields (per row, so a batch matches one-task predictions)
+            for col in required_cols:
+                if col not in task_data:
+                    task_data[col] = 0 if col in numeric_cols else 'unknown'
+                    
+            rows.append(task_data)
+                
+        # Convert dicts to a single DataFrame for the pipeline
+        return pd.DataFrame(rows)
+
+    def _select_pipeline(self):
+        """
+        Returns (pipeline, model_source); pipeline is None if no model is loaded.
+        """
+        # Pooled correction: the base model's pass, then the user's correction (_personalize)
+        if self.pooled_weights is not None:
+            return (self.base_flat_model if self.base_flat_model is not None else self.base_pipeline), "personalized"
         # Prefer user pipeline if available
         if self.user_pipeline_ready:
-            model_source = "personalized"
-            pipeline = self.user_pipeline
-        elif not self.base_pipeline_ready:
+            return self.user_pipeline, "personalized"
+        if self.base_flat_model is not None:
+            return self.base_flat_model, "base"
+        if self.base_pipeline_ready:
+            return self.base_pipeline, "base"
+        return None, "fallback"
+
+    def _to_minutes(self, raw_preds, model_source):
+        """
+        Convert raw regressor outputs to bounded integer minutes.
+        """
+        # Note: Base model used Log transform. User model (LinearReg) used Raw.
+        # If HistGradientBoostingRegressor (Base), the pipeline outputs LOG values,
+        # so we must expm1. User pipeline (LinearReg) was trained on RAW y.
+        if self._log_scale(model_source):
+            raw_preds = np.expm1(raw_preds)
+        
+        # int() truncation
+        predicted_minutes = raw_preds.astype(np.int64)
+        
+        # Bounds Check
+        return np.clip(predicted_minutes, 5, 1440)
+
+    def _log_scale(self, model_source) -> bool:
+        """Whether the model's raw output is log1p(minutes): the base model, with or without a pooled correction"""
+        return model_source == "base" or self.pooled_weights is not None
+
+    def _personalize(self, raw_preds, categories):
+        """Apply the user's pooled correction to base model log predictions (if any)"""
+        if self.pooled_weights is None:
+            return raw_preds
+        return self.pooled.correct(raw_preds, categories, self.pooled_weights)
+
+    def _raw_predictions(self, model, tasks: list):
+        """(raw predictions, normalize_task() rows) of a model for task dicts"""
+        encoder = self._model_encoder(model)
+        if encoder is not None:
+            rows = [normalize_task(task) for task in tasks]
+            return self._predict_matrix(model, encoder.encode_feature_rows(rows))[0], rows
+        df = self._prepare_frame(tasks)
+        return model.predict(df), df.to_dict('records')
+
+    def _model_encoder(self, model):
+        """Compiled feature encoder for a model, or None if it can't be compiled"""
+        if isinstance(model, (FlatTreeModel, IncrementalLinearModel)):
+            return model.encoder
+        return encoder_for(model, self.metadata)
+
+    def _predict_matrix(self, model, X):
+        """
+        Raw predictions and per-column contributions (or None) from one pass over
+        the transformed matrix X (see explainer.py).
+        """
+        if isinstance(model, FlatTreeModel):
+            if model.ensemble.has_contributions:
+                return model.ensemble.predict_with_contributions(X)
+            return model.predict_vectors(X), None
+            
+        regressor = model if isinstance(model, IncrementalLinearModel) else model.named_steps['regressor']
+        if hasattr(regressor, 'coef_'):
+            return X @ regressor.coef_ + regressor.intercept_, X * regressor.coef_
+        return regressor.predict(X), None
+
+    def predict(self, task: dict):
+        """
+        Predict time for a task using the best available model.
+        Returns: (predicted_time, confidence, explanations, explanation_text, model_source, confidence_interval)
+        """
+        pipeline, model_source = self._select_pipeline()
+        if pipeline is None:
             # Fallback
             return 30, 0.0, [], "fallback", "fallback", [20, 40]
             
-        # Predict
-        # Note: Base model used Log transform. User model (LinearReg) used Raw.
-        # We need to handle this.
-        # A robust way is to check the regressor type or wrap the target transform in the pipeline (TransformedTargetRegressor).
-        # For this requirement, let's assume strict adherence to base model training (which used log).
-        # For user model above, I used raw y. I should probably align them. 
-        # But simpler: check if log was used. 
-        
-        # If HistGradientBoostingRegressor (Base), we did np.expm1 manually in training script?
-        # Yes, in Train Script: y_pred = np.expm1(y_pred_log). The pipeline itself outputs LOG values.
-        # So if using base_pipeline, we must expm1.
-        # If using user_pipeline (LinearReg), we trained on RAW y. So no expm1.
+        # Repeat predictions are served from the result cache (see prediction_cache.py)
+        features = normalize_task(task)
+        cache_key = self._cache_key(features, model_source)
+        if cache_key is not None:
+            cached = self.prediction_cache.get(cache_key)
+            if cached is not None:
+                return cached
+                
+        result = self._predict_features(pipeline, model_source, task, features)
+        if cache_key is not None:
+            self.prediction_cache.put(cache_key, result)
+        return result
+
+    def _predict_features(self, pipeline, model_source, task, features):
+        encoder = self._model_encoder(pipeline)
+        if encoder is None:
+            return self.predict_batch([task])[0]
+            
+        # Pandas-free fast path: dict -> feature vector -> regressor (see compiled_encoder.py)
+        X = encoder.encode_features(features).reshape(1, -1)
+        raw_preds, contributions = self._predict_matrix(pipeline, X)
+        raw_preds = self._personalize(raw_preds, [features['category']])
+        predicted_minutes = int(self._to_minutes(raw_preds, model_source)[0])
         
-        raw_pred = pipeline.predict(df)[0]
+        lower_bound, upper_bound = self._calculate_confidence_interval(predicted_minutes, features['category'], model_source)
+        explanations, explanation_text = self._explain(pipeline, encoder, contributions, [features], raw_preds, model_source)[0]
         
-        if model_source == "base":
-            predicted_minutes = int(np.expm1(raw_pred))
+        return predicted_minutes, 0.9, explanations, explanation_text, model_source, [lower_bound, upper_bound]
+
+    def _cache_key(self, features: dict, model_source: str):
+        """
+        Result cache key, or None if this prediction can't be cached.
+        Base model results are shared by all users; personal ones are tied to
+        the user and the version of their model.
+        """
+        if self.prediction_cache is None:
+            return None
+        if model_source == "personalized":
+            if self.pooled_weights is not None:
+                # The correction sits on top of the base model
+                owner, version = self.user_id, ("pooled", self.pooled_version, self.base_model_version)
+            elif self.user_model_version is None:
+                return None
+            else:
+                owner, version = self.user_id, self.user_model_version
         else:
-            predicted_minutes = int(raw_pred)
-        
-        # Bounds Check
-        predicted_minutes = max(5, min(1440, predicted_minutes)) 
-        
-        # ... (rest of logic)
+            # Shared by all users of the same base model version
+            owner, version = None, self.base_model_version
+        key = feature_key(features)
+        return None if key is None else (owner, model_source, version, key)
+
+    def predict_batch(self, tasks: list):
+        """
+        Predict time for many tasks with a single pass over one feature matrix.
+        Returns a list of the same tuples as predict(), in input order.
+        """
+        if not tasks:
+            return []
+            
+        pipeline, model_source = self._select_pipeline()
+        if pipeline is None:
+            # Fallback
+            return [(30, 0.0, [], "fallback", "fallback", [20, 40]) for _ in tasks]
+            
+        encoder = self._model_encoder(pipeline)
+        if encoder is not None:
+            # One encoder pass, one model pass (predictions + contributions), no pandas
+            rows = [normalize_task(task) for task in tasks]
+            raw_preds, contributions = self._predict_matrix(pipeline, encoder.encode_feature_rows(rows))
+            categories = [row['category'] for row in rows]
+        else:
+            df = self._prepare_frame(tasks)
+            raw_preds, contributions = pipeline.predict(df), None
+            categories = df['category'].values
+            rows = df.to_dict('records')
+        raw_preds = self._personalize(raw_preds, categories)
+        predicted_minutes = self._to_minutes(raw_preds, model_source)
         
-        # Confidence Interval (using stored residuals)
-        lower_bound, upper_bound = self._calculate_confidence_interval(predicted_minutes)
+        # Confidence Intervals (using precomputed residual quantiles)
+        lower_bounds, upper_bounds = self._calculate_confidence_intervals(
+            predicted_minutes, categories, model_source
+        )
         
-        # Explanations (Feature Importance)
-        explanations, explanation_text = self._explain_prediction(pipeline, df)
+        # Explanations (per-row feature contributions)
+        explained = self._explain(pipeline, encoder, contributions, rows, raw_preds, model_source)
         
-        return predicted_minutes, 0.9, explanations, explanation_text, model_source, [lower_bound, upper_bound]
+        return [
+            (int(minutes), 0.9, explanations, explanation_text, model_source, [int(lower), int(upper)])
+            for minutes, lower, upper, (explanations, explanation_text)
+            in zip(predicted_minutes, lower_bounds, upper_bounds, explained)
+        ]
 
-    def _calculate_confidence_interval(self, prediction):
+    def _calculate_confidence_interval(self, prediction, category=None, model_source="base"):
         """
         Calculate 90% confidence interval using empirical residuals from training.
         """
-        model_dir = os.path.join(os.path.dirname(__file__), 'models')
-        residuals_path = os.path.join(model_dir, 'base_model_residuals.npy')
+        categories = [category] if category is not None else None
+        lower, upper = self._calculate_confidence_intervals(np.array([prediction]), categories, model_source)
+        return int(lower[0]), int(upper[0])
+
+    def _calculate_confidence_intervals(self, predictions, categories=None, model_source="base"):
+        """
+        Vectorized 90% confidence intervals for an array of predictions (minutes).
+        Looks up the residual quantile tables of the model that made the prediction.
+        Returns (lower_bounds, upper_bounds) integer arrays.
+        """
+        predictions = np.asarray(predictions)
+        # Pooled corrections reuse the base model's residual tables
+        personal = model_source == "personalized" and self.pooled_weights is None
+        calibrator = self.user_calibrator if personal else self.base_calibrator
         
-        if os.path.exists(residuals_path):
-            residuals = np.load(residuals_path)
-            # residuals are (y_true - y_pred)
-            # interval = prediction + quantile_of_residuals
-            
-            # 90% interval => 5th and 95th percentiles
-            lower_res = np.percentile(residuals, 5)
-            upper_res = np.percentile(residuals, 95)
-            
-            # Since target was log-transformed, residuals are in log space ideally, 
-            # OR if we saved residuals in minutes space. 
-            # The trainer should save residuals in MINUTES space (y_true - y_pred_minutes).
-            # Assuming trainer does that:
+        if calibrator is not None:
+            return calibrator.intervals(predictions, categories)
             
-            lower = int(prediction + lower_res)
-            upper = int(prediction + upper_res)
-            
-            return max(5, lower), max(5, upper)
-            
-        return int(prediction * 0.8), int(prediction * 1.2) # Fallback
+        # Fallback
+        return (predictions * 0.8).astype(np.int64), (predictions * 1.2).astype(np.int64)
 
-    def _explain_prediction(self, pipeline, input_df):
+    def _explain(self, pipeline, encoder, contributions, rows, raw_preds, model_source):
         """
-        Generate simple explanations based on feature contribution.
-        Note: Exact Shapley values are expensive. We will use a heuristic 
-        based on the linear model coefficients or tree feature importances 
-        multiplied by input values (normalized).
-        
-        For a reliable production system, we prefer using the model's built-in feature importance
-        mapped to the input features.
+        One (explanations, explanation_text) pair per row, from the contributions
+        computed alongside the prediction. The feature-name mapping and global
+        importance ranking are cached per loaded model (see explainer.py).
         """
-        try:
-            # Access the regressor step
-            model = pipeline.named_steps['regressor']
-            
-            # Get feature importances if available (RandomForest/XGBoost)
-            if hasattr(model, 'feature_importances_'):
-                importances = model.feature_importances_
-                
-                # We need to map these back to feature names after OneHotEncoding
-                # This is tricky with Pipelines. simpler approach for 'explainability' requirement:
-                # Return the top 3 global important features and their value in this input.
-                
-                preprocessor = pipeline.named_steps['preprocessor']
-                
-                # Get feature names from preprocessor
-                # This depends on sklearn version. In 1.0+:
-                feature_names = preprocessor.get_feature_names_out()
-                
-                # Sort indices
-                indices = np.argsort(importances)[::-1]
-                top_features = []
-                
-                count = 0
-                for idx in indices:
-                    name = feature_names[idx]
-                    score = importances[idx]
-                    
-                    # Clean up name (e.g., "cat__category_reading" -> "Category: reading")
-                    clean_name = name
-                    val = "Yes"
-                    
-                    if name.startswith("num__"):
-                        clean_name = name.replace("num__", "")
-                        # Get value from input dict if possible, or leave abstract
-                        val = str(input_df[clean_name].iloc[0]) if clean_name in input_df.columns else ""
-                        
-                    elif name.startswith("cat__"):
-                         parts = name.split("_")
-                         # e.g. cat__category_reading -> Category: Reading
-                         # simplistic parsing
-                         clean_name = parts[-1]
-                         
-                    # Check if this feature is actually relevant for this input (e.g. non-zero for OneHot)
-                    # For numeric, it's always relevant. For OneHot, only if 1.
-                    
-                    # To do this correctly requires transforming the input X to see the row.
-                    # This is too heavy for this step.
-                    
-                    # fallback: Just list top global features
-                    top_features.append({"feature": clean_name, "importance": float(score)})
-                    count += 1
-                    if count >= 3:
-                        break
-                        
-                text = f"Prediction based primarily on {top_features[0]['feature']}, {top_features[1]['feature']}."
-                return top_features, text
+        explainer = explainer_for(pipeline, encoder)
+        if explainer is None:
+            return [([], DEFAULT_TEXT)] * len(rows)
+        # Pooled predictions are base contributions on a log scale, like "base"
+        return explainer.explain(contributions, rows, raw_preds, "base" if self._log_scale(model_source) else model_source)
 
-        except Exception as e:
-            # print(f"Explanation error: {e}")
-            pass
+
+def predict_batch_for_users(user_ids: list, tasks: list, registry):
+    """
+    predict_batch() over the tasks of many users (user_ids[i] owns tasks[i]).
+    Users on the pooled model and users without a personal model share one
+    base model pass; each row then gets its user's correction through a
+    gather of the users' weight rows and a row-wise dot product (see
+    pooled_model.py). Users with a legacy per-user pipeline get their own
+    predict_batch(). Results are in input order and match predict_batch().
+    """
+    results = [None] * len(tasks)
+    base = ImprovedTimePredictor(None, registry=registry)
+    shared, legacy = [], {}
+    has_pipeline = {}
+    for i, user_id in enumerate(user_ids):
+        if user_id not in has_pipeline:
+            has_pipeline[user_id] = (not registry.pooled.personalized(user_id, base.base_model_version)
+                                     and registry.get_user_artifacts(user_id)[0] is not None)
+        if has_pipeline[user_id]:
+            legacy.setdefault(user_id, []).append(i)
+        else:
+            shared.append(i)
+            
+    model, model_source = base._select_pipeline()
+    encoder = base._model_encoder(model) if model is not None else None
+    if encoder is None:
+        # Fallback / uncompiled pipeline: per user, as before
+        for i in shared:
+            legacy.setdefault(user_ids[i], []).append(i)
+        shared = []
+        
+    if shared:
+        rows = [normalize_task(tasks[i]) for i in shared]
+        raw_preds, contributions = base._predict_matrix(model, encoder.encode_feature_rows(rows))
+        categories = [row['category'] for row in rows]
+        weights, personalized = registry.pooled.gather([user_ids[i] for i in shared], base.base_model_version)
+        raw_preds = registry.pooled.correct(raw_preds, categories, weights)
+        predicted_minutes = base._to_minutes(raw_preds, model_source)
+        lower_bounds, upper_bounds = base._calculate_confidence_intervals(predicted_minutes, categories, model_source)
+        explained = base._explain(model, encoder, contributions, rows, raw_preds, model_source)
+        for j, i in enumerate(shared):
+            explanations, explanation_text = explained[j]
+            source = "personalized" if personalized[j] else model_source
+            results[i] = (int(predicted_minutes[j]), 0.9, explanations, explanation_text, source,
+                          [int(lower_bounds[j]), int(upper_bounds[j])])
             
-        return [], "Based on historical task patterns."
+    for user_id, indices in legacy.items():
+        predictor = ImprovedTimePredictor(user_id, registry=registry)
+        for i, result in zip(indices, predictor.predict_batch([tasks[i] for i in indices])):
+            results[i] = result
+    return results
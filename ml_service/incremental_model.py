@@ -0,0 +1,78 @@
+"""
+Incremental Personal Model
+Reader for the legacy per-user incremental model files.
+
+Personal models are now corrections on the pooled model (pooled_model.py).
+Before that, incremental updates kept a ridge regression on raw minutes per
+user, maintained by recursive least squares over a frozen encoder (the base
+model's medians, scales and category vocabulary, see compiled_encoder.py),
+and saved it as models/user_{id}_model.npz (plain arrays, no pickle). Those
+files are still served until the user retrains, so this module keeps
+loading and evaluating them, plus the task helpers shared with the pooled
+model.
+"""
+
+import json
+import numpy as np
+
+from compiled_encoder import CompiledFeatureEncoder
+
+INCREMENTAL_MODEL_SUFFIX = '_model.npz'
+
+MIN_TASKS = 5  # tasks before a personal model is used
+
+
+def task_target(task: dict):
+    """Actual minutes of a completed task (same columns as train()), or None"""
+    for col in ('actual_time', 'actual_time_minutes'):
+        value = task.get(col)
+        if value is not None:
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                return None
+            return value if value > 0 else None
+    return None
+
+
+def task_key(task: dict) -> str:
+    """Identity of a completed task, so history re-sent by the backend is folded once"""
+    if task.get('task_id') is not None:
+        return str(task['task_id'])
+    return json.dumps(task, sort_keys=True, default=str)
+
+
+class IncrementalLinearModel:
+    """
+    A saved incremental ridge model. Exposes coef_ / intercept_ like
+    LinearRegression, and encoder like FlatTreeModel.
+    """
+
+    def __init__(self, encoder: CompiledFeatureEncoder, weights, n):
+        self.encoder = encoder
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.n = int(n)
+
+    @property
+    def intercept_(self) -> float:
+        return float(self.weights[0])
+
+    @property
+    def coef_(self):
+        return self.weights[1:]
+
+    def predict_vectors(self, X):
+        return X @ self.coef_ + self.intercept_
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(CompiledFeatureEncoder.from_arrays(arrays), arrays["inc_weights"], arrays["inc_n"])
+
+
+def load_incremental_model(path: str):
+    """Load an IncrementalLinearModel, or None if missing/unreadable"""
+    try:
+        return IncrementalLinearModel.load(path)
+    except Exception:
+        return None
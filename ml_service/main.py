@@ -1,12 +1,15 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any
 import uvicorn
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
-from improved_predictor import ImprovedTimePredictor
+from improved_predictor import ImprovedTimePredictor, predict_batch_for_users
+from model_registry import ModelRegistry, ModelWatcher
+from training_queue import TrainingQueue
+from day_calendar import DayCalendar
+from horizon import build_horizon_plan
+from task_records import TaskRecord, task_records, NO_DEADLINE
 
 app = FastAPI()
 
@@ -19,10 +22,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global Predictor Instance (to load artifacts once)
-# Note: ImprovedTimePredictor init takes user_id, but base pipeline is shared.
-# We will use this instance for base predictions.
-base_predictor = ImprovedTimePredictor("global_base")
+# Global Model Registry (to load artifacts once)
+# The base pipeline is shared; personalized pipelines are loaded on demand
+# and kept in a bounded LRU (see model_registry.py).
+model_registry = ModelRegistry()
+
+# Hot-swaps newly published or rolled-back model versions (see model_store.py)
+model_watcher = ModelWatcher(model_registry)
+
+# Background training (process pool, one pending job per user, see training_queue.py)
+training_queue = TrainingQueue(model_registry)
 
 class TaskInput(BaseModel):
     user_id: str
@@ -49,6 +58,21 @@ class PredictionResponse(BaseModel):
     explanations_text: str
     confidence: float
 
+class BatchPredictionRequest(BaseModel):
+    tasks: List[TaskInput]
+
+class BatchPredictionResponse(BaseModel):
+    predictions: List[PredictionResponse]
+
+class TrainRequest(BaseModel):
+    user_id: str
+    completed_tasks: List[Dict[str, Any]]
+    mode: Optional[str] = "full"  # or "incremental"
+
+class RollbackRequest(BaseModel):
+    name: str  # "base" or "user_<id>"
+    version: Optional[str] = None  # default: the version before the current one
+
 class RoutineConfig(BaseModel):
     wake_up: str
     sleep: str
@@ -67,12 +91,14 @@ class RoutineBlock(BaseModel):
     activity_type: str
     start_time: str
     end_time: str
+    days: Optional[List[str]] = None
 
 class ScheduleRequest(BaseModel):
     user_id: str
     routine: RoutineConfig
     tasks: List[TaskItem]
     routine_blocks: Optional[List[RoutineBlock]] = []
+    horizon_days: Optional[int] = None
 
 
 @app.get("/")
@@ -84,20 +110,87 @@ def api_predict(task: TaskInput):
     """
     Production-ready prediction endpoint.
     """
+    task_dict = _task_to_dict(task)
+        
+    # Predict
+    # The personalized pipeline is used if the user has one, else the shared base pipeline.
+    predictor = ImprovedTimePredictor(task.user_id, registry=model_registry)
+    result = predictor.predict(task_dict)
+    
+    return _format_prediction(result)
+
+@app.post("/api/predict/batch", response_model=BatchPredictionResponse)
+def api_predict_batch(req: BatchPredictionRequest):
+    """
+    Predict many tasks with one pipeline pass (e.g. importing a semester of tasks).
+    Results are returned in request order and match /api/predict one for one.
+    """
+    # One base model pass for all users, plus each user's pooled correction (see pooled_model.py)
+    results = predict_batch_for_users([task.user_id for task in req.tasks],
+                                      [_task_to_dict(task) for task in req.tasks], model_registry)
+    return {"predictions": [_format_prediction(result) for result in results]}
+
+@app.get("/api/models/stats")
+def api_model_stats():
+    """
+    Model registry counters (hits, misses, evictions, cached entries and bytes)
+    and training queue counters.
+    """
+    return {**model_registry.stats(), "training": training_queue.stats()}
+
+@app.get("/api/models/versions/{name}")
+def api_model_versions(name: str):
+    """Current and kept versions of a model ("base" or "user_<id>")"""
+    try:
+        return model_registry.store.describe(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/models/rollback")
+def api_model_rollback(req: RollbackRequest):
+    """Point a model back at an earlier version and swap it in"""
+    try:
+        version = model_registry.rollback(req.name, req.version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**model_registry.store.describe(req.name), "rolled_back_to": version}
+
+@app.post("/api/train", status_code=202)
+def api_train(req: TrainRequest):
+    """
+    Queue a personal-model fit and return immediately with the job.
+    Repeated requests for a user whose job hasn't started yet return that same job.
+    """
+    if req.mode not in ("full", "incremental"):
+        raise HTTPException(status_code=400, detail=f"Unknown training mode: {req.mode}")
+    return training_queue.submit(req.user_id, req.completed_tasks, req.mode)
+
+@app.get("/api/train/{job_id}")
+def api_train_status(job_id: str):
+    job = training_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return job
+
+@app.on_event("startup")
+def start_model_watcher():
+    model_watcher.start()
+
+@app.on_event("shutdown")
+def shutdown_training_queue():
+    training_queue.shutdown(wait=False)
+    model_watcher.stop()
+
+def _task_to_dict(task: TaskInput) -> Dict[str, Any]:
     # Create input dict (handle aliasing manually if needed, but pydantic helps)
     task_dict = task.dict(by_alias=True)
     
     # Ensure title_length is set if title is present but length is 0
     if task.title and not task.title_length:
         task_dict['title_length'] = len(task.title)
-        
-    # Predict
-    # We use base_predictor. The user_id in init doesn't matter for base model usage.
-    # Logic inside predict handles loading the correct model if we implemented user-switching logic.
-    # Currently it defaults to base_pipeline if user model undefined.
-    
-    result = base_predictor.predict(task_dict)
-    
+    return task_dict
+
+def _format_prediction(result) -> Dict[str, Any]:
     # Unpack
     predicted_minutes, confidence, explanations, text, source, interval = result
     
@@ -126,40 +219,9 @@ def legacy_predict(task: TaskInput):
 # Re-reading Step 8 view of main.py shows `generate_schedule` and helper functions.
 # I need to keep them.
 
-def time_conflicts_with_routine(start_time: datetime, end_time: datetime, routine_blocks: List[RoutineBlock]) -> bool:
-    """Check if a time slot conflicts with any routine block"""
-    for block in routine_blocks:
-        block_start = datetime.strptime(block.start_time, "%H:%M:%S")
-        block_end = datetime.strptime(block.end_time, "%H:%M:%S")
-        block_start = block_start.replace(year=start_time.year, month=start_time.month, day=start_time.day)
-        block_end = block_end.replace(year=start_time.year, month=start_time.month, day=start_time.day)
-        if start_time < block_end and end_time > block_start:
-            return True
-    return False
-
-def find_next_available_slot(current_time: datetime, duration: int, sleep_time: datetime, routine_blocks: List[RoutineBlock]) -> Optional[datetime]:
-    max_attempts = 100
-    attempts = 0
-    while attempts < max_attempts:
-        attempts += 1
-        end_time = current_time + timedelta(minutes=duration)
-        if end_time > sleep_time:
-            return None
-        if not time_conflicts_with_routine(current_time, end_time, routine_blocks):
-            return current_time
-        for block in routine_blocks:
-            block_end = datetime.strptime(block.end_time, "%H:%M:%S")
-            block_end = block_end.replace(year=current_time.year, month=current_time.month, day=current_time.day)
-            if current_time < block_end:
-                current_time = block_end + timedelta(minutes=10)
-                break
-        else:
-            current_time += timedelta(minutes=15)
-    return None
-
-def break_task_into_sessions(task: TaskItem) -> List[Dict]:
+def break_task_into_sessions(task: TaskRecord) -> List[Dict]:
     duration = task.predicted_time
-    task_deadline = datetime.fromisoformat(task.deadline) if task.deadline else None
+    task_deadline = task.deadline_at
     now = datetime.now()
     if task_deadline:
         days_available = max(1, (task_deadline - now).days + 1)
@@ -182,6 +244,15 @@ def break_task_into_sessions(task: TaskItem) -> List[Dict]:
 
 @app.post("/schedule")
 def generate_schedule(req: ScheduleRequest):
+    if req.horizon_days:
+        # Every session of every task across the next horizon_days days (see horizon.py)
+        return build_horizon_plan({
+            "routine": req.routine.dict(),
+            "tasks": [task.dict() for task in req.tasks],
+            "routine_blocks": [block.dict() for block in req.routine_blocks],
+            "horizon_days": req.horizon_days
+        })
+        
     wake_up = datetime.strptime(req.routine.wake_up, "%H:%M")
     sleep = datetime.strptime(req.routine.sleep, "%H:%M")
     current_time = datetime.now()
@@ -192,14 +263,18 @@ def generate_schedule(req: ScheduleRequest):
         start_time = current_time
     start_time += timedelta(minutes=(15 - start_time.minute % 15) % 15)
     schedule = []
-    sorted_tasks = sorted(req.tasks, key=lambda x: (x.priority != 'Urgent', x.deadline or '9999-12-31'))
+    # Deadlines parsed once per task (see task_records.py)
+    records = task_records([task.dict() for task in req.tasks])
+    sorted_tasks = sorted(records, key=lambda x: (x.priority != 'Urgent', x.deadline if x.deadline is not None else NO_DEADLINE))
     sleep_today = sleep.replace(year=start_time.year, month=start_time.month, day=start_time.day)
+    # Routine blocks parsed once per request (see day_calendar.py)
+    calendar = DayCalendar([(block.start_time, block.end_time) for block in req.routine_blocks])
     
     for task in sorted_tasks:
         sessions = break_task_into_sessions(task)
         first_session = sessions[0]
         duration = first_session["duration"]
-        available_slot = find_next_available_slot(start_time, duration, sleep_today, req.routine_blocks)
+        available_slot = calendar.find_next_available_slot(start_time, duration, sleep_today)
         if available_slot is None:
             continue
         start_time = available_slot
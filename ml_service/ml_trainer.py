@@ -6,12 +6,16 @@ Trains user-specific models from completed task history
 import sys
 import json
 from improved_predictor import ImprovedTimePredictor
+from incremental_model import MIN_TASKS
 
-def train_user_model(user_id: str, completed_tasks: list):
+def train_user_model(user_id: str, completed_tasks: list, registry=None, mode: str = "full"):
     """
-    Train ML model for a specific user based on their completed tasks
+    Train ML model for a specific user based on their completed tasks.
+    mode="full" refits the user's correction on the pooled model from these
+    tasks alone; mode="incremental" folds only not-yet-seen tasks into their
+    statistics (see pooled_model.py).
     """
-    predictor = ImprovedTimePredictor(user_id)
+    predictor = ImprovedTimePredictor(user_id, registry=registry)
     
     # Filter tasks with actual completion time
     valid_tasks = []
@@ -21,7 +25,8 @@ def train_user_model(user_id: str, completed_tasks: list):
         if actual_time and actual_time > 0:
             valid_tasks.append(task)
     
-    if len(valid_tasks) < 3:
+    if mode != "incremental" and len(valid_tasks) < 3:
+        # A full retrain needs some history; an incremental update folds in whatever is new
         return {
             "success": False,
             "message": f"Need at least 3 completed tasks to train. Found {len(valid_tasks)}.",
@@ -29,20 +34,43 @@ def train_user_model(user_id: str, completed_tasks: list):
         }
     
     # Train the model
-    success = predictor.train(valid_tasks)
+    if mode == "incremental":
+        success = predictor.update(valid_tasks)
+    else:
+        success = predictor.train(valid_tasks)
     
+    if predictor.trained_on is None:
+        return {
+            "success": False,
+            "message": "Training failed",
+            "trained_on": 0
+        }
+    if predictor.trained_on == 0 and (success or mode == "incremental"):
+        # Every task was already part of the model (the backend re-sends its recent history)
+        return {
+            "success": True,
+            "message": "No new tasks; model unchanged",
+            "trained_on": 0,
+            "unchanged": True
+        }
     if success:
         return {
             "success": True,
-            "message": f"Model trained successfully on {len(valid_tasks)} tasks",
-            "trained_on": len(valid_tasks)
+            "message": f"Model trained successfully on {predictor.trained_on} tasks",
+            "trained_on": predictor.trained_on
         }
-    else:
+    if mode == "incremental":
+        # Folded in, but the user's history is still too short to personalize
         return {
-            "success": False,
-            "message": "Training failed",
-            "trained_on": 0
+            "success": True,
+            "message": f"Added {predictor.trained_on} tasks; predictions are personalized from {MIN_TASKS} completed tasks",
+            "trained_on": predictor.trained_on
         }
+    return {
+        "success": False,
+        "message": f"Need at least {MIN_TASKS} completed tasks to train. Found {len(valid_tasks)}.",
+        "trained_on": 0
+    }
 
 if __name__ == "__main__":
     # Read input from stdin
@@ -56,7 +84,7 @@ if __name__ == "__main__":
         user_id = data.get('user_id')
         completed_tasks = data.get('completed_tasks', [])
         
-        result = train_user_model(user_id, completed_tasks)
+        result = train_user_model(user_id, completed_tasks, mode=data.get('mode', 'full'))
         print(json.dumps(result))
     except Exception as e:
         print(json.dumps({"error": str(e)}))
@@ -0,0 +1,311 @@
+"""
+Model Registry
+Loads personalized pipelines on demand and keeps a bounded LRU of them in memory.
+Artifacts are read from the current version in the model store (model_store.py)
+and hot-swapped when a new version is published (see ModelWatcher). Users on
+the pooled personal model (pooled_model.py) need no per-user artifacts at all.
+"""
+
+import os
+import json
+import threading
+from collections import OrderedDict, namedtuple
+
+from calibration import load_calibration, load_base_calibration
+from flat_trees import load_flat_model, FLAT_MODEL_FILENAME
+from prediction_cache import PredictionCache
+from incremental_model import IncrementalLinearModel, INCREMENTAL_MODEL_SUFFIX
+from model_store import ModelStore, user_model_name, FLAT_BASE_VERSION
+from pooled_model import PooledPersonalModel
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(__file__), 'models')
+
+# Seconds between ModelWatcher polls of the model store (0 = no watcher)
+WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 2.0))
+
+# The shared base artifacts, swapped as one object so readers never mix versions
+BaseArtifacts = namedtuple('BaseArtifacts', ['metadata', 'pipeline', 'flat_model', 'calibrator', 'version'])
+
+
+class ModelRegistry:
+    """
+    Shared base pipeline + LRU cache of per-user pipelines.
+
+    Entries are bounded both by count and by size (the size of the joblib
+    artifact on disk is used as a proxy for the in-memory footprint).
+    A cached entry is revalidated with a cheap os.stat() of the current
+    artifact, so models published by another process (ml_trainer.py) or
+    rolled back are picked up without a restart.
+
+    The registry also owns the prediction result cache (prediction_cache.py),
+    since it knows when a user's model changes.
+    """
+
+    def __init__(self, model_dir: str = None, max_entries: int = 512, max_bytes: int = 256 * 1024 * 1024,
+                 prediction_cache_entries: int = 4096, prediction_cache_ttl: float = 600.0, store: ModelStore = None):
+        self.model_dir = model_dir or DEFAULT_MODEL_DIR
+        self.store = store or ModelStore(os.path.join(self.model_dir, 'store'))
+        self.pooled = PooledPersonalModel(os.path.join(self.model_dir, 'pooled'))
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.prediction_cache = PredictionCache(prediction_cache_entries, prediction_cache_ttl)
+
+        # user_id -> (pipeline, calibrator, version, size_bytes); version is (artifact path, mtime_ns)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.base_reloads = 0
+
+        self.base = self._read_base(self.store.current('base'))
+
+    # The current base artifacts (one attribute read each; see base_artifacts())
+    metadata = property(lambda self: self.base.metadata)
+    base_pipeline = property(lambda self: self.base.pipeline)
+    base_flat_model = property(lambda self: self.base.flat_model)
+    base_calibrator = property(lambda self: self.base.calibrator)
+    base_version = property(lambda self: self.base.version)
+
+    def base_artifacts(self) -> BaseArtifacts:
+        """The base artifacts as one consistent snapshot"""
+        return self.base
+
+    def _read_base(self, version) -> BaseArtifacts:
+        """Load the base pipeline, metadata and calibration of a store version (None = models/)"""
+        base_dir = self.store.version_path('base', version) if version else self.model_dir
+        metadata = {}
+        try:
+            with open(os.path.join(base_dir, 'base_model_metadata.json'), 'r') as f:
+                metadata = json.load(f)
+        except Exception:
+            pass
+
+        # Prefer the flat array export (no sklearn unpickling, see flat_trees.py)
+        flat_model = load_flat_model(os.path.join(base_dir, FLAT_MODEL_FILENAME))
+
+        pipeline = None
+        try:
+            base_model_path = os.path.join(base_dir, 'base_model.joblib')
+            if flat_model is None and os.path.exists(base_model_path):
+                import joblib  # sklearn pickles only; the flat export needs numpy alone
+                pipeline = joblib.load(base_model_path)
+        except Exception as e:
+            print(f"Error loading base model: {e}")
+
+        return BaseArtifacts(metadata, pipeline, flat_model, load_base_calibration(base_dir),
+                             version or FLAT_BASE_VERSION)
+
+    def reload_base(self) -> bool:
+        """
+        Swap in the current base version if it changed. The new artifacts are
+        loaded before the swap, so requests keep using the old ones meanwhile.
+        """
+        version = self.store.current('base')
+        if (version or FLAT_BASE_VERSION) == self.base.version:
+            return False
+        base = self._read_base(version)
+        if base.flat_model is None and base.pipeline is None:
+            print(f"Base model version {version} has no loadable model; keeping {self.base.version}")
+            return False
+        self.base = base
+        self.base_reloads += 1
+        # Base predictions are cached per base version; the old ones just expire
+        return True
+
+    def user_model_dir(self, user_id: str) -> str:
+        """Current store version of the user's model, else the flat models/ directory"""
+        return self.store.current_path(user_model_name(user_id)) or self.model_dir
+
+    def user_model_path(self, user_id: str) -> str:
+        """Incremental state (incremental_model.py) if present, else the full-retrain joblib"""
+        model_dir = self.user_model_dir(user_id)
+        incremental_path = os.path.join(model_dir, f'user_{user_id}{INCREMENTAL_MODEL_SUFFIX}')
+        if os.path.exists(incremental_path):
+            return incremental_path
+        return os.path.join(model_dir, f'user_{user_id}_model.joblib')
+
+    def user_calibration_path(self, user_id: str) -> str:
+        return os.path.join(self.user_model_dir(user_id), f'user_{user_id}_calibration.json')
+
+    def get_user_artifacts(self, user_id: str):
+        """
+        Return (pipeline, calibrator) for user_id, or (None, None) if the user has no model.
+        Users on the pooled model have no per-user pipeline; a legacy one is never loaded.
+        """
+        if self.pooled.personalized(user_id, self.base.version):
+            with self._lock:
+                self._remove(user_id)
+            return None, None
+
+        path = self.user_model_path(user_id)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # No personal model: drop any stale entry and fall back to base
+            with self._lock:
+                had_entry = self._remove(user_id)
+                self.misses += 1
+            if had_entry:
+                self.prediction_cache.invalidate_user(user_id)
+            return None, None
+
+        version = (path, stat.st_mtime_ns)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[2] == version:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0], entry[1]
+            self.misses += 1
+
+        try:
+            if path.endswith(INCREMENTAL_MODEL_SUFFIX):
+                pipeline = IncrementalLinearModel.load(path)
+            else:
+                import joblib
+                pipeline = joblib.load(path)
+        except Exception:
+            # User model might be unreadable (e.g. mid-write)
+            return None, None
+        calibrator = load_calibration(os.path.join(os.path.dirname(path), f'user_{user_id}_calibration.json'))
+
+        self.put(user_id, pipeline, calibrator, version=version, size_bytes=stat.st_size)
+        return pipeline, calibrator
+
+    def user_model_version(self, user_id: str):
+        """
+        Version (artifact path, mtime_ns) of the cached user pipeline, or None if it isn't cached.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            return entry[2] if entry is not None else None
+
+    def put(self, user_id: str, pipeline, calibrator=None, version: tuple = None, size_bytes: int = None):
+        """
+        Insert (or replace) a user pipeline, e.g. right after train() published it.
+        Cached predictions of the previous model are dropped.
+        """
+        self.prediction_cache.invalidate_user(user_id)
+        if version is None or size_bytes is None:
+            path = self.user_model_path(user_id)
+            try:
+                stat = os.stat(path)
+                version, size_bytes = (path, stat.st_mtime_ns), stat.st_size
+            except OSError:
+                version, size_bytes = (path, 0), 0
+
+        with self._lock:
+            self._remove(user_id)
+            if size_bytes > self.max_bytes:
+                # Too large to cache; serve it uncached
+                return
+            self._entries[user_id] = (pipeline, calibrator, version, size_bytes)
+            self._bytes += size_bytes
+            self._evict()
+
+    def refresh_users(self) -> int:
+        """
+        Reload cached users whose current artifact changed (new version,
+        rollback, removal), so requests don't pay for the load. Returns the
+        number of users refreshed.
+        """
+        with self._lock:
+            cached = [(user_id, entry[2]) for user_id, entry in self._entries.items()]
+        refreshed = 0
+        for user_id, version in cached:
+            path = self.user_model_path(user_id)
+            try:
+                current = (path, os.stat(path).st_mtime_ns)
+            except OSError:
+                current = None
+            if current != version:
+                self.get_user_artifacts(user_id)
+                refreshed += 1
+        return refreshed
+
+    def rollback(self, name: str, version: str = None) -> str:
+        """Roll model name ("base" or "user_<id>") back in the store and swap it in"""
+        version = self.store.rollback(name, version)
+        if name == 'base':
+            self.reload_base()
+        elif name.startswith('user_'):
+            user_id = name[len('user_'):]
+            self.invalidate(user_id)
+            self.get_user_artifacts(user_id)
+        return version
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._remove(user_id)
+        self.prediction_cache.invalidate_user(user_id)
+
+    def _remove(self, user_id: str) -> bool:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._bytes -= entry[3]
+        return entry is not None
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry[3]
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "base_model_loaded": self.base_flat_model is not None or self.base_pipeline is not None,
+                "base_model_version": self.base_version,
+                "base_reloads": self.base_reloads,
+                "pooled_users": len(self.pooled),
+                "prediction_cache": self.prediction_cache.stats()
+            }
+
+
+class ModelWatcher:
+    """
+    Background thread that polls the model store every `interval` seconds
+    (a few os.stat() calls) and hot-swaps new or rolled-back versions into
+    the registry: the base model, and every cached user model. Loading
+    happens on this thread; requests keep using the previous artifacts
+    until the swap.
+    """
+
+    def __init__(self, registry: ModelRegistry, interval: float = WATCH_INTERVAL):
+        self.registry = registry
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def poll(self):
+        """One check; returns (base reloaded, users refreshed)"""
+        return self.registry.reload_base(), self.registry.refresh_users()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Model watcher error: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
@@ -0,0 +1,264 @@
+"""
+Model Store
+Versioned, atomically published model artifacts.
+
+Every model ("base", or "user_<id>" per personal model) has its own
+directory of immutable versions and a pointer to the one being served:
+
+    models/store/<name>/
+        CURRENT                   the current version id (replaced atomically)
+        versions/v3-1a2b3c4d5e6f/ base_model.joblib, base_model_calibration.json, ...
+        versions/v4-9f8e7d6c5b4a/ ...
+
+A version id is a per-model sequence number plus a hash of the files'
+content. Publishing writes the files into a staging directory, renames it
+into versions/ and only then swaps CURRENT (write to a temp file +
+os.replace), so a reader either sees the old complete version or the new
+one, never a half-written file. Publishing content identical to an
+existing version re-points CURRENT at that version instead of copying it.
+
+Artifacts keep their usual file names inside a version directory, so the
+loaders (load_flat_model, load_base_calibration, ...) take the version
+directory in place of models/. Models that were never published are read
+from the flat models/ layout as before.
+
+rollback() re-points CURRENT at the previous version; the last
+KEEP_VERSIONS versions (and the current one) are kept on disk.
+
+    python model_store.py list <name>
+    python model_store.py rollback <name> [version]
+    python model_store.py publish <name> <file>...
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+DEFAULT_STORE_DIR = os.path.join(DEFAULT_MODEL_DIR, 'store')
+CURRENT_FILENAME = 'CURRENT'
+KEEP_VERSIONS = 5
+# Names and versions end up in paths: nothing that could step outside the store
+MODEL_NAME_PATTERN = re.compile(r'(base|user_[A-Za-z0-9_-]+)')
+VERSION_PATTERN = re.compile(r'v[0-9]+-[0-9a-f]{12}')
+FLAT_BASE_VERSION = 'models'  # base artifacts read from models/ itself (never published)
+
+
+def user_model_name(user_id) -> str:
+    return f"user_{user_id}"
+
+
+def check_name(name) -> str:
+    """name if it is "base" or "user_<id>" (id of letters, digits, _ and -), else ValueError"""
+    if not isinstance(name, str) or not MODEL_NAME_PATTERN.fullmatch(name):
+        raise ValueError(f"Invalid model name: {name!r}")
+    return name
+
+
+def check_version(version) -> str:
+    """version if it looks like a version id ("v<n>-<hash>"), else ValueError"""
+    if not isinstance(version, str) or not VERSION_PATTERN.fullmatch(version):
+        raise ValueError(f"Invalid model version: {version!r}")
+    return version
+
+
+def content_hash(directory: str) -> str:
+    """sha256 over the (file name, content) of every file in directory"""
+    digest = hashlib.sha256()
+    for filename in sorted(os.listdir(directory)):
+        digest.update(filename.encode() + b'\0')
+        with open(os.path.join(directory, filename), 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _version_number(version: str) -> int:
+    try:
+        return int(version.split('-', 1)[0][1:])
+    except (ValueError, IndexError):
+        return -1
+
+
+class ModelStore:
+    """
+    Versioned artifact directories with an atomic CURRENT pointer per model.
+    Safe for concurrent readers; publishers of the same model should not
+    race (the training queue runs one job per user at a time).
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR, keep_versions: int = KEEP_VERSIONS):
+        self.root = root
+        self.keep_versions = keep_versions
+        # name -> ((CURRENT inode, mtime_ns), version): the pointer is re-read only when it changes
+        self._pointers = {}
+        self._lock = threading.Lock()
+
+    def _model_dir(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _versions_dir(self, name: str) -> str:
+        return os.path.join(self.root, name, 'versions')
+
+    def version_path(self, name: str, version: str) -> str:
+        return os.path.join(self._versions_dir(name), version)
+
+    def current(self, name: str):
+        """Current version id of a model, or None if it was never published"""
+        pointer = os.path.join(self._model_dir(name), CURRENT_FILENAME)
+        try:
+            stat = os.stat(pointer)
+        except OSError:
+            return None
+        # os.replace() gives the pointer a new inode, so a swap is seen even within one mtime tick
+        key = (stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._pointers.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        try:
+            with open(pointer, 'r') as f:
+                version = f.read().strip() or None
+        except OSError:
+            return None
+        with self._lock:
+            self._pointers[name] = (key, version)
+        return version
+
+    def current_path(self, name: str):
+        """Directory of the current version, or None"""
+        version = self.current(name)
+        return self.version_path(name, version) if version else None
+
+    def versions(self, name: str) -> list:
+        """Version ids, oldest first"""
+        try:
+            entries = os.listdir(self._versions_dir(name))
+        except OSError:
+            return []
+        return sorted((v for v in entries if v.startswith('v')), key=_version_number)
+
+    def _set_current(self, name: str, version: str):
+        model_dir = self._model_dir(name)
+        fd, tmp = tempfile.mkstemp(prefix='.CURRENT-', dir=model_dir)
+        with os.fdopen(fd, 'w') as f:
+            f.write(version + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(model_dir, CURRENT_FILENAME))
+
+    def staging_dir(self, name: str) -> str:
+        """Empty directory to write a new version's files into (same filesystem as the store)"""
+        model_dir = self._model_dir(name)
+        os.makedirs(model_dir, exist_ok=True)
+        return tempfile.mkdtemp(prefix='.staging-', dir=model_dir)
+
+    def publish_dir(self, name: str, staging: str) -> str:
+        """
+        Publish the files in staging (from staging_dir()) as the current
+        version of name; staging is consumed. Returns the version id.
+        """
+        digest = content_hash(staging)[:12]
+        for version in self.versions(name):
+            if version.endswith('-' + digest):
+                # Same content as an existing version: just point at it
+                shutil.rmtree(staging, ignore_errors=True)
+                self._set_current(name, version)
+                return version
+
+        for filename in os.listdir(staging):
+            with open(os.path.join(staging, filename), 'rb') as f:
+                os.fsync(f.fileno())
+        versions_dir = self._versions_dir(name)
+        os.makedirs(versions_dir, exist_ok=True)
+        existing = self.versions(name)
+        number = _version_number(existing[-1]) + 1 if existing else 1
+        while True:
+            version = f"v{number}-{digest}"
+            try:
+                os.rename(staging, os.path.join(versions_dir, version))
+                break
+            except OSError:
+                if not os.path.exists(os.path.join(versions_dir, version)):
+                    raise
+                number += 1
+        self._set_current(name, version)
+        self.prune(name)
+        return version
+
+    def publish_files(self, name: str, files: dict) -> str:
+        """Publish {filename: source path} as a new version of name"""
+        staging = self.staging_dir(name)
+        try:
+            for filename, source in files.items():
+                shutil.copyfile(source, os.path.join(staging, filename))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return self.publish_dir(name, staging)
+
+    def rollback(self, name: str, version: str = None) -> str:
+        """
+        Point name at version, or at the version before the current one.
+        Raises ValueError for an invalid name or version, or if there is
+        nothing to roll back to.
+        """
+        check_name(name)
+        if version is not None:
+            check_version(version)
+        versions = self.versions(name)
+        if version is None:
+            current = self.current(name)
+            older = [v for v in versions if _version_number(v) < _version_number(current or 'v0')]
+            if not older:
+                raise ValueError(f"No version of '{name}' before {current}")
+            version = older[-1]
+        elif version not in versions:
+            raise ValueError(f"Unknown version '{version}' of '{name}'")
+        self._set_current(name, version)
+        return version
+
+    def prune(self, name: str):
+        """Remove all but the newest keep_versions versions (never the current one)"""
+        current = self.current(name)
+        versions = self.versions(name)
+        for version in versions[:-self.keep_versions] if self.keep_versions else []:
+            if version != current:
+                shutil.rmtree(self.version_path(name, version), ignore_errors=True)
+
+    def describe(self, name: str) -> dict:
+        check_name(name)
+        return {"name": name, "current": self.current(name), "versions": self.versions(name)}
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Inspect, publish or roll back model versions.')
+    parser.add_argument('command', choices=['list', 'rollback', 'publish'])
+    parser.add_argument('name', help='Model name: "base" or "user_<id>"')
+    parser.add_argument('args', nargs='*', help='rollback: target version; publish: artifact files')
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help='Store directory')
+    args = parser.parse_args()
+
+    store = ModelStore(args.store)
+    try:
+        if args.command == 'rollback':
+            store.rollback(args.name, args.args[0] if args.args else None)
+        elif args.command == 'publish':
+            if not args.args:
+                raise ValueError("publish needs at least one file")
+            store.publish_files(args.name, {os.path.basename(path): path for path in args.args})
+        print(json.dumps(store.describe(args.name)))
+    except Exception as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Schedule Optimizer
+Time-budgeted local search over today's session placements, selectable per
+/schedule request with "engine": "local_search" (default: "greedy").
+
+The greedy engine places sessions in priority/deadline order, each in its
+best slot at that moment, so an early session can take the only gap a
+later urgent one would have fit in. Here a plan is encoded as
+
+  - an order in which sessions are placed, and
+  - an optional time-of-day band per session ("place in this band if it
+    fits there, else in the best slot left"),
+
+decoded with the same slot choice (argmax over the session's row of the
+SlotScoreMatrix) and SLOT_BUFFER rules as the greedy engine. Starting from the greedy plan (task order, no bands), the search
+tries swaps, moves and band changes and keeps any plan that scores at
+least as well, until the wall-clock budget runs out or the plan reaches
+the upper bound. It is anytime: the best plan seen so far is returned, and
+it never scores below the greedy one.
+
+Objective (higher is better), per placed session:
+
+    PLACEMENT_REWARD * PRIORITY_WEIGHT[priority] * (1 + 1 / days until deadline)
+      + slot_score(start, complexity, priority)
+
+The placement reward dominates the +/-10 time-of-day scores, so the search
+never drops a session to move another one into a better band.
+"""
+
+import random
+import time
+
+import numpy as np
+
+from schedule import session_matrix
+from slot_scores import MORNING, AFTERNOON, EVENING
+
+DEFAULT_TIME_BUDGET_MS = 50
+MAX_TIME_BUDGET_MS = 1000
+
+PLACEMENT_REWARD = 20
+PRIORITY_WEIGHT = {'Urgent': 4, 'High': 3, 'Medium': 2, 'Low': 1}
+
+# Bands a session can be pinned to, in minutes [start, end)
+BANDS = [
+    (0, MORNING[0] * 60),
+    (MORNING[0] * 60, MORNING[1] * 60),
+    (AFTERNOON[0] * 60, AFTERNOON[1] * 60),
+    (EVENING[0] * 60, EVENING[1] * 60),
+    (EVENING[1] * 60, None)
+]
+
+
+def placement_reward(session):
+    weight = PRIORITY_WEIGHT.get(session["task"].priority, PRIORITY_WEIGHT['Medium'])
+    return PLACEMENT_REWARD * weight * (1 + 1 / max(1, session.get("days_until_deadline", 1)))
+
+
+def decode(matrix, rewards, order, bands):
+    """
+    Place sessions in `order` on a copy of the SlotScoreMatrix.
+    Returns (start minute or None per session, objective value).
+    """
+    matrix = matrix.copy()
+    starts = [None] * len(rewards)
+    value = 0.0
+    for i in order:
+        j = None
+        if bands[i] is not None:
+            j = matrix.best(i, *BANDS[bands[i]])
+        if j is None:
+            j = matrix.best(i)
+        if j is None:
+            continue
+        starts[i], score = matrix.take(i, j)
+        value += rewards[i] + score
+    return starts, value
+
+
+def upper_bound(matrix, rewards):
+    """Every session placed in the best slot it could get on its own"""
+    best = matrix.best_scores()
+    return float(sum(reward + score for reward, score in zip(rewards, best) if score > -np.inf))
+
+
+def optimize_placements(free_slots, sessions, time_budget_ms=None, seed=0):
+    """
+    Best placement found within time_budget_ms. Returns (starts, report),
+    where starts holds a start minute (or None) per session and report
+    compares the objective with the greedy plan's. Like place_sessions,
+    free_slots itself is not modified.
+    """
+    started = time.perf_counter()
+    if time_budget_ms is None:
+        time_budget_ms = DEFAULT_TIME_BUDGET_MS
+    time_budget_ms = max(0, min(float(time_budget_ms), MAX_TIME_BUDGET_MS))
+    deadline = started + time_budget_ms / 1000.0
+    rng = random.Random(seed)
+    n = len(sessions)
+
+    matrix = session_matrix(free_slots, sessions)
+    rewards = [placement_reward(session) for session in sessions]
+
+    order = list(range(n))
+    bands = [None] * n
+    greedy_starts, greedy_value = decode(matrix, rewards, order, bands)
+    current_value = best_value = greedy_value
+    best_starts = greedy_starts
+    bound = upper_bound(matrix, rewards)
+
+    iterations = 0
+    while n and best_value < bound - 1e-9 and time.perf_counter() < deadline:
+        iterations += 1
+        new_order, new_bands = order, bands
+        move = rng.random()
+        if move < 0.4 and n > 1:
+            # Swap two sessions in the placement order
+            i, j = rng.sample(range(n), 2)
+            new_order = order[:]
+            new_order[i], new_order[j] = new_order[j], new_order[i]
+        elif move < 0.7 and n > 1:
+            # Move one session earlier in the order
+            i = rng.randrange(1, n)
+            j = rng.randrange(0, i)
+            new_order = order[:]
+            new_order.insert(j, new_order.pop(i))
+        else:
+            # Pin one session to a band (or unpin it)
+            i = rng.randrange(n)
+            new_bands = bands[:]
+            new_bands[i] = rng.choice([None] + list(range(len(BANDS))))
+
+        new_starts, value = decode(matrix, rewards, new_order, new_bands)
+        # Accept sideways moves too, to drift across plateaus
+        if value >= current_value:
+            order, bands, current_value = new_order, new_bands, value
+            if value > best_value:
+                best_value, best_starts = value, new_starts
+
+    report = {
+        "engine": "local_search",
+        "value": round(best_value, 3),
+        "greedy": round(greedy_value, 3),
+        "gain": round(best_value - greedy_value, 3),
+        "upper_bound": round(bound, 3),
+        "sessions": n,
+        "placed": sum(start is not None for start in best_starts),
+        "greedy_placed": sum(start is not None for start in greedy_starts),
+        "iterations": iterations,
+        "time_budget_ms": time_budget_ms,
+        "elapsed_ms": round((time.perf_counter() - started) * 1e3, 2)
+    }
+    return best_starts, report
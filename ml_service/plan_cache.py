@@ -0,0 +1,334 @@
+"""
+Plan Cache
+Per-user cache of today's schedule in the long-lived worker, so small
+changes patch the plan instead of rebuilding it.
+
+  - A full "schedule" request is keyed by a hash of its input (routine,
+    blocks, tasks, completed_today and today's date). Repeating the same
+    input returns the cached plan without recomputing anything.
+  - A "schedule_update" request sends deltas against the user's cached plan:
+
+        {"type": "task_added" | "task_updated", "task": {...}}
+        {"type": "task_removed", "task_id": ...}
+        {"type": "task_progress", "task_id": ..., "progress": 40}
+        {"type": "session_completed", "task_id": ..., "minutes": 30 [, "progress": ...]}
+
+    Only the touched tasks are re-planned: their old sessions are released
+    back into the day's FreeSlotIndex and they are placed again (together
+    with any session that did not fit before) with find_best_slot, in
+    priority/deadline order. Every other session keeps its slot, so the
+    result can differ from a from-scratch rebuild, which would reshuffle
+    everything after the first changed task. The response carries the full
+    schedule plus a diff of the changed entries.
+
+Only plain greedy single-day requests are cached; horizon and optimizer
+requests always go to build_schedule.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+from schedule import (
+    build_schedule, blocks_for_weekday, get_free_slots, keyed_routine_items, task_order,
+    todays_session, done_entry, session_entry, place_sessions, find_best_slot, SLOT_BUFFER, DONE_KEY
+)
+from task_records import TaskRecord
+
+
+def plan_input(data: dict) -> dict:
+    """The parts of a request today's plan depends on, with missing / null keys defaulted"""
+    return {
+        'routine': data.get('routine') or {},
+        'tasks': data.get('tasks') or [],
+        'routine_blocks': data.get('routine_blocks') or [],
+        # JSON object keys are strings; deltas may address the same task by an int id
+        'completed_today': {str(task_id): minutes for task_id, minutes in (data.get('completed_today') or {}).items()}
+    }
+
+
+def input_hash(data: dict) -> str:
+    """Hash of everything today's plan depends on"""
+    payload = plan_input(data)
+    payload['date'] = date.today().isoformat()
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _entry_kind(entry: dict) -> str:
+    return entry.get('type', 'session')
+
+
+class UserPlan:
+    """
+    Today's greedy plan for one user: the free slots left, and per task its
+    session, the busy range it occupies and its schedule entries.
+    """
+
+    def __init__(self, data: dict):
+        self.data = copy.deepcopy(plan_input(data))
+        self.day = date.today()
+        routine = self.data['routine']
+        blocks = blocks_for_weekday(self.data['routine_blocks'], datetime.now().weekday())
+        self.free_slots = get_free_slots(routine.get('wake_up', '07:00'), routine.get('sleep', '23:00'), blocks)
+        self.routine_entries = keyed_routine_items(blocks)
+
+        # task_id -> state; seq keeps the request order for ties in task_order
+        self.states = {}
+        self._next_seq = 0
+        for task in self.data['tasks']:
+            self._add_state(task)
+
+        ordered = self._ordered_states()
+        scheduled = [state for state in ordered if state['session'] is not None]
+        starts = place_sessions(self.free_slots, [state['session'] for state in scheduled])
+        for state, start in zip(scheduled, starts):
+            if start is not None:
+                self._occupy(state, start)
+        for state in ordered:
+            state['entries'] = self._entries(state)
+
+        self.input_hash = input_hash(self.data)
+        self._schedule = None
+        self.consistent = True
+
+    def _add_state(self, task: dict):
+        state = {"task": TaskRecord.from_dict(task), "seq": self._next_seq, "today": None, "session": None, "busy": None, "entries": []}
+        self._next_seq += 1
+        self._plan_task(state)
+        self.states[task.get('id')] = state
+        return state
+
+    def _plan_task(self, state: dict):
+        state["today"] = todays_session(state["task"], self.data['completed_today'])
+        state["session"] = state["today"][1] if state["today"] is not None else None
+
+    def _ordered_states(self) -> list:
+        return sorted(self.states.values(), key=lambda state: (task_order(state["task"]), state["seq"]))
+
+    def _occupy(self, state: dict, start: int):
+        """Allocate the session plus its break (cut at the slot's end)"""
+        slot = self.free_slots.containing(start)
+        end = min(start + state["session"]["duration"] + SLOT_BUFFER, slot[1])
+        self.free_slots.allocate(start, end)
+        state["busy"] = (start, end)
+
+    def _release(self, state: dict):
+        if state["busy"] is not None:
+            self.free_slots.release(*state["busy"])
+            state["busy"] = None
+
+    def _entries(self, state: dict) -> list:
+        """(start minute, entry) pairs for a task, in build_schedule's order"""
+        if state["today"] is None:
+            return []
+        entries = []
+        completed_mins = state["today"][0]
+        if completed_mins > 0:
+            entries.append((DONE_KEY, done_entry(state["task"], completed_mins)))
+        if state["busy"] is not None:
+            start = state["busy"][0]
+            entries.append((start, session_entry(state["session"], start)))
+        return entries
+
+    def schedule(self) -> list:
+        if self._schedule is None:
+            items = []
+            for state in self._ordered_states():
+                items.extend(state["entries"])
+            items.extend(self.routine_entries)
+            items.sort(key=lambda item: item[0])
+            self._schedule = [entry for _, entry in items]
+        return self._schedule
+
+    @staticmethod
+    def _task_index(tasks: list, task_id) -> int:
+        for i, task in enumerate(tasks):
+            if task.get('id') == task_id:
+                return i
+        raise ValueError(f"Unknown task in plan: {task_id}")
+
+    def apply(self, deltas: list) -> dict:
+        """
+        Apply deltas, re-place the affected sessions, return the entry diff.
+        The deltas are applied to copies of the task list first, so a bad
+        delta raises before the plan has changed.
+        """
+        tasks = list(self.data['tasks'])
+        completed_today = dict(self.data['completed_today'])
+        touched = []
+        for delta in deltas:
+            kind = delta.get('type')
+            if kind in ('task_added', 'task_updated'):
+                task = copy.deepcopy(delta['task'])
+                task_id = task.get('id')
+                if any(t.get('id') == task_id for t in tasks):
+                    tasks[self._task_index(tasks, task_id)] = task
+                else:
+                    tasks.append(task)
+            elif kind == 'task_removed':
+                task_id = delta.get('task_id')
+                del tasks[self._task_index(tasks, task_id)]
+            elif kind == 'task_progress':
+                task_id = delta.get('task_id')
+                i = self._task_index(tasks, task_id)
+                tasks[i] = dict(tasks[i], progress=delta['progress'])
+            elif kind == 'session_completed':
+                task_id = delta.get('task_id')
+                i = self._task_index(tasks, task_id)
+                completed_today[str(task_id)] = completed_today.get(str(task_id), 0) + delta.get('minutes', 0)
+                if 'progress' in delta:
+                    tasks[i] = dict(tasks[i], progress=delta['progress'])
+            else:
+                raise ValueError(f"Unknown schedule delta: {kind}")
+            touched.append(task_id)
+        self.data['tasks'] = tasks
+        self.data['completed_today'] = completed_today
+        try:
+            return self._replan(touched)
+        except Exception:
+            # The deltas are in, the slots may be half re-placed
+            self.consistent = False
+            raise
+
+    def _replan(self, touched: list) -> dict:
+        """Re-place the touched tasks' sessions (and any that did not fit before); the entry diff"""
+        tasks = self.data['tasks']
+
+        # Release the touched tasks' sessions and plan them again; an
+        # existing task keeps its place among equal-priority tasks
+        before = {}
+        seqs = {}
+        for task_id in touched:
+            if task_id in before:
+                continue
+            state = self.states.pop(task_id, None)
+            before[task_id] = state["entries"] if state is not None else []
+            if state is not None:
+                self._release(state)
+                seqs[task_id] = state["seq"]
+        for task in tasks:
+            task_id = task.get('id')
+            if task_id in before and task_id not in self.states:
+                state = self._add_state(task)
+                state["seq"] = seqs.get(task_id, state["seq"])
+
+        # Freed time may also fit sessions that did not fit before
+        pending = [
+            state for state in self._ordered_states()
+            if state["session"] is not None and state["busy"] is None
+        ]
+        for state in pending:
+            task = state["task"]
+            before.setdefault(task.id, state["entries"])
+            slot = find_best_slot(self.free_slots, state["session"]["duration"], task.complexity, task.priority)
+            if slot is not None:
+                self._occupy(state, slot[0])
+
+        diff = {"added": [], "changed": [], "removed": []}
+        for task_id, old_entries in before.items():
+            state = self.states.get(task_id)
+            if state is not None:
+                state["entries"] = self._entries(state)
+            new_entries = state["entries"] if state is not None else []
+            old_by_kind = {_entry_kind(entry): entry for _, entry in old_entries}
+            new_by_kind = {_entry_kind(entry): entry for _, entry in new_entries}
+            for kind, entry in new_by_kind.items():
+                if kind not in old_by_kind:
+                    diff["added"].append(entry)
+                elif old_by_kind[kind] != entry:
+                    diff["changed"].append(entry)
+            diff["removed"].extend(entry for kind, entry in old_by_kind.items() if kind not in new_by_kind)
+
+        self.input_hash = input_hash(self.data)
+        self._schedule = None
+        return diff
+
+
+class PlanCache:
+    """
+    LRU map of user_id -> UserPlan, for the lifetime of the worker process.
+    """
+
+    def __init__(self, max_users: int = 1024):
+        self.max_users = max_users
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0
+
+    @staticmethod
+    def cacheable(data: dict) -> bool:
+        if data.get('horizon_days') or (data.get('engine') or 'greedy') != 'greedy' or not data.get('user_id'):
+            return False
+        ids = [task.get('id') for task in data.get('tasks', [])]
+        # Deltas address tasks by id
+        return None not in ids and len(set(map(str, ids))) == len(ids)
+
+    def schedule(self, data: dict) -> dict:
+        """Same result as build_schedule(data), served from the cache when the input is unchanged"""
+        if not self.cacheable(data):
+            return build_schedule(data)
+
+        user_id = data['user_id']
+        key = input_hash(data)
+        with self._lock:
+            plan = self._plans.get(user_id)
+            if plan is not None and plan.input_hash == key:
+                self.hits += 1
+                self._plans.move_to_end(user_id)
+                return {"schedule": list(plan.schedule())}
+            self.misses += 1
+
+            plan = UserPlan(data)
+            self._plans[user_id] = plan
+            self._plans.move_to_end(user_id)
+            while len(self._plans) > self.max_users:
+                self._plans.popitem(last=False)
+            return {"schedule": list(plan.schedule())}
+
+    def update(self, data: dict) -> dict:
+        """
+        Apply data["deltas"] to data["user_id"]'s cached plan. Raises
+        ValueError if there is none (the caller then sends a full request).
+        """
+        user_id = data.get('user_id')
+        with self._lock:
+            plan = self._plans.get(user_id)
+            if plan is None:
+                raise ValueError(f"No cached plan for user {user_id}; send a full schedule request")
+            if plan.day != date.today():
+                # Built on an earlier day: completed_today and deadlines have moved on
+                del self._plans[user_id]
+                raise ValueError(f"Cached plan for user {user_id} is stale; send a full schedule request")
+            try:
+                diff = plan.apply(data.get('deltas', []))
+            except Exception:
+                # A rejected delta leaves the plan as it was; one that failed
+                # while re-placing sessions may have left it half updated
+                if not plan.consistent:
+                    del self._plans[user_id]
+                raise
+            self.updates += 1
+            self._plans.move_to_end(user_id)
+            return {"schedule": list(plan.schedule()), "diff": diff}
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._plans.pop(user_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self._plans),
+                "max_users": self.max_users,
+                "hits": self.hits,
+                "misses": self.misses,
+                "updates": self.updates,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
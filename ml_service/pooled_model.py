@@ -0,0 +1,596 @@
+"""
+Pooled Personal Model
+One shared personalization model for all users, instead of a pickled
+pipeline (or incremental_model.py state file) per user.
+
+The base model predicts log1p(minutes). Each user gets a small correction
+vector w_u on top of it:
+
+    log1p(minutes) = base_log + w_u . z
+    z = [1, base_log - LOG_CENTER, one-hot(category)]
+
+i.e. an overall pace, a stretch factor for long tasks and a per-category
+pace. w_u is a ridge fit on the user's residuals r = log1p(actual) - base_log,
+kept as sufficient statistics (A = sum z z^T, b = sum z r, n) and shrunk
+toward the pooled correction w_0 of all users:
+
+    w_0 = (A_all + POOLED_ALPHA I)^-1 b_all
+    w_u = (A_u + RIDGE_ALPHA I)^-1 (b_u + RIDGE_ALPHA w_0)
+
+so a user with a handful of tasks stays close to the population and a
+long history earns its own offsets.
+
+The residuals are relative to one base model version, so every row is
+tagged with the base version it was fitted on. Serving, gather() and
+the pooled sums only use rows fitted on the current base version. After a
+base swap a user falls back to the base model until their next fit starts
+them over, and a rollback re-activates the rows of the restored version.
+
+Everything lives in one directory (models/pooled/):
+
+    index.json    feature layout and capacity (rewritten only when the files grow)
+    users.jsonl   one user id per line, appended; line i is row i + 1
+    weights.f32   float32 (capacity, dim): row 0 = w_0, row r = w_u  (served)
+    stats.f64     float64 (capacity, dim*dim + dim + 3): A, b, n, updates, key ring position
+    keys.u64      uint64 (capacity, KEY_SLOTS + 2): hashes of the last task keys folded in,
+                  then the base version tag and the row's write sequence number
+
+The matrices are memory-mapped, so opening the model costs one JSON read
+whatever the number of users, and predicting for a batch of tasks of many
+users is one base model pass, a gather of the users' rows and a row-wise
+dot product (gather() + correct()).
+
+Writers (fit_user, refresh, reset) hold a lock file, so training processes
+can run side by side. Readers never lock: weight updates are visible
+through the shared mapping, and new users by reading the tail of users.jsonl.
+A row is rewritten in place, so each row carries a sequence number (a
+seqlock): a writer makes it odd before touching the row and even again
+after, and a reader copies the row between two reads of the number,
+retrying if a write was in progress or happened in between. Readers never
+serve a half-written correction.
+
+    python pooled_model.py info
+    python pooled_model.py user <user_id>
+    python pooled_model.py refresh            # re-shrink every current user toward w_0
+    python pooled_model.py reset <user_id>    # back to the base model
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from incremental_model import MIN_TASKS, task_key
+from model_store import ModelStore, FLAT_BASE_VERSION
+
+INDEX_VERSION = 1
+INDEX_FILENAME = 'index.json'
+USERS_FILENAME = 'users.jsonl'
+LOCK_FILENAME = '.lock'
+DEFAULT_POOLED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'pooled')
+
+CATEGORIES = ['Revision', 'Problems', 'Writing', 'Reading', 'Presentation', 'Project', 'Other']
+LOG_CENTER = 4.0  # log1p(~54 minutes): the stretch term is centered on a typical task
+RIDGE_ALPHA = 4.0  # pull of w_u toward w_0, in pseudo-tasks
+POOLED_ALPHA = 1.0  # pull of w_0 toward 0 (the plain base model)
+MAX_CORRECTION = float(np.log(4.0))  # never scale the base prediction by more than 4x either way
+
+POOLED_ROW = 0  # row of w_0 and of the summed statistics; users start at row 1
+KEY_SLOTS = 64  # the backend re-sends its 50 most recent completions
+TAG_COLUMN = KEY_SLOTS  # keys column holding the row's base_tag()
+SEQ_COLUMN = KEY_SLOTS + 1  # keys column holding the row's write sequence number (odd while written)
+READ_RETRIES = 100  # copies of a row a reader attempts while writers keep changing it
+INITIAL_CAPACITY = 1024
+LOCK_TIMEOUT = 30.0  # seconds after which a lock file is taken to be abandoned
+
+MATRICES = {
+    # name: (file, dtype)
+    "weights": ('weights.f32', np.float32),
+    "stats": ('stats.f64', np.float64),
+    "keys": ('keys.u64', np.uint64),
+}
+
+
+def _hash64(text: str) -> int:
+    digest = hashlib.blake2b(text.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+def key_hash(task: dict) -> int:
+    """64-bit hash of task_key() (0 marks an empty slot of the key ring)"""
+    return _hash64(task_key(task))
+
+
+def base_tag(base_version) -> int:
+    """64-bit tag of a base model version (None = the unpublished models/ layout; 0 = never fitted)"""
+    return _hash64(str(base_version or FLAT_BASE_VERSION))
+
+
+class PooledPersonalModel:
+    """
+    Memory-mapped per-user correction vectors on top of the base model.
+    Users with fewer than MIN_TASKS tasks get no correction (plain base model).
+    """
+
+    def __init__(self, path: str = DEFAULT_POOLED_DIR):
+        self.path = path
+        self.categories = list(CATEGORIES)
+        self.log_center = LOG_CENTER
+        self.users = {}  # user id -> row
+        self.capacity = 0
+        self.weights = self.stats = self.keys = None
+        self._index_key = None
+        self._users_offset = 0  # bytes of users.jsonl read so far
+        self._lock = threading.Lock()
+        self._set_layout()
+        self.refresh_index()
+
+    def _set_layout(self):
+        self.dim = 2 + len(self.categories)
+        self._category_column = {category: 2 + i for i, category in enumerate(self.categories)}
+        d = self.dim
+        # Column offsets within a stats row
+        self._b = d * d
+        self._n = self._b + d
+        self._updates = self._n + 1
+        self._key_pos = self._n + 2
+        self._widths = {"weights": d, "stats": d * d + d + 3, "keys": KEY_SLOTS + 2}
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, MATRICES[name][0])
+
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.path, INDEX_FILENAME), 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported pooled model version {index.get('version')} in {self.path}")
+        return index
+
+    def _write_index(self, index: dict):
+        path = os.path.join(self.path, INDEX_FILENAME)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(index, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+    def _map(self, index: dict, mode: str) -> dict:
+        return {name: np.memmap(self._file(name), dtype=dtype, mode=mode,
+                                shape=(index['capacity'], self._widths[name]))
+                for name, (_, dtype) in MATRICES.items()}
+
+    def refresh_index(self):
+        """
+        Pick up changes made by other processes: a new layout / capacity
+        (index.json) and users appended to users.jsonl. Two os.stat() calls
+        when nothing changed.
+        """
+        index_path = os.path.join(self.path, INDEX_FILENAME)
+        users_path = os.path.join(self.path, USERS_FILENAME)
+        try:
+            stat = os.stat(index_path)
+            users_size = os.path.getsize(users_path)
+        except OSError:
+            return
+        key = (stat.st_ino, stat.st_mtime_ns)
+        if key == self._index_key and users_size == self._users_offset:
+            return
+        with self._lock:
+            if key != self._index_key:
+                index = self._read_index()
+                if index is None:
+                    return
+                self._load_index(index)
+                self._index_key = key
+            if users_size != self._users_offset:
+                with open(users_path, 'rb') as f:
+                    f.seek(self._users_offset)
+                    tail = f.read()
+                # Only complete lines: a writer may be mid-append
+                tail = tail[:tail.rfind(b'\n') + 1]
+                users = dict(self.users)
+                for line in tail.splitlines():
+                    users[json.loads(line)] = POOLED_ROW + 1 + len(users)
+                self.users = users
+                self._users_offset += len(tail)
+            if POOLED_ROW + 1 + len(self.users) > self.capacity:
+                # Grown after index.json was read above (it is written before the users)
+                index = self._read_index()
+                if index is not None:
+                    self._load_index(index)
+
+    def _load_index(self, index: dict):
+        self.categories, self.log_center = index['categories'], index['log_center']
+        self._set_layout()
+        if index['capacity'] != self.capacity or self.weights is None:
+            maps = self._map(index, 'r')
+            self.weights, self.stats, self.keys = maps['weights'], maps['stats'], maps['keys']
+            self.capacity = index['capacity']
+
+    def __len__(self) -> int:
+        self.refresh_index()
+        return len(self.users)
+
+    # Serving
+
+    def _snapshot(self, rows):
+        """
+        Consistent copies of rows: (weights (k, dim), task counts, base tags,
+        sequence numbers, ok). Each row is copied between two reads of its
+        sequence number and copied again if a writer touched it meanwhile;
+        ok is False for rows still being written after READ_RETRIES copies.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        weights = np.zeros((len(rows), self.dim))
+        counts = np.zeros(len(rows))
+        tags = np.zeros(len(rows), dtype=np.uint64)
+        seqs = np.zeros(len(rows), dtype=np.uint64)
+        ok = np.zeros(len(rows), dtype=bool)
+        pending = np.arange(len(rows))
+        for _ in range(READ_RETRIES):
+            r = rows[pending]
+            before = np.array(self.keys[r, SEQ_COLUMN])
+            w = np.array(self.weights[r], dtype=np.float64)
+            n = np.array(self.stats[r, self._n])
+            tag = np.array(self.keys[r, TAG_COLUMN])
+            after = np.array(self.keys[r, SEQ_COLUMN])
+            clean = (before == after) & (before % 2 == 0)
+            done = pending[clean]
+            weights[done], counts[done], tags[done], seqs[done] = w[clean], n[clean], tag[clean], before[clean]
+            ok[done] = True
+            pending = pending[~clean]
+            if not len(pending):
+                break
+            time.sleep(0.0005)
+        return weights, counts, tags, seqs, ok
+
+    def _begin_write(self, keys, rows):
+        """Mark rows as being written (odd sequence number); call under the write lock"""
+        seq = keys[rows, SEQ_COLUMN]
+        # Stays odd if a writer died mid-write, so readers keep skipping the row until it is rewritten
+        keys[rows, SEQ_COLUMN] = seq + np.uint64(1) + (seq & np.uint64(1))
+
+    def _end_write(self, keys, rows):
+        keys[rows, SEQ_COLUMN] = keys[rows, SEQ_COLUMN] + np.uint64(1)
+
+    def _served(self, row: int, base_version):
+        """(correction vector, sequence number) of a row personalized on base_version, else None"""
+        weights, counts, tags, seqs, ok = self._snapshot([row])
+        if not ok[0] or counts[0] < MIN_TASKS or int(tags[0]) != base_tag(base_version):
+            return None
+        return weights[0], int(seqs[0])
+
+    def personalized(self, user_id, base_version) -> bool:
+        """Whether user_id has a correction (at least MIN_TASKS tasks) fitted on base_version"""
+        self.refresh_index()
+        row = self.users.get(str(user_id))
+        return row is not None and self._served(row, base_version) is not None
+
+    def user_weights(self, user_id, base_version):
+        """
+        (correction vector, version) of a user personalized on base_version,
+        else None. The version is the row's sequence number, which every write changes.
+        """
+        self.refresh_index()
+        row = self.users.get(str(user_id))
+        if row is None:
+            return None
+        return self._served(row, base_version)
+
+    def gather(self, user_ids: list, base_version):
+        """
+        (n, dim) correction vectors for a list of user ids (one row per task)
+        and a mask of the rows that are personalized on base_version; other
+        rows are zero.
+        """
+        self.refresh_index()
+        if self.weights is None or self.capacity == 0:
+            # Nobody has trained yet (fresh install): everyone gets the plain base model
+            return np.zeros((len(user_ids), self.dim)), np.zeros(len(user_ids), dtype=bool)
+        rows = np.array([self.users.get(str(user_id), -1) for user_id in user_ids], dtype=np.int64)
+        known = rows >= 0
+        unique, inverse = np.unique(rows[known], return_inverse=True)
+        user_weights, counts, tags, _, ok = self._snapshot(unique)
+        served = ok & (counts >= MIN_TASKS) & (tags == np.uint64(base_tag(base_version)))
+        active = np.zeros(len(rows), dtype=bool)
+        active[known] = served[inverse]
+        weights = np.zeros((len(rows), self.dim))
+        weights[known] = np.where(served[:, None], user_weights, 0.0)[inverse]
+        return weights, active
+
+    def design(self, base_log, categories) -> np.ndarray:
+        """Correction features z for each task: [1, base_log - center, category one-hot]"""
+        base_log = np.asarray(base_log, dtype=np.float64)
+        z = np.zeros((len(base_log), self.dim))
+        z[:, 0] = 1.0
+        z[:, 1] = base_log - self.log_center
+        columns = [self._category_column.get(category) for category in categories]
+        hit = [i for i, column in enumerate(columns) if column is not None]
+        z[hit, [columns[i] for i in hit]] = 1.0
+        return z
+
+    def correct(self, base_log, categories, weights) -> np.ndarray:
+        """
+        Corrected log predictions. weights is one user's vector (dim,) or a
+        gather()ed (n, dim) matrix with one row per task.
+        """
+        z = self.design(base_log, categories)
+        # Same arithmetic for one vector (broadcast) and a gathered matrix
+        delta = (z * np.asarray(weights, dtype=np.float64)).sum(axis=1)
+        return np.asarray(base_log, dtype=np.float64) + np.clip(delta, -MAX_CORRECTION, MAX_CORRECTION)
+
+    # Writing
+
+    @contextlib.contextmanager
+    def _write_lock(self):
+        os.makedirs(self.path, exist_ok=True)
+        lock_path = os.path.join(self.path, LOCK_FILENAME)
+        deadline = time.time() + LOCK_TIMEOUT
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                pass
+            try:
+                if time.time() - os.stat(lock_path).st_mtime > LOCK_TIMEOUT:
+                    os.remove(lock_path)  # left behind by a writer that died
+                    continue
+            except OSError:
+                continue  # released in the meantime
+            if time.time() > deadline:
+                raise TimeoutError(f"Pooled model at {self.path} is locked")
+            time.sleep(0.005)
+        try:
+            yield
+        finally:
+            os.remove(lock_path)
+
+    def _open_for_write(self):
+        """Current index (created if needed), with self.users up to date; call under the write lock"""
+        self.refresh_index()
+        index = self._read_index()
+        if index is None:
+            index = {"version": INDEX_VERSION, "categories": list(CATEGORIES), "log_center": LOG_CENTER,
+                     "capacity": 0}
+            open(os.path.join(self.path, USERS_FILENAME), 'ab').close()
+        self.categories, self.log_center = index['categories'], index['log_center']
+        self._set_layout()
+        return index
+
+    def _add_user(self, index: dict, user_id: str) -> int:
+        """Give user_id the next row (growing the files first); call under the write lock"""
+        row = POOLED_ROW + 1 + len(self.users)
+        if row >= index['capacity']:
+            self._grow(index, row + 1)
+            self._write_index(index)
+        with open(os.path.join(self.path, USERS_FILENAME), 'ab') as f:
+            f.write(json.dumps(user_id).encode() + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.refresh_index()
+        return row
+
+    def _grow(self, index: dict, rows: int):
+        """Extend the matrix files (zero-filled) to hold at least rows rows"""
+        capacity = max(index['capacity'], INITIAL_CAPACITY)
+        while capacity < rows:
+            capacity *= 2
+        for name, (_, dtype) in MATRICES.items():
+            with open(self._file(name), 'ab') as f:
+                f.truncate(capacity * self._widths[name] * np.dtype(dtype).itemsize)
+        index['capacity'] = capacity
+
+    def _solve(self, stats_row, alpha: float, prior) -> np.ndarray:
+        d = self.dim
+        a = stats_row[:self._b].reshape(d, d) + alpha * np.eye(d)
+        return np.linalg.solve(a, stats_row[self._b:self._n] + alpha * prior)
+
+    def _rebase_pooled(self, stats, keys, tag: int):
+        """
+        Make row 0 the sums over the users fitted on base tag (after a base
+        swap it still holds the previous version's); call under the write lock
+        """
+        if int(keys[POOLED_ROW, TAG_COLUMN]) == tag:
+            return
+        rows = np.arange(POOLED_ROW + 1, POOLED_ROW + 1 + len(self.users))
+        current = rows[keys[rows, TAG_COLUMN] == np.uint64(tag)]
+        stats[POOLED_ROW, :self._updates] = stats[current, :self._updates].sum(axis=0)
+        stats[POOLED_ROW, self._updates] += 1
+        keys[POOLED_ROW, TAG_COLUMN] = tag
+
+    def fit_user(self, user_id, tasks: list, base_log, actual_minutes, base_version,
+                 replace: bool = False):
+        """
+        Fold completed tasks into user_id's statistics and re-solve their
+        correction (and w_0). base_log are the predictions of base model
+        base_version for the tasks. replace=True starts the user over from
+        these tasks (full retrain); otherwise tasks already folded in (by
+        task_key) are skipped. A user fitted on another base version is
+        always started over. Returns (the user's task count, tasks added).
+        """
+        user_id = str(user_id)
+        tag = base_tag(base_version)
+        hashes = [key_hash(task) for task in tasks]
+        residuals = np.log1p(np.asarray(actual_minutes, dtype=np.float64)) - np.asarray(base_log, dtype=np.float64)
+
+        with self._write_lock():
+            index = self._open_for_write()
+            z = self.design(base_log, [task.get('category') for task in tasks])
+            row = self.users.get(user_id)
+            if row is None:
+                row = self._add_user(index, user_id)
+            maps = self._map(index, 'r+')
+            weights, stats, keys = maps['weights'], maps['stats'], maps['keys']
+            self._rebase_pooled(stats, keys, tag)
+
+            old = stats[row].copy()
+            if int(keys[row, TAG_COLUMN]) != tag:
+                # Fitted on another base version (or never): not part of row 0's sums
+                old[:self._updates] = 0
+                replace = True
+            new = np.zeros_like(old) if replace else old.copy()
+            ring = np.zeros(KEY_SLOTS, dtype=np.uint64) if replace else np.array(keys[row, :KEY_SLOTS])
+            seen = set(int(h) for h in ring) - {0}
+            position = int(new[self._key_pos])
+            take = []
+            for i, h in enumerate(hashes):
+                if h in seen:
+                    continue
+                take.append(i)
+                seen.add(h)
+                ring[position % KEY_SLOTS] = h
+                position += 1
+
+            if take or replace:
+                d = self.dim
+                z_new, r_new = z[take], residuals[take]
+                new[:self._b] += (z_new.T @ z_new).ravel()
+                new[self._b:self._n] += z_new.T @ r_new
+                new[self._n] += len(take)
+                new[self._updates] = old[self._updates] + 1
+                new[self._key_pos] = position
+
+                # Row 0 holds the sums over all users on this base version
+                stats[POOLED_ROW, :self._updates] += new[:self._updates] - old[:self._updates]
+                stats[POOLED_ROW, self._updates] += 1
+                pooled = self._solve(stats[POOLED_ROW], POOLED_ALPHA, np.zeros(d))
+                weights[POOLED_ROW] = pooled
+                solved = self._solve(new, RIDGE_ALPHA, pooled)
+
+                self._begin_write(keys, [row])
+                stats[row] = new
+                keys[row, :KEY_SLOTS] = ring
+                keys[row, TAG_COLUMN] = tag
+                weights[row] = solved
+                self._end_write(keys, [row])
+            for matrix in maps.values():
+                matrix.flush()
+            n = int(new[self._n])
+            del maps, weights, stats, keys
+        return n, len(take)
+
+    def refresh(self) -> int:
+        """
+        Re-solve the correction of every user on row 0's base version
+        against the current w_0 (fit_user only re-solves the user it fits).
+        Returns the number of users re-solved.
+        """
+        with self._write_lock():
+            index = self._open_for_write()
+            if index['capacity'] == 0:
+                return 0
+            maps = self._map(index, 'r+')
+            weights, stats, keys = maps['weights'], maps['stats'], maps['keys']
+            d = self.dim
+            rows = np.arange(POOLED_ROW + 1, POOLED_ROW + 1 + len(self.users))
+            rows = rows[keys[rows, TAG_COLUMN] == keys[POOLED_ROW, TAG_COLUMN]]
+            pooled = self._solve(stats[POOLED_ROW], POOLED_ALPHA, np.zeros(d))
+            weights[POOLED_ROW] = pooled
+            if len(rows):
+                a = stats[rows, :self._b].reshape(-1, d, d) + RIDGE_ALPHA * np.eye(d)
+                b = stats[rows, self._b:self._n] + RIDGE_ALPHA * pooled
+                solved = np.linalg.solve(a, b[:, :, None])[:, :, 0]
+                self._begin_write(keys, rows)
+                weights[rows] = solved
+                stats[rows, self._updates] += 1
+                self._end_write(keys, rows)
+            for matrix in maps.values():
+                matrix.flush()
+            del maps, weights, stats, keys
+        return len(rows)
+
+    def reset(self, user_id) -> bool:
+        """Drop a user's statistics (they fall back to the base model)"""
+        with self._write_lock():
+            index = self._open_for_write()
+            row = self.users.get(str(user_id))
+            if row is None:
+                return False
+            maps = self._map(index, 'r+')
+            stats, keys = maps['stats'], maps['keys']
+            updates = stats[row, self._updates]
+            if keys[row, TAG_COLUMN] == keys[POOLED_ROW, TAG_COLUMN]:
+                stats[POOLED_ROW, :self._updates] -= stats[row, :self._updates]
+            self._begin_write(keys, [row])
+            stats[row] = 0
+            stats[row, self._updates] = updates + 1
+            maps['weights'][row] = 0
+            keys[row, :SEQ_COLUMN] = 0
+            self._end_write(keys, [row])
+            for matrix in maps.values():
+                matrix.flush()
+            del maps, stats, keys
+        return True
+
+    def describe_user(self, user_id, base_version):
+        self.refresh_index()
+        row = self.users.get(str(user_id))
+        if row is None:
+            return None
+        weights = self._snapshot([row])[0][0]
+        return {
+            "user_id": str(user_id),
+            "row": row,
+            "tasks": int(self.stats[row, self._n]),
+            "personalized": self._served(row, base_version) is not None,
+            "updates": int(self.stats[row, self._updates]),
+            "offset": round(float(weights[0]), 4),
+            "stretch": round(float(weights[1]), 4),
+            "categories": {category: round(float(weights[2 + i]), 4) for i, category in enumerate(self.categories)}
+        }
+
+    def info(self, base_version) -> dict:
+        self.refresh_index()
+        rows = slice(POOLED_ROW + 1, POOLED_ROW + 1 + len(self.users))
+        counts = self.stats[rows, self._n] if self.users else np.zeros(0)
+        current = self.keys[rows, TAG_COLUMN] == np.uint64(base_tag(base_version)) if self.users else np.zeros(0, dtype=bool)
+        return {
+            "path": self.path,
+            "users": len(self.users),
+            "personalized_users": int(np.sum((counts >= MIN_TASKS) & current)),
+            "tasks": int(counts.sum()),
+            "capacity": self.capacity,
+            "bytes": sum(os.path.getsize(self._file(name)) for name in MATRICES) if self.capacity else 0,
+            "pooled_correction": [round(float(w), 4) for w in self.weights[POOLED_ROW]] if self.capacity else None
+        }
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Inspect or maintain the pooled personal model.')
+    parser.add_argument('command', choices=['info', 'user', 'refresh', 'reset'])
+    parser.add_argument('user_id', nargs='?', help='user / reset: the user id')
+    parser.add_argument('--path', default=DEFAULT_POOLED_DIR, help='Pooled model directory')
+    args = parser.parse_args()
+
+    model = PooledPersonalModel(args.path)
+    # Users count as personalized on the base version currently published next to the pooled model
+    base_version = ModelStore(os.path.join(os.path.dirname(os.path.abspath(args.path)), 'store')).current('base')
+    try:
+        if args.command in ('user', 'reset') and not args.user_id:
+            raise ValueError(f"{args.command} needs a user id")
+        if args.command == 'user':
+            print(json.dumps(model.describe_user(args.user_id, base_version)))
+            return
+        if args.command == 'refresh':
+            print(f"Re-solved {model.refresh()} users", file=sys.stderr)
+        elif args.command == 'reset':
+            if not model.reset(args.user_id):
+                raise ValueError(f"Unknown user '{args.user_id}'")
+        print(json.dumps(model.info(base_version)))
+    except Exception as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,41 @@ import argparse
 import os
 from improved_predictor import ImprovedTimePredictor
 
+def run_prediction(data: dict, registry=None) -> dict:
+    """
+    Predict a single task dict and format the response.
+    Shared by the one-shot CLI below and the long-lived worker (worker.py).
+    """
+    user_id = data.get('user_id', 'default')
+    predictor = ImprovedTimePredictor(user_id, registry=registry)
+    
+    # Unpack tuple
+    # Returns: (predicted_time, confidence, explanations, explanation_text, model_source, confidence_interval)
+    prediction_result = predictor.predict(data)
+    
+    # Handle unpacking safely in case return signature changes
+    if len(prediction_result) == 6:
+        predicted_minutes, confidence, explanations, text, source, interval = prediction_result
+    else:
+        # Fallback for older signature if any
+        predicted_minutes = prediction_result[0]
+        confidence = prediction_result[1]
+        explanations = []
+        text = "Prediction"
+        source = "unknown"
+        interval = [int(predicted_minutes*0.8), int(predicted_minutes*1.2)]
+        
+    # 3. FORMAT OUTPUT
+    return {
+        "predicted_minutes": predicted_minutes, # Requirement calls it 'predicted_minutes' (int)
+        "predicted_time": predicted_minutes,    # Keep 'predicted_time' for Backend compatibility
+        "model_source": source,
+        "confidence_interval": interval,
+        "explanations": explanations,
+        "explanations_text": text,
+        "confidence": confidence
+    }
+
 def predict():
     parser = argparse.ArgumentParser(description='Estimate task duration.')
     parser.add_argument('--input', type=str, help='Path to input JSON file')
@@ -39,35 +74,7 @@ def predict():
 
     # 2. PREDICT
     try:
-        user_id = data.get('user_id', 'default')
-        predictor = ImprovedTimePredictor(user_id)
-        
-        # Unpack tuple
-        # Returns: (predicted_time, confidence, explanations, explanation_text, model_source, confidence_interval)
-        prediction_result = predictor.predict(data)
-        
-        # Handle unpacking safely in case return signature changes
-        if len(prediction_result) == 6:
-            predicted_minutes, confidence, explanations, text, source, interval = prediction_result
-        else:
-            # Fallback for older signature if any
-            predicted_minutes = prediction_result[0]
-            confidence = prediction_result[1]
-            explanations = []
-            text = "Prediction"
-            source = "unknown"
-            interval = [int(predicted_minutes*0.8), int(predicted_minutes*1.2)]
-            
-        # 3. FORMAT OUTPUT
-        output_data = {
-            "predicted_minutes": predicted_minutes, # Requirement calls it 'predicted_minutes' (int)
-            "predicted_time": predicted_minutes,    # Keep 'predicted_time' for Backend compatibility
-            "model_source": source,
-            "confidence_interval": interval,
-            "explanations": explanations,
-            "explanations_text": text,
-            "confidence": confidence
-        }
+        output_data = run_prediction(data)
         
         # 4. WRITE OUTPUT
         if args.output:
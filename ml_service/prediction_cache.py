@@ -0,0 +1,113 @@
+"""
+Prediction Cache
+Bounded TTL cache of prediction results, in front of ImprovedTimePredictor.predict.
+
+Students create many near-identical tasks (same category, size, complexity,
+page count...), and the backend re-predicts on every create/update. Results
+are keyed on the normalized raw features plus the model that produced them,
+so a repeat prediction is a dict lookup (no pandas, no model call).
+
+The cache lives on the ModelRegistry, i.e. for the lifetime of the server /
+worker process. ModelRegistry.put() drops a user's entries whenever a new
+personal model is published (train() or a reload from disk).
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from compiled_encoder import NUMERIC_COLS, CATEGORICAL_COLS
+
+
+def feature_key(features: dict):
+    """
+    Hashable key for a normalize_task() dict, or None if a value is unhashable.
+    Derived features are functions of these, so only the raw ones are used.
+    """
+    key = []
+    for col in NUMERIC_COLS + CATEGORICAL_COLS:
+        value = features[col]
+        if isinstance(value, float) and math.isnan(value):
+            # nan != nan would make the entry unreachable
+            value = None
+        key.append(value)
+    key = tuple(key)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class PredictionCache:
+    """
+    LRU + TTL map of (user_id, model_source, model_version, feature_key) -> prediction tuple.
+
+    Cached tuples are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # key -> (expires_at, result)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: str):
+        """Drop every cached prediction for user_id (any model source/version)"""
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == user_id]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
@@ -1,7 +1,20 @@
 import sys
 import json
 import math
-from datetime import datetime, timedelta
+import heapq
+from operator import itemgetter
+from datetime import datetime
+
+from slot_index import FreeSlotIndex
+from slot_scores import SlotScoreMatrix, slot_score, MORNING, AFTERNOON, EVENING
+from task_records import task_records, clock_minutes, NO_DEADLINE
+
+SLOT_BUFFER = 10     # minutes of break after every session
+MAX_SESSION_DURATION = 90  # burnout cap per session
+NDJSON_FLUSH_EVERY = 64  # lines per flush in --ndjson mode
+DONE_KEY = 0         # "Done" entries sort with midnight, ahead of the day's sessions
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
 
 def parse_time(time_str):
     """Parse time string to datetime object"""
@@ -33,19 +46,16 @@ def minutes_to_time(minutes):
 def get_free_slots(wake_up_str, sleep_str, routine_blocks):
     """
     Calculate free time slots by excluding routine blocks from wake-sleep period
-    Returns list of (start_minutes, end_minutes) tuples
+    Returns a FreeSlotIndex of (start_minutes, end_minutes) slots
     """
-    wake_up = parse_time(wake_up_str)
-    sleep = parse_time(sleep_str)
-    
-    wake_minutes = time_to_minutes(wake_up)
-    sleep_minutes = time_to_minutes(sleep)
+    wake_minutes = clock_minutes(wake_up_str)
+    sleep_minutes = clock_minutes(sleep_str)
     
     # Preprocess routine blocks to handle midnight wrapping
     processed_blocks = []
     for block in routine_blocks:
-        start = time_to_minutes(parse_time(block['start_time']))
-        end = time_to_minutes(parse_time(block['end_time']))
+        start = clock_minutes(block['start_time'])
+        end = clock_minutes(block['end_time'])
         
         if end < start:
             # Split into two blocks: start->midnight and midnight->end
@@ -86,57 +96,77 @@ def get_free_slots(wake_up_str, sleep_str, routine_blocks):
     if current_time < sleep_minutes:
         free_slots.append((current_time, sleep_minutes))
     
-    return free_slots
+    return FreeSlotIndex(free_slots)
+
+def find_best_slot(free_slots, duration, complexity, priority):
+    """
+    Highest-scoring free slot that fits duration plus the break, or None.
+    
+    The time-of-day part of slot_score is constant within a band and the
+    lateness penalty only grows, so the best slot of each band is its
+    earliest fitting one: one index lookup per band instead of a scan over
+    every slot. Ties go to the earlier slot, as in a left-to-right scan.
+    """
+    bands = [(0, MORNING[0]), MORNING, AFTERNOON, EVENING, (EVENING[1], None)]
+    
+    best_slot = None
+    best_slot_score = -float('inf')
+    for band_start, band_end in bands:
+        slot = free_slots.first_fit(
+            duration + SLOT_BUFFER, band_start * 60, band_end * 60 if band_end is not None else None
+        )
+        if slot is None:
+            continue
+        score = slot_score(slot[0], complexity, priority)
+        if score > best_slot_score:
+            best_slot_score = score
+            best_slot = slot
+    return best_slot
+
+def place_sessions(free_slots, sessions):
+    """
+    Greedy placement: each session, in order, takes the best slot left and
+    the slot shrinks by the session plus the break. Scores come from one
+    SlotScoreMatrix, so each step is an argmax over the session's row
+    (same choice as find_best_slot). free_slots itself is not modified.
+    Returns the start minute of every session, None if it did not fit.
+    """
+    matrix = session_matrix(free_slots, sessions)
+    starts = []
+    for i in range(len(sessions)):
+        j = matrix.best(i)
+        starts.append(None if j is None else matrix.take(i, j)[0])
+    return starts
+
+def session_matrix(free_slots, sessions):
+    """SlotScoreMatrix of sessions (dicts with task record and duration) over free_slots"""
+    return SlotScoreMatrix(
+        free_slots.slots(),
+        [session["task"].complexity_code for session in sessions],
+        [session["task"].urgent for session in sessions],
+        [session["duration"] + SLOT_BUFFER for session in sessions]
+    )
 
 def break_task_into_sessions(task):
     """
-    Break a task into sessions - one session per day until deadline.
+    Break a task (TaskRecord) into sessions - one session per day until deadline.
     Distributes work evenly across all available days.
     """
-    duration = task.get('predicted_time', 30)
-    deadline_str = task.get('deadline')
+    duration = task.predicted_time
+    deadline_str = task.deadline_text
     
-    print(f"DEBUG: Task '{task.get('title')}', deadline_str='{deadline_str}'", file=sys.stderr, flush=True)
+    print(f"DEBUG: Task '{task.title}', deadline_str='{deadline_str}'", file=sys.stderr, flush=True)
     
     # Calculate days until deadline
     if deadline_str:
-        try:
-            import math
-            
-            # Parse deadline - try ISO format and common formats
-            task_deadline = None
-            
-            # Try ISO format first (most common from frontend)
-            try:
-                task_deadline = datetime.fromisoformat(deadline_str.replace('Z', '+00:00'))
-            except:
-                pass
-            
-            # Try parsing YYYY-MM-DD format
-            if not task_deadline:
-                try:
-                    task_deadline = datetime.strptime(deadline_str.split('T')[0], '%Y-%m-%d')
-                except:
-                    pass
-            
-            if not task_deadline:
-                raise ValueError(f"Could not parse deadline: {deadline_str}")
-            
-            # Make both timezone-naive for comparison
-            if task_deadline.tzinfo is not None:
-                task_deadline = task_deadline.replace(tzinfo=None)
-            
-            now = datetime.now()
-            if now.tzinfo is not None:
-                now = now.replace(tzinfo=None)
-            
+        if task.deadline is not None:
             # Match frontend: Math.ceil((deadline - now) / (1000 * 60 * 60 * 24))
-            time_difference_seconds = (task_deadline - now).total_seconds()
+            time_difference_seconds = (task.deadline_at - datetime.now()).total_seconds()
             days_available = max(1, math.ceil(time_difference_seconds / 86400))
             
             print(f"DEBUG: Deadline={deadline_str}, Days={days_available}", file=sys.stderr, flush=True)
-        except Exception as e:
-            print(f"ERROR parsing deadline '{deadline_str}': {e}", file=sys.stderr, flush=True)
+        else:
+            print(f"ERROR parsing deadline '{deadline_str}': Could not parse deadline", file=sys.stderr, flush=True)
             # Default to 2 days if parsing fails
             days_available = 2
     else:
@@ -174,241 +204,319 @@ def break_task_into_sessions(task):
     return sessions
 
 
-def schedule():
-    try:
-        # Read input from stdin
-        input_data = sys.stdin.read()
-        if not input_data:
-            return
-            
-        data = json.loads(input_data)
-        user_id = data.get('user_id')
-        routine = data.get('routine', {})
-        tasks = data.get('tasks', [])
-        routine_blocks = data.get('routine_blocks', [])
-        completed_today = data.get('completed_today', {}) # New field
+def task_order(task):
+    """Sort key for TaskRecords: Urgent, then High, then by deadline"""
+    return (
+        task.priority != 'Urgent',
+        task.priority != 'High',
+        task.deadline if task.deadline is not None else NO_DEADLINE
+    )
+
+def days_until(deadline_dt, now=None):
+    """Days available until the deadline, rounding up (today counts as day 1)"""
+    now = now or datetime.now()
+    # Calculate difference in days, rounding up
+    diff = deadline_dt - now
+    return max(1, diff.days + 1)
+
+def days_until_deadline(task, now=None):
+    """days_until for a TaskRecord; an unparseable deadline counts as due today"""
+    if task.deadline is None:
+        return 1
+    return days_until(task.deadline_at, now)
+
+def blocks_for_weekday(routine_blocks, weekday):
+    """
+    Routine blocks that apply on weekday (0 = Monday), using the optional
+    routine_blocks.days column (e.g. ["Monday", "Wed"]); no days = every day.
+    """
+    name = WEEKDAYS[weekday]
+    selected = []
+    for block in routine_blocks:
+        days = block.get('days')
+        if not days or any(str(day).strip().lower()[:3] == name[:3] for day in days):
+            selected.append(block)
+    return selected
+
+def keyed_routine_items(routine_blocks):
+    """(start minute, schedule entry) for every routine block, in block order"""
+    items = []
+    for block in routine_blocks:
+        # Handle wrapping (e.g. sleep 22:00 to 06:00)
+        # For the daily view, we might want to split or just show it as is.
+        # If it wraps, it technically belongs to "today" (start) and "tomorrow" (end).
+        # For simplicity in a daily view, we'll just add it. 
+        # If it starts late (e.g. 22:00), it's at the end of the day.
+        # If it ends early (e.g. 06:00), it might be from previous day? 
+        # The current logic assumes routine blocks are for "today".
         
-        # Get wake up and sleep times
-        wake_up_str = routine.get('wake_up', '07:00')
-        sleep_str = routine.get('sleep', '23:00')
+        # Let's just convert to minutes for sorting
+        start_mins = clock_minutes(block['start_time'])
+        end_mins = clock_minutes(block['end_time'])
         
-        # Get free time slots
-        free_slots = get_free_slots(wake_up_str, sleep_str, routine_blocks)
+        duration = end_mins - start_mins
+        if duration < 0: duration += 24 * 60 # Handle wrap around duration calculation
         
-        # Sort tasks by priority and deadline
-        sorted_tasks = sorted(
-            tasks, 
-            key=lambda x: (
-                x.get('priority') != 'Urgent',
-                x.get('priority') != 'High',
-                x.get('deadline') or '9999-12-31'
-            )
-        )
+        items.append((start_mins, {
+            "task_id": f"routine-{block.get('id', 'unknown')}", # distinct ID
+            "title": block.get('activity_type', 'Routine').capitalize(),
+            "start": minutes_to_time(start_mins),
+            "end": minutes_to_time(end_mins),
+            "duration": duration,
+            "type": "routine", # Mark as routine
+            "activity_type": block.get('activity_type')
+        }))
+    return items
+
+def ordered_entries(task_items, routine_blocks):
+    """
+    Task entries and routine entries merged by start minute, without parsing
+    the "HH:MM AM/PM" strings back ("Done" entries, keyed DONE_KEY, come first).
+    task_items are (start minute or DONE_KEY, entry) pairs in task order; on
+    equal minutes task entries come first, in that order, then routine blocks.
+    Yields the entries lazily.
+    """
+    tasks = sorted(
+        ((minute, seq, entry) for seq, (minute, entry) in enumerate(task_items)),
+        key=itemgetter(0, 1)
+    )
+    offset = len(tasks)
+    routine = sorted(
+        ((minute, offset + seq, entry) for seq, (minute, entry) in enumerate(keyed_routine_items(routine_blocks))),
+        key=itemgetter(0, 1)
+    )
+    for _, _, entry in heapq.merge(tasks, routine, key=itemgetter(0, 1)):
+        yield entry
+
+def todays_session(task, completed_today):
+    """
+    Today's share of a task (TaskRecord): (minutes already done today, session or None).
+    None if the task has (almost) no work left. A session is a dict with the
+    task, its duration, which part of the task it is (session_num of
+    total_sessions at that length) and the figures echoed back in the
+    schedule entry.
+    """
+    total_time = task.predicted_time
+    progress = task.progress
+    remaining_minutes = int(total_time * (1 - progress / 100.0))
+    
+    # If task is completed or almost completed (less than 1 min), skip
+    if remaining_minutes < 1:
+        return None
+        
+    # Calculate days until deadline
+    days_left = 1
+    if task.deadline_text:
+        days_left = days_until_deadline(task)
+    
+    # Distribute remaining time across available days
+    # We want to do a portion of the work today
+    daily_allocation = math.ceil(remaining_minutes / days_left)
+    
+    # Check if we already did work today
+    completed_mins = completed_today.get(task.id, completed_today.get(str(task.id), 0))
+    
+    # Reduce daily allocation by what we already did
+    daily_allocation -= completed_mins
+    
+    if daily_allocation <= 0:
+        # We met our daily goal! No more scheduling for today.
+        return completed_mins, None
+    
+    # Cap at 90 minutes or the daily allocation, whichever is smaller (but at least 30 mins if possible)
+    # Actually, we should try to do the daily allocation.
+    # But we also respect the 90 min burnout cap per session.
+    target_duration = min(daily_allocation, MAX_SESSION_DURATION)
+    # Ensure we don't schedule more than remaining
+    duration = min(target_duration, remaining_minutes)
+    
+    # Which part of the task this session is, at this session length
+    total_sessions = math.ceil(total_time / duration)
+    session_num = max(1, total_sessions - math.ceil(remaining_minutes / duration) + 1)
+    
+    return completed_mins, {
+        "task": task,
+        "duration": duration,
+        "session_num": session_num,
+        "total_sessions": total_sessions,
+        "days_until_deadline": days_left,
+        "remaining_minutes": remaining_minutes,
+        "total_minutes": total_time
+    }
+
+def done_entry(task, completed_mins):
+    """Display entry for the work already logged on a task today"""
+    return {
+        "task_id": task.id,
+        "title": task.title,
+        "start": "Done", # Special marker
+        "end": "Today",
+        "duration": completed_mins,
+        "type": "completed_session",
+        "status": "Completed"
+    }
+
+def session_entry(session, start_minutes):
+    """Schedule entry for a session placed at start_minutes"""
+    task = session["task"]
+    
+    # Create session title
+    task_title = task.title
+    if session["total_sessions"] > 1:
+        session_title = f"{task_title} (Part {session['session_num']}/{session['total_sessions']})"
+    else:
+        session_title = task_title
+    
+    return {
+        "task_id": task.id,
+        "title": session_title,
+        "start": minutes_to_time(start_minutes),
+        "end": minutes_to_time(start_minutes + session["duration"]),
+        "duration": session["duration"],
+        "remaining_minutes": session["remaining_minutes"], # Pass this back
+        "total_minutes": session["total_minutes"]
+    }
+
+def plan_today(data):
+    """
+    Place today's sessions for one (single-day) request payload.
+    Returns (task_items, routine_blocks, report) for ordered_entries();
+    report is the optimizer's objective, or None for the greedy engine.
+    """
+    user_id = data.get('user_id')
+    routine = data.get('routine', {})
+    tasks = task_records(data.get('tasks', []))
+    routine_blocks = data.get('routine_blocks', [])
+    completed_today = data.get('completed_today', {}) # New field
+    
+    # Get wake up and sleep times
+    wake_up_str = routine.get('wake_up', '07:00')
+    sleep_str = routine.get('sleep', '23:00')
+    
+    # Routine blocks restricted to a weekday only apply on that day
+    routine_blocks = blocks_for_weekday(routine_blocks, datetime.now().weekday())
+    
+    # Get free time slots
+    free_slots = get_free_slots(wake_up_str, sleep_str, routine_blocks)
+    
+    # Sort tasks by priority and deadline
+    sorted_tasks = sorted(tasks, key=task_order)
+    
+    print(f"DEBUG: Received {len(sorted_tasks)} tasks to schedule", file=sys.stderr, flush=True)
+    print(f"DEBUG: Available free slots: {len(free_slots)}", file=sys.stderr, flush=True)
+    
+    # Work out today's session (if any) for every task
+    planned = []
+    for task in sorted_tasks:
+        today = todays_session(task, completed_today)
+        if today is not None:
+            planned.append((task,) + today)
+    
+    # Place the sessions: greedy in task order, or the time-budgeted optimizer
+    sessions = [session for _, _, session in planned if session is not None]
+    engine = data.get('engine') or 'greedy'
+    report = None
+    if engine == 'greedy':
+        starts = place_sessions(free_slots, sessions)
+    elif engine == 'local_search':
+        from optimizer import optimize_placements
+        starts, report = optimize_placements(free_slots, sessions, data.get('time_budget_ms'), data.get('seed', 0))
+    else:
+        raise ValueError(f"Unknown scheduling engine '{engine}'")
+    start_of = {id(session): start for session, start in zip(sessions, starts)}
+    
+    task_items = []
+    for task, completed_mins, session in planned:
+        # If we did work, add a "Done" item to the schedule for display purposes
+        if completed_mins > 0:
+            task_items.append((DONE_KEY, done_entry(task, completed_mins)))
+        if session is None:
+            continue
         
-        schedule_list = []
+        task_start_minutes = start_of[id(session)]
         
-        print(f"DEBUG: Received {len(sorted_tasks)} tasks to schedule", file=sys.stderr, flush=True)
-        print(f"DEBUG: Available free slots: {len(free_slots)}", file=sys.stderr, flush=True)
+        # If task couldn't be scheduled, skip it
+        if task_start_minutes is None:
+            # Only the count of entries so far: dumping the partial schedule
+            # for every unplaced task made large requests quadratic
+            print(json.dumps({
+                "warning": f"Could not schedule task '{task.title}' - no free slots available",
+                "scheduled_so_far": len(task_items)
+            }), file=sys.stderr)
+            continue
         
-        # Schedule tasks in free slots
-        for task in sorted_tasks:
-            total_time = task.get('predicted_time', 30)
-            progress = task.get('progress', 0)
-            remaining_minutes = int(total_time * (1 - progress / 100.0))
-            
-            # If task is completed or almost completed (less than 1 min), skip
-            if remaining_minutes < 1:
-                continue
-                
-            # Calculate days until deadline
-            deadline_str = task.get('deadline')
-            days_until_deadline = 1
-            if deadline_str:
-                try:
-                    deadline_dt = datetime.strptime(deadline_str, "%Y-%m-%dT%H:%M:%S.%fZ")
-                except ValueError:
-                    try:
-                        deadline_dt = datetime.strptime(deadline_str, "%Y-%m-%dT%H:%M")
-                    except ValueError:
-                         deadline_dt = datetime.now() + timedelta(days=1)
+        task_items.append((task_start_minutes, session_entry(session, task_start_minutes)))
+    
+    return task_items, routine_blocks, report
 
-                now = datetime.now()
-                # Calculate difference in days, rounding up
-                diff = deadline_dt - now
-                days_until_deadline = max(1, diff.days + 1)
-            
-            # Distribute remaining time across available days
-            # We want to do a portion of the work today
-            daily_allocation = math.ceil(remaining_minutes / days_until_deadline)
-            
-            # Check if we already did work today
-            completed_mins = completed_today.get(task.get('id'), 0)
-            
-            # If we did work, add a "Done" item to the schedule for display purposes
-            if completed_mins > 0:
-                schedule_list.append({
-                    "task_id": task.get('id'),
-                    "title": task.get('title'),
-                    "start": "Done", # Special marker
-                    "end": "Today",
-                    "duration": completed_mins,
-                    "type": "completed_session",
-                    "status": "Completed"
-                })
-            
-            # Reduce daily allocation by what we already did
-            daily_allocation -= completed_mins
-            
-            if daily_allocation <= 0:
-                # We met our daily goal! No more scheduling for today.
-                continue
+def build_schedule(data):
+    """
+    Build today's schedule for one request payload, or a multi-day plan if
+    data has horizon_days (see horizon.py).
+    Shared by the one-shot CLI below and the long-lived worker (worker.py).
+    """
+    if data.get('horizon_days'):
+        from horizon import build_horizon_plan
+        return build_horizon_plan(data)
+    
+    task_items, routine_blocks, report = plan_today(data)
+    # Routine blocks merged in by start minute
+    schedule_list = list(ordered_entries(task_items, routine_blocks))
+    
+    if report is not None:
+        return {"schedule": schedule_list, "objective": report}
+    return {"schedule": schedule_list}
 
-            # Cap at 90 minutes or the daily allocation, whichever is smaller (but at least 30 mins if possible)
-            # Actually, we should try to do the daily allocation.
-            # But we also respect the 90 min burnout cap per session.
-            MAX_SESSION_DURATION = 90
-            target_duration = min(daily_allocation, MAX_SESSION_DURATION)
-            
-            # Ensure we don't schedule more than remaining
-            duration = min(target_duration, remaining_minutes)
-            
-            complexity = task.get('complexity', 'Medium')
-            task_scheduled = False
-            
-            best_slot_index = -1
-            best_slot_score = -float('inf')
-            
-            # Evaluate all available free slots
-            for i, (slot_start, slot_end) in enumerate(free_slots):
-                slot_duration = slot_end - slot_start
-                
-                # Check if task fits in this slot (with 10 min buffer)
-                if slot_duration >= duration + 10:
-                    # Calculate score for this slot
-                    score = 0
-                    
-                    # 1. Time of Day Preference
-                    # Morning (06:00 - 12:00): High Energy -> Good for High Complexity / Urgent
-                    # Afternoon (12:00 - 17:00): Medium Energy -> Good for Medium Complexity
-                    # Evening (17:00 - 22:00): Low Energy -> Good for Low Complexity / Reading
-                    
-                    slot_hour = (slot_start // 60)
-                    
-                    if 6 <= slot_hour < 12: # Morning
-                        if complexity == 'High' or task.get('priority') == 'Urgent':
-                            score += 10
-                        elif complexity == 'Low':
-                            score -= 5
-                    elif 12 <= slot_hour < 17: # Afternoon
-                        if complexity == 'Medium':
-                            score += 5
-                    elif 17 <= slot_hour < 22: # Evening
-                        if complexity == 'Low':
-                            score += 10
-                        elif complexity == 'High':
-                            score -= 5
-                            
-                    # 2. Tight Fit Bonus (Minimize wasted small gaps)
-                    # If the task fits perfectly or leaves a small gap, that's good.
-                    # If it leaves a huge gap, maybe save that for a bigger task?
-                    # Actually, we want to prioritize slots where it fits well.
-                    # But for now, let's just prioritize earlier slots slightly to break ties
-                    score -= (slot_start / 1440) * 2 # Slight penalty for later slots
-                    
-                    if score > best_slot_score:
-                        best_slot_score = score
-                        best_slot_index = i
-            
-            # If we found a valid slot
-            if best_slot_index != -1:
-                slot_start, slot_end = free_slots[best_slot_index]
-                
-                # Schedule the task
-                task_start_minutes = slot_start
-                task_end_minutes = slot_start + duration
-                
-                # Create session title
-                task_title = task.get('title')
-                if first_session["total_sessions"] > 1:
-                    session_title = f"{task_title} (Part {first_session['session_num']}/{first_session['total_sessions']})"
-                else:
-                    session_title = task_title
-                
-                schedule_list.append({
-                    "task_id": task.get('id'),
-                    "title": session_title,
-                    "start": minutes_to_time(task_start_minutes),
-                    "end": minutes_to_time(task_end_minutes),
-                    "duration": duration,
-                    "remaining_minutes": remaining_minutes, # Pass this back
-                    "total_minutes": total_time
-                })
-                
-                # Update the free slot (reduce it or remove it)
-                new_slot_start = task_end_minutes + 10  # 10 min break
-                if new_slot_start < slot_end:
-                    free_slots[best_slot_index] = (new_slot_start, slot_end)
-                else:
-                    free_slots.pop(best_slot_index)
-                
-                task_scheduled = True
-            
-            # If task couldn't be scheduled, skip it
-                task_scheduled = True
-            
-            # If task couldn't be scheduled, skip it
-            if not task_scheduled:
-                print(json.dumps({
-                    "warning": f"Could not schedule task '{task.get('title')}' - no free slots available",
-                    "schedule": schedule_list
-                }), file=sys.stderr)
-        
-        # Add routine blocks to the schedule
-        for block in routine_blocks:
-            # Parse times to ensure consistent format
-            start_time = parse_time(block['start_time'])
-            end_time = parse_time(block['end_time'])
-            
-            # Handle wrapping (e.g. sleep 22:00 to 06:00)
-            # For the daily view, we might want to split or just show it as is.
-            # If it wraps, it technically belongs to "today" (start) and "tomorrow" (end).
-            # For simplicity in a daily view, we'll just add it. 
-            # If it starts late (e.g. 22:00), it's at the end of the day.
-            # If it ends early (e.g. 06:00), it might be from previous day? 
-            # The current logic assumes routine blocks are for "today".
-            
-            # Let's just convert to minutes for sorting
-            start_mins = time_to_minutes(start_time)
-            end_mins = time_to_minutes(end_time)
-            
-            duration = end_mins - start_mins
-            if duration < 0: duration += 24 * 60 # Handle wrap around duration calculation
-            
-            schedule_list.append({
-                "task_id": f"routine-{block.get('id', 'unknown')}", # distinct ID
-                "title": block.get('activity_type', 'Routine').capitalize(),
-                "start": minutes_to_time(start_mins),
-                "end": minutes_to_time(end_mins),
-                "duration": duration,
-                "type": "routine", # Mark as routine
-                "activity_type": block.get('activity_type')
-            })
-            
-        # Sort entire schedule by start time
-        # We need to convert back to minutes for sorting because "10:00 PM" string sort is wrong vs "09:00 AM"
-        def get_sort_key(item):
-            # Parse "HH:MM AM/PM" back to minutes
-            t_str = item['start']
-            # Remove AM/PM for parsing if needed, or just use datetime
-            try:
-                dt = datetime.strptime(t_str, "%I:%M %p")
-                return dt.hour * 60 + dt.minute
-            except:
-                return 0
 
-        schedule_list.sort(key=get_sort_key)
-        
-        print(json.dumps({"schedule": schedule_list}))
+def schedule_lines(data):
+    """
+    build_schedule as a stream of NDJSON records, in start order:
+
+        {"entry": {...}}                      today's schedule entries
+        {"date": "YYYY-MM-DD", "entry": {...}} horizon plans, day by day
+        {"unscheduled": {...}}                horizon work that did not fit
+        {"end": {"entries": n, ...}}          last line (plus "objective")
+
+    Entries are serialized one at a time as the merge produces them, so the
+    full schedule never exists as one list or one JSON string.
+    """
+    if data.get('horizon_days'):
+        from horizon import horizon_lines
+        yield from horizon_lines(data)
+        return
+    
+    task_items, routine_blocks, report = plan_today(data)
+    count = 0
+    for entry in ordered_entries(task_items, routine_blocks):
+        count += 1
+        yield {"entry": entry}
+    end = {"entries": count}
+    if report is not None:
+        end["objective"] = report
+    yield {"end": end}
+
+def stream_schedule(data, out, flush_every=NDJSON_FLUSH_EVERY):
+    """Write schedule_lines(data) to out, flushing every flush_every lines"""
+    for n, line in enumerate(schedule_lines(data), 1):
+        out.write(json.dumps(line) + "\n")
+        if n % flush_every == 0:
+            out.flush()
+    out.flush()
+
+def schedule():
+    # --ndjson: stream the schedule line by line (see schedule_lines)
+    ndjson = '--ndjson' in sys.argv[1:]
+    try:
+        # Read input from stdin
+        input_data = sys.stdin.read()
+        if not input_data:
+            return
+            
+        data = json.loads(input_data)
+        if ndjson:
+            stream_schedule(data, sys.stdout)
+        else:
+            print(json.dumps(build_schedule(data)))
         
     except Exception as e:
         print(json.dumps({"error": str(e)}))
@@ -0,0 +1,162 @@
+"""
+Free Slot Index
+Sorted free-interval structure for the schedulers.
+
+Free slots are kept in a max segment tree over start minutes: leaf m holds
+the length of the free slot starting at minute m (0 if none). That answers
+
+    "earliest slot starting in [lo, hi) with length >= d"
+
+in O(log horizon), and allocating (splitting) or releasing (merging with the
+neighbouring slots) a range costs O(log horizon) as well, instead of
+scanning and shifting a Python list of slots for every task.
+"""
+
+
+class FreeSlotIndex:
+    """
+    Disjoint, non-adjacent free intervals [start, end) on [0, horizon).
+    """
+
+    def __init__(self, slots=(), horizon: int = 24 * 60):
+        self.horizon = horizon
+        self._size = 1
+        while self._size < horizon + 1:
+            self._size *= 2
+        self._tree = [0] * (2 * self._size)
+
+        self._end_of = {}    # start -> end
+        self._start_of = {}  # end -> start
+
+        for start, end in slots:
+            self.release(start, end)
+
+    def __len__(self):
+        return len(self._end_of)
+
+    def __iter__(self):
+        return iter(sorted(self._end_of.items()))
+
+    def copy(self):
+        """Independent copy (cheaper than rebuilding from slots())"""
+        other = FreeSlotIndex.__new__(FreeSlotIndex)
+        other.horizon = self.horizon
+        other._size = self._size
+        other._tree = self._tree[:]
+        other._end_of = dict(self._end_of)
+        other._start_of = dict(self._start_of)
+        return other
+
+    def slots(self) -> list:
+        """All free slots as (start, end) tuples, by start"""
+        return list(self)
+
+    def _set(self, start: int, length: int):
+        i = start + self._size
+        self._tree[i] = length
+        i //= 2
+        while i:
+            self._tree[i] = max(self._tree[2 * i], self._tree[2 * i + 1])
+            i //= 2
+
+    def _add(self, start: int, end: int):
+        self._end_of[start] = end
+        self._start_of[end] = start
+        self._set(start, end - start)
+
+    def _remove(self, start: int):
+        end = self._end_of.pop(start)
+        del self._start_of[end]
+        self._set(start, 0)
+        return end
+
+    def first_fit(self, length: int, lo: int = 0, hi: int = None):
+        """
+        Earliest slot with start in [lo, hi) and at least `length` minutes, or None.
+        """
+        hi = self.horizon if hi is None else min(hi, self.horizon)
+        lo = max(lo, 0)
+        length = max(length, 1)
+        tree = self._tree
+        if lo >= hi or tree[1] < length:
+            return None
+
+        # Canonical cover of [lo, hi), left to right
+        left, right = [], []
+        l, r = lo + self._size, hi + self._size
+        while l < r:
+            if l & 1:
+                left.append(l)
+                l += 1
+            if r & 1:
+                r -= 1
+                right.append(r)
+            l //= 2
+            r //= 2
+
+        for node in left + right[::-1]:
+            if tree[node] >= length:
+                # Leftmost leaf below node that fits
+                while node < self._size:
+                    node = 2 * node if tree[2 * node] >= length else 2 * node + 1
+                start = node - self._size
+                return start, self._end_of[start]
+        return None
+
+    def containing(self, minute: int):
+        """The free slot containing `minute`, or None"""
+        if minute in self._end_of:
+            return minute, self._end_of[minute]
+        tree = self._tree
+
+        # Rightmost slot start in [0, minute]: canonical cover, right to left
+        left, right = [], []
+        l, r = self._size, min(minute + 1, self.horizon) + self._size
+        while l < r:
+            if l & 1:
+                left.append(l)
+                l += 1
+            if r & 1:
+                r -= 1
+                right.append(r)
+            l //= 2
+            r //= 2
+
+        for node in right + left[::-1]:
+            if tree[node] > 0:
+                while node < self._size:
+                    node = 2 * node + 1 if tree[2 * node + 1] > 0 else 2 * node
+                start = node - self._size
+                end = self._end_of[start]
+                return (start, end) if minute < end else None
+        return None
+
+    def allocate(self, start: int, end: int):
+        """
+        Mark [start, end) busy. The range must lie inside one free slot (the
+        part past the slot's end, if any, is ignored); the slot is split.
+        """
+        slot = self.containing(start)
+        if slot is None:
+            raise ValueError(f"[{start}, {end}) is not free")
+        slot_start, slot_end = slot
+        self._remove(slot_start)
+        if slot_start < start:
+            self._add(slot_start, start)
+        if end < slot_end:
+            self._add(end, slot_end)
+
+    def release(self, start: int, end: int):
+        """
+        Mark [start, end) free, merging with the adjacent free slots. The
+        range must be busy (e.g. a session that was allocated before).
+        """
+        start, end = max(start, 0), min(end, self.horizon)
+        if start >= end:
+            return
+        if start in self._start_of:
+            start = self._start_of[start]
+            self._remove(start)
+        if end in self._end_of:
+            end = self._remove(end)
+        self._add(start, end)
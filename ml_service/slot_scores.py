@@ -0,0 +1,129 @@
+"""
+Slot Scores
+Time-of-day preference scores for the schedulers, per slot or as a matrix.
+
+slot_score() scores one (session, slot start) pair. SlotScoreMatrix holds
+the scores of every session in every free slot of a day, built in one
+numpy pass from a (complexity, urgent, hour) bonus table, together with
+the slots' current start/end arrays. Picking a slot for a session is then
+a masked argmax over its row (feasible = slot length >= duration + break),
+and taking a slot only recomputes that slot's column.
+"""
+
+import numpy as np
+
+# Time-of-day bands (by slot start hour) used to score slots
+MORNING = (6, 12)    # High Energy -> Good for High Complexity / Urgent
+AFTERNOON = (12, 17) # Medium Energy -> Good for Medium Complexity
+EVENING = (17, 22)   # Low Energy -> Good for Low Complexity / Reading
+
+# Complexity codes for the bonus table; any other value gets OTHER_COMPLEXITY
+COMPLEXITY_CODES = {'Low': 0, 'Medium': 1, 'High': 2}
+OTHER_COMPLEXITY = 3
+
+
+def time_of_day_bonus(slot_hour, complexity, priority):
+    """Energy-level fit of a session starting in slot_hour"""
+    if MORNING[0] <= slot_hour < MORNING[1]:
+        if complexity == 'High' or priority == 'Urgent':
+            return 10
+        elif complexity == 'Low':
+            return -5
+    elif AFTERNOON[0] <= slot_hour < AFTERNOON[1]:
+        if complexity == 'Medium':
+            return 5
+    elif EVENING[0] <= slot_hour < EVENING[1]:
+        if complexity == 'Low':
+            return 10
+        elif complexity == 'High':
+            return -5
+    return 0
+
+
+def slot_score(slot_start, complexity, priority):
+    """
+    Preference score of starting a session at slot_start (minutes since midnight).
+    """
+    # 1. Time of Day Preference
+    score = time_of_day_bonus(slot_start // 60, complexity, priority)
+    # 2. Slight penalty for later slots (breaks ties towards earlier slots)
+    score -= (slot_start / 1440) * 2
+    return score
+
+
+# _BONUS[complexity code, urgent, hour]; hours past 23 have no band, like 23
+_COMPLEXITY_BY_CODE = ['Low', 'Medium', 'High', None]
+_BONUS = np.array([
+    [[time_of_day_bonus(hour, complexity, 'Urgent' if urgent else None) for hour in range(24)]
+     for urgent in (False, True)]
+    for complexity in _COMPLEXITY_BY_CODE
+], dtype=np.float64)
+
+
+def score_matrix(complexity_codes, urgent, slot_starts):
+    """
+    slot_score of every (session, slot start) pair: shape (sessions, slots).
+    complexity_codes / urgent are per-session arrays, slot_starts in minutes.
+    """
+    slot_starts = np.asarray(slot_starts, dtype=np.int64)
+    hours = np.minimum(slot_starts // 60, 23)
+    bonus = _BONUS[np.asarray(complexity_codes, dtype=np.int64)[:, None], np.asarray(urgent, dtype=np.int64)[:, None], hours[None, :]]
+    return bonus - (slot_starts / 1440) * 2
+
+
+class SlotScoreMatrix:
+    """
+    Free slots of a day and the score of every session in each of them.
+    Sessions are given as complexity codes (COMPLEXITY_CODES), urgent flags
+    and the minutes they need including the break. Sessions are taken from
+    the start of a slot, which then shrinks.
+    """
+
+    def __init__(self, slots, complexity_codes, urgent, needed):
+        self.starts = np.array([start for start, _ in slots], dtype=np.int64)
+        self.ends = np.array([end for _, end in slots], dtype=np.int64)
+        self.complexity_codes = np.array(complexity_codes, dtype=np.int64)
+        self.urgent = np.array(urgent, dtype=np.int64)
+        self.needed = np.array(needed, dtype=np.int64)
+        self.scores = score_matrix(self.complexity_codes, self.urgent, self.starts)
+
+    def copy(self):
+        other = SlotScoreMatrix.__new__(SlotScoreMatrix)
+        other.starts = self.starts.copy()
+        other.ends = self.ends.copy()
+        other.complexity_codes = self.complexity_codes
+        other.urgent = self.urgent
+        other.needed = self.needed
+        other.scores = self.scores.copy()
+        return other
+
+    def best(self, i, lo=None, hi=None):
+        """
+        Index of session i's highest-scoring slot that fits needed[i] minutes
+        (optionally with start in [lo, hi)), or None. Ties go to the earlier slot.
+        """
+        feasible = self.ends - self.starts >= self.needed[i]
+        if lo is not None:
+            feasible &= self.starts >= lo
+        if hi is not None:
+            feasible &= self.starts < hi
+        if not feasible.any():
+            return None
+        return int(np.where(feasible, self.scores[i], -np.inf).argmax())
+
+    def best_scores(self):
+        """Every session's best score over the current slots (-inf if none fits)"""
+        if not self.starts.size:
+            return np.full(len(self.needed), -np.inf)
+        feasible = (self.ends - self.starts)[None, :] >= self.needed[:, None]
+        return np.where(feasible, self.scores, -np.inf).max(axis=1)
+
+    def take(self, i, j):
+        """Put session i at the start of slot j; returns (start, score)"""
+        start = int(self.starts[j])
+        score = float(self.scores[i, j])
+        self.starts[j] = min(start + self.needed[i], self.ends[j])
+        # Only slot j's column changes
+        hour = min(self.starts[j] // 60, 23)
+        self.scores[:, j] = _BONUS[self.complexity_codes, self.urgent, hour] - (self.starts[j] / 1440) * 2
+        return start, score
@@ -0,0 +1,124 @@
+"""
+Task Records
+One ingestion step for the task JSON the schedulers receive.
+
+Every scheduler (schedule.py, horizon.py, optimizer.py, plan_cache.py and
+main.py's /schedule) used to read task dicts with .get() and defaults all
+over, and to parse deadlines three different ways (fromisoformat,
+two strptime formats) each time a task was looked at. Tasks are now turned
+into TaskRecords once per request:
+
+  - deadline: epoch minutes of the deadline's wall-clock time (timezone
+    suffixes are dropped, as before), parsed by one cached parser, or None,
+  - priority / complexity: the strings (interned) plus small integer codes
+    for the vectorized paths (SlotScoreMatrix),
+  - __slots__ instead of a per-task dict.
+
+Routine times ("HH:MM" / "HH:MM:SS") go through clock_minutes(), which is
+cached too: the same few block times repeat across requests and days.
+"""
+
+import sys
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from slot_scores import COMPLEXITY_CODES, OTHER_COMPLEXITY
+
+EPOCH = datetime(1970, 1, 1)
+NO_DEADLINE = float('inf')  # sorts after every epoch minute
+
+PRIORITY_CODES = {'Urgent': 0, 'High': 1, 'Medium': 2, 'Low': 3}
+OTHER_PRIORITY = 4
+
+
+def epoch_minutes(dt: datetime) -> int:
+    """Whole minutes from 1970-01-01 00:00 to a naive datetime"""
+    return (dt - EPOCH) // timedelta(minutes=1)
+
+
+def from_epoch_minutes(minutes: int) -> datetime:
+    return EPOCH + timedelta(minutes=minutes)
+
+
+@lru_cache(maxsize=4096)
+def deadline_minutes(value):
+    """
+    Epoch minutes of a deadline string, or None if it can't be parsed.
+    Accepts ISO 8601 (with or without seconds, fraction or "Z") and falls
+    back to the leading YYYY-MM-DD.
+    """
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            dt = datetime.strptime(value.split('T')[0], '%Y-%m-%d')
+        except ValueError:
+            return None
+    # Naive wall-clock time, as the schedulers always compared it
+    return epoch_minutes(dt.replace(tzinfo=None))
+
+
+@lru_cache(maxsize=1024)
+def clock_minutes(value) -> int:
+    """Minutes since midnight of "HH:MM" or "HH:MM:SS" (seconds are ignored)"""
+    if isinstance(value, str) and len(value) > 5:
+        value = value[:5]
+    t = datetime.strptime(value, "%H:%M")
+    return t.hour * 60 + t.minute
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class TaskRecord:
+    """
+    Scheduler view of one task. deadline_text keeps the original string for
+    responses that echo it back.
+    """
+
+    __slots__ = (
+        'id', 'title', 'predicted_time', 'progress', 'deadline', 'deadline_text',
+        'priority', 'complexity', 'priority_code', 'complexity_code'
+    )
+
+    def __init__(self, id, title, predicted_time=30, progress=0, deadline_text=None,
+                 priority=None, complexity='Medium'):
+        self.id = id
+        self.title = title
+        self.predicted_time = predicted_time
+        self.progress = progress
+        self.deadline_text = deadline_text
+        self.deadline = deadline_minutes(deadline_text) if deadline_text else None
+        self.priority = _intern(priority)
+        self.complexity = _intern(complexity)
+        self.priority_code = PRIORITY_CODES.get(priority, OTHER_PRIORITY)
+        self.complexity_code = COMPLEXITY_CODES.get(complexity, OTHER_COMPLEXITY)
+
+    @classmethod
+    def from_dict(cls, task: dict):
+        return cls(
+            task.get('id'),
+            task.get('title'),
+            task.get('predicted_time', 30),
+            task.get('progress', 0),
+            task.get('deadline'),
+            task.get('priority'),
+            task.get('complexity', 'Medium')
+        )
+
+    @property
+    def deadline_at(self):
+        """Deadline as a naive datetime, or None"""
+        return from_epoch_minutes(self.deadline) if self.deadline is not None else None
+
+    @property
+    def urgent(self) -> bool:
+        return self.priority_code == PRIORITY_CODES['Urgent']
+
+
+def task_records(tasks: list) -> list:
+    """TaskRecords for a request's task dicts, in the same order"""
+    return [TaskRecord.from_dict(task) for task in tasks]
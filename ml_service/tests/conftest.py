@@ -0,0 +1,46 @@
+import os
+import sys
+
+# The service modules are flat (run from ml_service/), not a package
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVICE_DIR not in sys.path:
+    sys.path.insert(0, SERVICE_DIR)
+
+import json
+import random
+
+import pytest
+
+MODEL_DIR = os.path.join(SERVICE_DIR, 'models')
+SAMPLE_SIZE = 500
+
+
+@pytest.fixture(scope='session')
+def base_pipeline():
+    """The committed base model pipeline (models/base_model.joblib)"""
+    joblib = pytest.importorskip('joblib')
+    path = os.path.join(MODEL_DIR, 'base_model.joblib')
+    if not os.path.exists(path):
+        pytest.skip("no base model in models/")
+    return joblib.load(path)
+
+
+@pytest.fixture(scope='session')
+def base_metadata():
+    with open(os.path.join(MODEL_DIR, 'base_model_metadata.json'), 'r') as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope='session')
+def sample_tasks():
+    """A fixed, seeded sample of tasks covering missing and odd values"""
+    from benchmarks.inference import random_task
+    rng = random.Random(42)
+    return [random_task(rng) for _ in range(SAMPLE_SIZE)]
+
+
+@pytest.fixture(scope='session')
+def sample_frame(sample_tasks):
+    """sample_tasks as the DataFrame the sklearn pipeline is fed"""
+    from improved_predictor import ImprovedTimePredictor
+    return ImprovedTimePredictor(None)._prepare_frame(sample_tasks)
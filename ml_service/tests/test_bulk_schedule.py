@@ -0,0 +1,71 @@
+import io
+import json
+import os
+
+import bulk_schedule
+from bulk_schedule import run_bulk, _schedule_chunk
+from schedule import build_schedule
+
+
+def user(user_id, **overrides):
+    data = {
+        "user_id": user_id,
+        "routine": {"wake_up": "08:00", "sleep": "22:00"},
+        "routine_blocks": [{"id": 1, "activity_type": "class", "start_time": "10:00", "end_time": "12:00"}],
+        "completed_today": {},
+        "tasks": [
+            {"id": f"{user_id}-a", "title": "Essay", "predicted_time": 40 + len(str(user_id)), "progress": 0,
+             "deadline": None, "priority": "High", "complexity": "High"},
+            {"id": f"{user_id}-b", "title": "Reading", "predicted_time": 30, "progress": 0,
+             "deadline": None, "priority": "Low", "complexity": "Low"},
+        ],
+    }
+    data.update(overrides)
+    return data
+
+
+def crashing_chunk(lines):
+    """_schedule_chunk, except that the "poison" user kills the worker process"""
+    if any(json.loads(line).get("user_id") == "poison" for line in lines):
+        os._exit(1)
+    return _schedule_chunk(lines)
+
+
+def run(lines, **kwargs):
+    out = io.StringIO()
+    stats = run_bulk(lines, out, **kwargs)
+    return [json.loads(line) for line in out.getvalue().splitlines()], stats
+
+
+def test_output_order_and_error_isolation():
+    payloads = [user(f"u{i}") for i in range(10)]
+    payloads[3] = user("bad-engine", engine="nope")
+    lines = [json.dumps(payload) for payload in payloads]
+    lines.insert(6, "{not json")
+    lines.insert(2, "   ")
+
+    results, stats = run(lines, workers=2, chunk_size=3)
+
+    expected_ids = [payload["user_id"] for payload in payloads]
+    expected_ids.insert(6, None)  # the blank line is skipped
+    assert [result["user_id"] for result in results] == expected_ids
+    assert stats["users"] == 11 and stats["errors"] == 2
+    assert "Unknown scheduling engine" in results[3]["error"]
+    assert "error" in results[6]
+    for i in (0, 1, 2, 4, 5, 7, 10):
+        payload = payloads[i if i < 6 else i - 1]
+        assert results[i] == {"user_id": payload["user_id"], **build_schedule(payload)}
+
+
+def test_crashed_worker_fails_only_the_user_that_crashed_it(monkeypatch):
+    monkeypatch.setattr(bulk_schedule, "_schedule_chunk", crashing_chunk)
+    ids = [f"u{i}" for i in range(12)]
+    ids[5] = "poison"
+    lines = [json.dumps(user(user_id)) for user_id in ids]
+
+    results, stats = run(lines, workers=2, chunk_size=4)
+
+    assert [result["user_id"] for result in results] == ids
+    assert stats["errors"] == 1
+    assert results[5] == {"user_id": "poison", "error": "worker process died"}
+    assert all("schedule" in result for i, result in enumerate(results) if i != 5)
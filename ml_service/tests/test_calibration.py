@@ -0,0 +1,103 @@
+import os
+import json
+
+import numpy as np
+
+from calibration import (
+    build_calibration, save_calibration, load_calibration, load_base_calibration,
+    IntervalCalibrator, BUCKET_EDGES, QUANTILES, MIN_SAMPLES
+)
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+
+
+def held_out(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    predictions = rng.uniform(10, 600, n)
+    categories = rng.choice(["Writing", "Reading", "Coding", "Rare"], n, p=[0.4, 0.3, 0.28, 0.02])
+    residuals = rng.normal(0, 1, n) * predictions * 0.3
+    return residuals, predictions, categories
+
+
+def test_tables_are_percentiles_of_their_rows():
+    residuals, predictions, categories = held_out()
+    calibration = build_calibration(residuals, predictions, categories)
+
+    assert calibration["n"] == len(residuals)
+    np.testing.assert_allclose(calibration["global"], np.percentile(residuals, QUANTILES))
+
+    # Categories with fewer than MIN_SAMPLES rows are left to the other tables
+    assert set(calibration["by_category"]) == {"Writing", "Reading", "Coding"}
+    for category, offsets in calibration["by_category"].items():
+        np.testing.assert_allclose(offsets, np.percentile(residuals[categories == category], QUANTILES))
+
+    buckets = np.searchsorted(BUCKET_EDGES, predictions, side='right')
+    assert len(calibration["by_bucket"]) == len(BUCKET_EDGES) + 1
+    for bucket, offsets in enumerate(calibration["by_bucket"]):
+        rows = residuals[buckets == bucket]
+        if len(rows) < MIN_SAMPLES:
+            assert offsets is None
+        else:
+            np.testing.assert_allclose(offsets, np.percentile(rows, QUANTILES))
+    assert None in calibration["by_bucket"]
+
+
+def test_lookup_precedence():
+    calibration = {
+        "quantiles": QUANTILES, "n": 100, "global": [-10.0, 20.0],
+        "by_category": {"Writing": [-30.0, 60.0]},
+        "bucket_edges": [30, 60],
+        "by_bucket": [[-1.0, 2.0], None, [-50.0, 90.0]]
+    }
+    calibrator = IntervalCalibrator(calibration)
+    lower, upper = calibrator.offsets([10, 45, 100, 10], ["Reading", None, "Other", "Writing"])
+    # bucket 0, empty bucket 1 (global), bucket 2, then the category over its bucket
+    np.testing.assert_array_equal(lower, [-1, -10, -50, -30])
+    np.testing.assert_array_equal(upper, [2, 20, 90, 60])
+
+    lower, upper = calibrator.intervals(np.array([10.0, 45.0, 100.0]))
+    np.testing.assert_array_equal(lower, [9, 35, 50])
+    np.testing.assert_array_equal(upper, [12, 65, 190])
+    lower, _ = calibrator.intervals(np.array([8.0]), ["Writing"])
+    assert lower[0] == 5
+
+
+def test_global_table_matches_previous_percentiles():
+    # Only the residuals are known: same interval as the old per-request np.percentile
+    residuals = np.load(os.path.join(MODEL_DIR, 'base_model_residuals.npy'))
+    calibrator = IntervalCalibrator(build_calibration(residuals))
+    predictions = np.array([3.0, 25.0, 61.5, 130.0, 700.0])
+    lower, upper = calibrator.intervals(predictions)
+    expected_lower = [max(5, int(p + np.percentile(residuals, 5))) for p in predictions]
+    expected_upper = [max(5, int(p + np.percentile(residuals, 95))) for p in predictions]
+    assert lower.tolist() == expected_lower
+    assert upper.tolist() == expected_upper
+
+
+def test_load_base_calibration(tmp_path):
+    assert load_base_calibration(str(tmp_path)) is None
+
+    # Legacy model directory: migrated from the residuals, global table only
+    residuals, predictions, categories = held_out()
+    np.save(tmp_path / 'base_model_residuals.npy', residuals)
+    migrated = load_base_calibration(str(tmp_path))
+    np.testing.assert_allclose(migrated.global_offsets, np.percentile(residuals, QUANTILES))
+    assert migrated.category_offsets == {}
+
+    # The artifact written at training time wins
+    path = str(tmp_path / 'base_model_calibration.json')
+    save_calibration(build_calibration(residuals, predictions, categories), path)
+    loaded = load_base_calibration(str(tmp_path))
+    assert set(loaded.category_offsets) == {"Writing", "Reading", "Coding"}
+    assert not os.path.exists(path + '.tmp')
+
+    with open(path, 'w') as f:
+        f.write('{"global": ')
+    assert load_calibration(path) is None
+
+
+def test_shipped_calibration_loads():
+    calibrator = load_base_calibration(MODEL_DIR)
+    with open(os.path.join(MODEL_DIR, 'base_model_calibration.json')) as f:
+        calibration = json.load(f)
+    np.testing.assert_allclose(calibrator.global_offsets, calibration["global"])
@@ -0,0 +1,30 @@
+import warnings
+
+import numpy as np
+
+from compiled_encoder import encoder_for, predict_raw
+
+TOLERANCE = 1e-9
+
+
+def test_encoder_matches_pipeline_transform(base_pipeline, base_metadata, sample_tasks, sample_frame):
+    encoder = encoder_for(base_pipeline, base_metadata)
+    assert encoder is not None, "pipeline could not be compiled"
+    expected = base_pipeline[:-1].transform(sample_frame)
+    np.testing.assert_allclose(encoder.encode_batch(sample_tasks), expected, rtol=TOLERANCE, atol=TOLERANCE)
+
+
+def test_single_row_encoding_matches_batch(base_pipeline, base_metadata, sample_tasks):
+    encoder = encoder_for(base_pipeline, base_metadata)
+    batch = encoder.encode_batch(sample_tasks[:50])
+    for task, row in zip(sample_tasks, batch):
+        np.testing.assert_array_equal(encoder.encode(task), row)
+
+
+def test_fast_path_predictions_match_pipeline(base_pipeline, base_metadata, sample_tasks, sample_frame):
+    encoder = encoder_for(base_pipeline, base_metadata)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')  # feature-name warnings on plain arrays
+        raw = np.array([predict_raw(base_pipeline, vector) for vector in encoder.encode_batch(sample_tasks)])
+        expected = base_pipeline.predict(sample_frame)
+    np.testing.assert_allclose(raw, expected, rtol=TOLERANCE, atol=TOLERANCE)
@@ -0,0 +1,30 @@
+import os
+
+import train_base_model
+from dataset_store import DatasetStore
+
+
+def write_csv(path, rows):
+    with open(path, 'w') as f:
+        f.write("category,estimated_size,actual_time_minutes\n")
+        for i in range(rows):
+            f.write(f"Writing,{i % 5 + 1},{30 + i}\n")
+
+
+def test_csv_does_not_replace_default_store(tmp_path, monkeypatch):
+    default_dir = str(tmp_path / 'data' / 'training_store')
+    monkeypatch.setattr(train_base_model, 'DEFAULT_STORE_DIR', default_dir)
+    store = DatasetStore.create(default_dir)
+    store.append([{"category": "Reading", "actual_time_minutes": 45.0}] * 7)
+
+    csv_path = str(tmp_path / 'extra.csv')
+    write_csv(csv_path, 3)
+    converted = train_base_model.open_dataset(str(tmp_path), csv_path)
+
+    assert len(converted) == 3
+    assert converted.path != default_dir
+    assert len(DatasetStore(default_dir)) == 7
+    assert len(train_base_model.open_dataset(str(tmp_path))) == 7
+    # Converting again rebuilds the CSV's store instead of appending to it
+    assert len(train_base_model.open_dataset(str(tmp_path), csv_path)) == 3
+    assert os.path.isdir(converted.path)
@@ -0,0 +1,101 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from day_calendar import DayCalendar
+
+
+def scan_conflicts(start_time: datetime, end_time: datetime, blocks: list) -> bool:
+    """The previous main.time_conflicts_with_routine"""
+    for start, end in blocks:
+        block_start = datetime.strptime(start, "%H:%M:%S")
+        block_end = datetime.strptime(end, "%H:%M:%S")
+        block_start = block_start.replace(year=start_time.year, month=start_time.month, day=start_time.day)
+        block_end = block_end.replace(year=start_time.year, month=start_time.month, day=start_time.day)
+        if start_time < block_end and end_time > block_start:
+            return True
+    return False
+
+
+def scan_next_slot(current_time: datetime, duration: int, sleep_time: datetime, blocks: list):
+    """The previous main.find_next_available_slot"""
+    attempts = 0
+    while attempts < 100:
+        attempts += 1
+        end_time = current_time + timedelta(minutes=duration)
+        if end_time > sleep_time:
+            return None
+        if not scan_conflicts(current_time, end_time, blocks):
+            return current_time
+        for _, end in blocks:
+            block_end = datetime.strptime(end, "%H:%M:%S")
+            block_end = block_end.replace(year=current_time.year, month=current_time.month, day=current_time.day)
+            if current_time < block_end:
+                current_time = block_end + timedelta(minutes=10)
+                break
+        else:
+            current_time += timedelta(minutes=15)
+    return None
+
+
+def random_clock(rng: random.Random) -> str:
+    return f"{rng.randrange(24):02d}:{rng.randrange(60):02d}:{rng.randrange(60):02d}"
+
+
+def random_blocks(rng: random.Random, n: int) -> list:
+    """Blocks in request order, including empty and wrapping (end <= start) ones"""
+    blocks = []
+    for _ in range(n):
+        start = random_clock(rng)
+        if rng.random() < 0.8:
+            start_s = sum(int(part) * unit for part, unit in zip(start.split(':'), (3600, 60, 1)))
+            end_s = min(start_s + rng.randint(60, 3 * 3600), 24 * 3600 - 1)
+            end = f"{end_s // 3600:02d}:{end_s // 60 % 60:02d}:{end_s % 60:02d}"
+        else:
+            end = rng.choice([start, random_clock(rng)])
+        blocks.append((start, end))
+    return blocks
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_previous_search(seed):
+    rng = random.Random(seed)
+    day = datetime(2026, 3, 14)
+    for _ in range(40):
+        blocks = random_blocks(rng, rng.randint(0, 12))
+        calendar = DayCalendar(blocks)
+        for _ in range(20):
+            current_time = day + timedelta(seconds=rng.uniform(0, 20 * 3600))
+            duration = rng.randint(5, 120)
+            sleep_time = day + timedelta(hours=rng.uniform(20, 30))
+            end_time = current_time + timedelta(minutes=duration)
+
+            midnight_us = (current_time - day) // timedelta(microseconds=1)
+            end_us = (end_time - day) // timedelta(microseconds=1)
+            assert calendar.conflicts(midnight_us, end_us) == scan_conflicts(current_time, end_time, blocks)
+            assert (calendar.find_next_available_slot(current_time, duration, sleep_time)
+                    == scan_next_slot(current_time, duration, sleep_time, blocks))
+
+
+def test_jump_uses_first_block_in_request_order():
+    # The second block ends first, but the search jumps past the first one listed
+    blocks = [("09:00:00", "11:00:00"), ("09:30:00", "10:00:00")]
+    calendar = DayCalendar(blocks)
+    now = datetime(2026, 3, 14, 9, 15)
+    slot = calendar.find_next_available_slot(now, 30, datetime(2026, 3, 14, 22))
+    assert slot == datetime(2026, 3, 14, 11, 10)
+    assert slot == scan_next_slot(now, 30, datetime(2026, 3, 14, 22), blocks)
+
+
+def test_second_resolution():
+    calendar = DayCalendar([("10:00:30", "10:30:00")])
+    ten = 10 * 3600 * 1000000
+    assert not calendar.conflicts(ten, ten + 30 * 1000000)
+    assert calendar.conflicts(ten, ten + 30 * 1000000 + 1)
+
+
+def test_no_slot_before_sleep():
+    calendar = DayCalendar([("08:00:00", "21:00:00")])
+    now = datetime(2026, 3, 14, 8)
+    assert calendar.find_next_available_slot(now, 90, datetime(2026, 3, 14, 22)) is None
@@ -0,0 +1,31 @@
+import os
+
+import numpy as np
+
+from compiled_encoder import CompiledFeatureEncoder
+from flat_trees import FlatTreeEnsemble, FlatTreeModel, load_flat_model, FLAT_MODEL_FILENAME
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+TOLERANCE = 1e-9
+
+
+def test_exported_trees_match_pipeline(base_pipeline, sample_tasks, sample_frame):
+    flat_model = load_flat_model(os.path.join(MODEL_DIR, FLAT_MODEL_FILENAME))
+    assert flat_model is not None, "models/ has no flat tree export"
+    predictions = flat_model.predict_vectors(flat_model.encoder.encode_batch(sample_tasks))
+    np.testing.assert_allclose(predictions, base_pipeline.predict(sample_frame), rtol=TOLERANCE, atol=TOLERANCE)
+
+
+def test_export_round_trip(base_pipeline, base_metadata, sample_tasks, sample_frame, tmp_path):
+    flat_model = FlatTreeModel(CompiledFeatureEncoder.from_pipeline(base_pipeline, base_metadata),
+                               FlatTreeEnsemble.from_regressor(base_pipeline.named_steps['regressor']))
+    path = str(tmp_path / FLAT_MODEL_FILENAME)
+    flat_model.save(path)
+    loaded = load_flat_model(path)
+
+    vectors = flat_model.encoder.encode_batch(sample_tasks)
+    np.testing.assert_array_equal(loaded.encoder.encode_batch(sample_tasks), vectors)
+    np.testing.assert_array_equal(loaded.predict_vectors(vectors), flat_model.predict_vectors(vectors))
+    np.testing.assert_allclose(loaded.predict_vectors(vectors), base_pipeline.predict(sample_frame),
+                               rtol=TOLERANCE, atol=TOLERANCE)
+
@@ -0,0 +1,114 @@
+from datetime import date, datetime
+
+from horizon import build_horizon_plan, horizon_lines
+from schedule import SLOT_BUFFER, time_to_minutes
+
+MONDAY = "2026-03-16"
+
+
+def task(id, predicted_time, deadline=None, **fields):
+    return {"id": id, "title": id.title(), "predicted_time": predicted_time, "progress": 0,
+            "deadline": deadline, "priority": "Medium", "complexity": "Medium", **fields}
+
+
+def payload(tasks, routine_blocks=(), horizon_days=7, **overrides):
+    data = {
+        "routine": {"wake_up": "08:00", "sleep": "22:00"},
+        "routine_blocks": list(routine_blocks),
+        "completed_today": {},
+        "tasks": tasks,
+        "horizon_days": horizon_days,
+        "start_date": MONDAY,
+    }
+    data.update(overrides)
+    return data
+
+
+def entry_minutes(entry):
+    """[start, end) of a schedule entry in minutes since midnight"""
+    start = time_to_minutes(datetime.strptime(entry["start"], "%I:%M %p"))
+    return start, start + entry["duration"]
+
+
+def task_entries(day):
+    return [entry for entry in day["schedule"] if entry.get("type") is None]
+
+
+def test_routine_blocks_apply_on_their_days_only():
+    blocks = [
+        {"id": 1, "activity_type": "class", "start_time": "08:00", "end_time": "20:00", "days": ["Monday", "wed"]},
+        {"id": 2, "activity_type": "gym", "start_time": "20:00", "end_time": "21:00"},
+    ]
+    result = build_horizon_plan(payload([task("essay", 60 * 7)], blocks))
+    assert [day["weekday"] for day in result["plan"]][:3] == ["Monday", "Tuesday", "Wednesday"]
+    for day in result["plan"]:
+        routine = [entry["task_id"] for entry in day["schedule"] if entry.get("type") == "routine"]
+        class_day = date.fromisoformat(day["date"]).weekday() in (0, 2)
+        assert routine == (["routine-1", "routine-2"] if class_day else ["routine-2"])
+
+        # Sessions never overlap the day's routine blocks or each other (with the break)
+        busy = [(8 * 60, 20 * 60)] if class_day else []
+        busy.append((20 * 60, 21 * 60))
+        placed = sorted(entry_minutes(entry) for entry in task_entries(day))
+        for start, end in placed:
+            assert all(end + SLOT_BUFFER <= b_start or start >= b_end for b_start, b_end in busy)
+        for (_, end), (next_start, _) in zip(placed, placed[1:]):
+            assert end + SLOT_BUFFER <= next_start
+
+    # Class days only have 08:00 - 08:00 free, so the work moved to the other days
+    assert not task_entries(result["plan"][0]) and not task_entries(result["plan"][2])
+    assert sum(entry["duration"] for day in result["plan"] for entry in task_entries(day)) == 60 * 7
+    assert result["unscheduled"] == []
+
+
+def test_work_that_does_not_fit_before_the_deadline():
+    blocks = [{"id": 1, "activity_type": "work", "start_time": "09:00", "end_time": "21:00"}]
+    # Due on day 2; each day only has 08:00 - 09:00 and 21:00 - 22:00 free
+    result = build_horizon_plan(payload([task("report", 300, deadline="2026-03-17T18:00")], blocks))
+    scheduled = sum(entry["duration"] for day in result["plan"] for entry in task_entries(day))
+    assert scheduled < 300
+    assert all(not task_entries(day) for day in result["plan"][2:])
+    assert result["unscheduled"] == [{
+        "task_id": "report", "title": "Report", "unscheduled_minutes": 300 - scheduled,
+        "deadline": "2026-03-17T18:00", "reason": "no_free_slots"
+    }]
+
+
+def test_work_past_the_horizon():
+    # Undated work is spread over 7 days; a 2-day horizon holds 2/7 of it
+    result = build_horizon_plan(payload([task("thesis", 700)], horizon_days=2))
+    scheduled = [sum(entry["duration"] for entry in task_entries(day)) for day in result["plan"]]
+    assert scheduled == [100, 100]
+    assert result["unscheduled"] == [{
+        "task_id": "thesis", "title": "Thesis", "unscheduled_minutes": 500,
+        "deadline": None, "reason": "beyond_horizon"
+    }]
+
+
+def test_completed_today_counts_towards_the_first_day():
+    data = payload([task("thesis", 700)], horizon_days=2, completed_today={"thesis": 40})
+    result = build_horizon_plan(data)
+    assert result["schedule"][0]["type"] == "completed_session"
+    assert sum(entry["duration"] for entry in task_entries(result["plan"][0])) == 60
+    assert result["schedule"] == result["plan"][0]["schedule"]
+
+
+def test_ndjson_lines_follow_the_plan():
+    blocks = [{"id": 1, "activity_type": "gym", "start_time": "18:00", "end_time": "19:00", "days": ["Tue"]}]
+    data = payload([task("essay", 240), task("report", 600, deadline="2026-03-18T12:00")], blocks, horizon_days=3)
+    result = build_horizon_plan(data)
+    lines = list(horizon_lines(data))
+    expected = [{"date": day["date"], "entry": entry} for day in result["plan"] for entry in day["schedule"]]
+    expected += [{"unscheduled": item} for item in result["unscheduled"]]
+    assert lines[:-1] == expected
+    assert lines[-1] == {"end": {"entries": len(expected) - len(result["unscheduled"]), "days": 3,
+                                 "unscheduled": len(result["unscheduled"])}}
+
+
+def test_int_task_ids_match_json_completed_today_keys():
+    # JSON object keys are always strings
+    data = payload([task("thesis", 700)], horizon_days=2, completed_today={"7": 40})
+    data["tasks"][0]["id"] = 7
+    result = build_horizon_plan(data)
+    assert result["schedule"][0]["type"] == "completed_session"
+    assert sum(entry["duration"] for entry in task_entries(result["plan"][0])) == 60
@@ -0,0 +1,46 @@
+import pytest
+from fastapi import HTTPException
+
+import main
+from model_store import ModelStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ModelStore(str(tmp_path / 'store'))
+    source = tmp_path / 'artifact.json'
+    for content in ('{"a": 1}', '{"a": 2}'):
+        source.write_text(content)
+        store.publish_files('base', {'artifact.json': str(source)})
+    return store
+
+
+@pytest.mark.parametrize("name", ["../..", "user_../../etc", "user_", "base/..", "", None])
+def test_invalid_names_are_rejected(store, name):
+    with pytest.raises(ValueError):
+        store.describe(name)
+    with pytest.raises(ValueError):
+        store.rollback(name)
+
+
+@pytest.mark.parametrize("version", ["../../x", "v1-../..", "v1", "latest"])
+def test_invalid_versions_are_rejected(store, version):
+    with pytest.raises(ValueError):
+        store.rollback('base', version)
+
+
+def test_rollback_to_previous_version(store):
+    first, second = store.versions('base')
+    assert store.current('base') == second
+    assert store.rollback('base') == first
+    assert store.describe('user_42-a_b')["versions"] == []
+
+
+def test_api_rejects_path_names_with_400(monkeypatch, store):
+    monkeypatch.setattr(main.model_registry, 'store', store)
+    with pytest.raises(HTTPException) as error:
+        main.api_model_versions("../..")
+    assert error.value.status_code == 400
+    with pytest.raises(HTTPException) as error:
+        main.api_model_rollback(main.RollbackRequest(name="base", version="../../x"))
+    assert error.value.status_code == 400
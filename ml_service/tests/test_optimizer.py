@@ -0,0 +1,95 @@
+import random
+import time
+
+import pytest
+
+from optimizer import optimize_placements, placement_reward, MAX_TIME_BUDGET_MS
+from schedule import place_sessions, SLOT_BUFFER
+from slot_index import FreeSlotIndex
+from slot_scores import slot_score
+from task_records import TaskRecord
+
+
+def session(duration, priority="Medium", complexity="Medium", days=1):
+    task = TaskRecord("t", "Task", duration, 0, None, priority, complexity)
+    return {"task": task, "duration": duration, "days_until_deadline": days}
+
+
+def random_day(rng: random.Random, n_sessions: int):
+    slots, t = [], 7 * 60
+    while t < 23 * 60:
+        free = rng.randint(15, 90)
+        slots.append((t, min(t + free, 23 * 60)))
+        t += free + rng.randint(10, 60)
+    sessions = [
+        session(rng.choice([15, 20, 30, 45, 60, 90]), rng.choice(["Low", "Medium", "High", "Urgent"]),
+                rng.choice(["Low", "Medium", "High"]), rng.randint(1, 10))
+        for _ in range(n_sessions)
+    ]
+    return FreeSlotIndex(slots), sessions
+
+
+def objective(sessions, starts):
+    return sum(placement_reward(s) + slot_score(start, s["task"].complexity, s["task"].priority)
+               for s, start in zip(sessions, starts) if start is not None)
+
+
+def assert_feasible(free_slots, sessions, starts):
+    """Every placed session (plus its break, clipped to the slot) lies in a free slot, without overlaps"""
+    busy = FreeSlotIndex(free_slots.slots())
+    for s, start in zip(sessions, starts):
+        if start is None:
+            continue
+        slot = busy.containing(start)
+        assert slot is not None and slot[1] - start >= s["duration"] + SLOT_BUFFER
+        busy.allocate(start, start + s["duration"] + SLOT_BUFFER)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_never_worse_than_greedy(seed):
+    free_slots, sessions = random_day(random.Random(seed), 25)
+    before = free_slots.slots()
+    greedy = place_sessions(free_slots, sessions)
+    starts, report = optimize_placements(free_slots, sessions, time_budget_ms=30, seed=seed)
+
+    assert free_slots.slots() == before
+    assert_feasible(free_slots, sessions, starts)
+    assert report["greedy"] == round(objective(sessions, greedy), 3)
+    assert report["value"] == round(objective(sessions, starts), 3)
+    assert report["value"] >= report["greedy"]
+    assert report["value"] <= report["upper_bound"] + 1e-9
+    assert report["greedy_placed"] == sum(start is not None for start in greedy)
+
+
+def test_finds_the_gap_greedy_gives_away():
+    # Greedy puts the short morning session in the only slot the long one fits
+    free_slots = FreeSlotIndex([(8 * 60, 9 * 60), (13 * 60, 13 * 60 + 40)])
+    sessions = [session(25, "High", "High"), session(45, "High", "Medium")]
+    assert place_sessions(free_slots, sessions) == [8 * 60, None]
+
+    starts, report = optimize_placements(free_slots, sessions, time_budget_ms=200)
+    assert starts == [13 * 60, 8 * 60]
+    assert report["placed"] == 2 and report["greedy_placed"] == 1
+    assert report["gain"] > 0
+
+
+def test_zero_budget_returns_greedy_plan():
+    free_slots, sessions = random_day(random.Random(1), 25)
+    starts, report = optimize_placements(free_slots, sessions, time_budget_ms=0)
+    assert starts == place_sessions(free_slots, sessions)
+    assert report["iterations"] == 0 and report["gain"] == 0
+
+
+def test_respects_time_budget():
+    free_slots, sessions = random_day(random.Random(2), 200)
+    started = time.perf_counter()
+    _, report = optimize_placements(free_slots, sessions, time_budget_ms=20)
+    elapsed_ms = (time.perf_counter() - started) * 1e3
+    # The search stops at the first decode past the budget
+    assert report["elapsed_ms"] < 20 + 50
+    assert elapsed_ms < 20 + 50
+
+    _, report = optimize_placements(FreeSlotIndex(), [], time_budget_ms=10 ** 9)
+    assert report["time_budget_ms"] == MAX_TIME_BUDGET_MS
+    assert report["iterations"] == 0
+
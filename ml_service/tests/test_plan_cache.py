@@ -0,0 +1,90 @@
+import pytest
+
+from plan_cache import PlanCache, UserPlan
+from worker import handle_request
+
+
+def payload(**overrides):
+    data = {
+        "user_id": "u1",
+        "routine": {"wake_up": "08:00", "sleep": "22:00"},
+        "routine_blocks": [],
+        "completed_today": {},
+        "tasks": [
+            {"id": "a", "title": "Essay", "category": "Writing", "estimated_size": 1, "predicted_time": 60,
+             "progress": 0, "deadline": None, "priority": "High", "complexity": "Medium"},
+            {"id": "b", "title": "Reading", "category": "Reading", "estimated_size": 1, "predicted_time": 45,
+             "progress": 0, "deadline": None, "priority": "Low", "complexity": "Low"},
+        ],
+    }
+    data.update(overrides)
+    return data
+
+
+def scheduled_ids(result: dict) -> set:
+    return {entry.get('task_id') for entry in result['schedule'] if entry.get('task_id') is not None}
+
+
+def test_failed_delta_leaves_plan_unchanged():
+    plan = UserPlan(payload())
+    before = list(plan.data['tasks'])
+    with pytest.raises(ValueError):
+        plan.apply([{"type": "task_removed", "task_id": "a"}, {"type": "task_removed", "task_id": "zzz"}])
+    assert plan.data['tasks'] == before
+    assert set(plan.states) == {"a", "b"}
+
+
+def test_rejected_delta_keeps_cached_plan():
+    cache = PlanCache()
+    request = {"op": "schedule", "data": payload()}
+    assert scheduled_ids(handle_request(request, None, None, cache)) == {"a", "b"}
+
+    update = {"op": "schedule_update", "data": {"user_id": "u1", "deltas": [
+        {"type": "task_removed", "task_id": "a"}, {"type": "task_removed", "task_id": "zzz"}]}}
+    with pytest.raises(ValueError, match="Unknown task"):
+        handle_request(update, None, None, cache)
+
+    # The plan survives unchanged and still takes deltas
+    update["data"]["deltas"] = [{"type": "task_removed", "task_id": "a"}]
+    result = handle_request(update, None, None, cache)
+    assert scheduled_ids(result) == {"b"}
+    assert result["diff"]["removed"]
+
+
+def test_failure_while_replanning_evicts_cached_plan(monkeypatch):
+    cache = PlanCache()
+    cache.schedule(payload())
+
+    def fail(touched):
+        raise RuntimeError("slot index corrupted")
+    monkeypatch.setattr(cache._plans["u1"], '_replan', fail)
+    with pytest.raises(RuntimeError):
+        cache.update({"user_id": "u1", "deltas": [{"type": "task_removed", "task_id": "a"}]})
+    with pytest.raises(ValueError, match="No cached plan"):
+        cache.update({"user_id": "u1", "deltas": []})
+
+
+def test_int_task_ids_share_completed_today_with_json_keys():
+    data = payload(completed_today={"1": 10})
+    for i, task in enumerate(data["tasks"], start=1):
+        task["id"] = i
+    cache = PlanCache()
+    cache.schedule(data)
+    cache.update({"user_id": "u1", "deltas": [{"type": "session_completed", "task_id": 1, "minutes": 20}]})
+    plan = cache._plans["u1"]
+    assert plan.data["completed_today"] == {"1": 30}
+    done = [entry for entry in plan.schedule() if entry.get("start") == "Done"]
+    assert [entry["task_id"] for entry in done] == [1]
+    # The plan's input still hashes (no mixed int / str keys)
+    assert plan.input_hash
+
+
+def test_cache_hit_without_optional_keys():
+    cache = PlanCache()
+    data = payload()
+    del data['completed_today']
+    data['routine_blocks'] = None
+    first = cache.schedule(data)
+    second = cache.schedule(dict(data))
+    assert second == first
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,135 @@
+import numpy as np
+
+from improved_predictor import ImprovedTimePredictor, predict_batch_for_users
+from ml_trainer import train_user_model
+from model_registry import ModelRegistry
+from pooled_model import PooledPersonalModel
+
+TASKS = [
+    {"title": "Read chapter 4", "category": "Reading", "estimated_size": 2, "priority": "Medium",
+     "complexity": "Medium", "num_pages": 30},
+    {"title": "Essay draft", "category": "Writing", "estimated_size": 3, "priority": "High",
+     "complexity": "Hard"},
+    {"title": "Problem set 2", "category": "Problems", "estimated_size": 1, "priority": "Low",
+     "complexity": "Easy"},
+]
+
+
+def registry_with_pooled(path):
+    registry = ModelRegistry()
+    registry.pooled = PooledPersonalModel(str(path))
+    return registry
+
+
+def test_gather_on_empty_directory(tmp_path):
+    weights, active = PooledPersonalModel(str(tmp_path)).gather(["a", "b"], "v1")
+    assert weights.shape == (2, PooledPersonalModel(str(tmp_path)).dim)
+    assert not weights.any()
+    assert not active.any()
+
+
+def test_batch_prediction_with_empty_pooled_directory(tmp_path):
+    registry = registry_with_pooled(tmp_path / 'pooled')
+    results = predict_batch_for_users(["a", "b", "a"], TASKS, registry)
+    expected = ImprovedTimePredictor(None, registry=registry).predict_batch(TASKS)
+    assert results == expected
+    assert all(result[4] != "personalized" for result in results)
+
+
+def history(n, start=0):
+    categories = ["Writing", "Reading", "Problems"]
+    return [{"task_id": start + i, "title": f"Task {start + i}", "category": categories[i % 3],
+             "estimated_size": 1 + i % 3, "priority": "Medium", "complexity": "Medium",
+             "actual_time": 30 + 5 * (i % 7)} for i in range(n)]
+
+
+def fit(model, user_id, tasks, base_version, replace=False):
+    base_log = np.full(len(tasks), np.log1p(40.0))
+    actual = [task["actual_time"] for task in tasks]
+    return model.fit_user(user_id, tasks, base_log, actual, base_version, replace=replace)
+
+
+def test_rows_fitted_on_another_base_version_are_ignored(tmp_path):
+    model = PooledPersonalModel(str(tmp_path))
+    assert fit(model, "old", history(20), "v1") == (20, 20)
+    assert fit(model, "moved", history(20), "v1") == (20, 20)
+    assert model.personalized("old", "v1")
+    assert not model.personalized("old", "v2")
+    assert model.user_weights("old", "v2") is None
+    assert not model.gather(["old", "moved"], "v2")[1].any()
+
+    # The first fit on the new base starts the user over (the key ring too)
+    assert fit(model, "moved", history(25), "v2") == (25, 25)
+    assert model.personalized("moved", "v2")
+    assert not model.personalized("moved", "v1")
+    assert model.info("v2")["personalized_users"] == 1
+    # Row 0 only sums the users on the new base
+    assert model.stats[0, model._n] == 25
+
+    # Rolling back to v1 serves the rows still fitted on it
+    assert model.personalized("old", "v1")
+    assert list(model.gather(["old", "moved"], "v1")[1]) == [True, False]
+
+
+def test_trainer_reports_tasks_actually_added(tmp_path):
+    registry = registry_with_pooled(tmp_path / 'pooled')
+    tasks = history(12)
+    first = train_user_model("u1", tasks, registry=registry, mode="incremental")
+    assert (first["success"], first["trained_on"]) == (True, 12)
+
+    again = train_user_model("u1", tasks, registry=registry, mode="incremental")
+    assert (again["success"], again["trained_on"], again.get("unchanged")) == (True, 0, True)
+
+    more = train_user_model("u1", tasks + history(3, start=100), registry=registry, mode="incremental")
+    assert more["trained_on"] == 3
+
+
+def test_readers_skip_rows_being_written(tmp_path):
+    model = PooledPersonalModel(str(tmp_path))
+    fit(model, "u1", history(20), "v1")
+    weights, version = model.user_weights("u1", "v1")
+
+    # A writer stopped halfway through rewriting the row
+    writer = PooledPersonalModel(str(tmp_path))
+    maps = writer._map(writer._read_index(), 'r+')
+    row = writer.users["u1"]
+    writer._begin_write(maps['keys'], [row])
+    maps['weights'][row, :3] = 99.0
+    assert model.user_weights("u1", "v1") is None
+    assert not model.personalized("u1", "v1")
+    assert not model.gather(["u1"], "v1")[1].any()
+
+    maps['weights'][row, :3] = weights[:3]
+    writer._end_write(maps['keys'], [row])
+    served, new_version = model.user_weights("u1", "v1")
+    np.testing.assert_array_equal(served, weights)
+    assert new_version != version
+
+
+def test_every_write_changes_the_version(tmp_path):
+    model = PooledPersonalModel(str(tmp_path))
+    fit(model, "u1", history(20), "v1")
+    versions = [model.user_weights("u1", "v1")[1]]
+    fit(model, "u1", history(5, start=50), "v1")
+    versions.append(model.user_weights("u1", "v1")[1])
+    model.refresh()
+    versions.append(model.user_weights("u1", "v1")[1])
+    assert len(set(versions)) == 3
+    assert all(version % 2 == 0 for version in versions)
+
+
+def test_incremental_training_takes_single_tasks(tmp_path):
+    registry = registry_with_pooled(tmp_path / 'pooled')
+    tasks = history(6)
+    first = train_user_model("u1", tasks[:1], registry=registry, mode="incremental")
+    assert (first["success"], first["trained_on"]) == (True, 1)
+    assert not registry.pooled.personalized("u1", registry.base_version)
+
+    for i in range(1, 6):
+        result = train_user_model("u1", [tasks[i]], registry=registry, mode="incremental")
+        assert result["trained_on"] == 1
+    assert registry.pooled.personalized("u1", registry.base_version)
+
+    # A full retrain still needs a history
+    full = train_user_model("u2", tasks[:2], registry=registry)
+    assert (full["success"], full["trained_on"]) == (False, 0)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from compiled_encoder import normalize_task
+from pooled_model import PooledPersonalModel
+from prediction_cache import PredictionCache
+
+TASKS = [
+    {"category": "Writing", "size": 3, "title": "Essay draft", "priority": "High", "complexity": "Hard",
+     "num_pages": 8},
+    {"category": "Reading", "estimated_size": 2, "title": "Chapter 4", "num_pages": 30},
+    {"category": "Problems", "size": 1, "priority": "Low", "complexity": "Easy", "num_questions": 12},
+    {"category": "Presentation", "size": 2, "title": "Slides", "num_slides": 15, "time_of_day": "evening",
+     "day_of_week": "Friday"},
+    {"category": "Unknown category", "size": 5},
+]
+
+
+def history(n):
+    return [{"task_id": i, "title": f"Task {i}", "category": ["Writing", "Reading", "Problems"][i % 3],
+             "estimated_size": 1 + i % 3, "priority": "Medium", "complexity": "Medium",
+             "actual_time": 70 + 5 * (i % 7)} for i in range(n)]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    registry = main.model_registry
+    monkeypatch.setattr(registry, "pooled", PooledPersonalModel(str(tmp_path / 'pooled')))
+    monkeypatch.setattr(registry, "prediction_cache", PredictionCache())
+    monkeypatch.setattr(registry, "model_dir", str(tmp_path))
+
+    # "pooled": a correction on the pooled model; "legacy": an old per-user incremental model file
+    assert main.ImprovedTimePredictor("pooled", registry=registry).train(history(20))
+    encoder = registry.base_flat_model.encoder
+    dim = encoder.encode_features(normalize_task(history(1)[0])).shape[0]
+    weights = np.concatenate(([60.0], np.random.default_rng(0).normal(0, 5, dim)))
+    np.savez(tmp_path / 'user_legacy_model.npz', inc_weights=weights, inc_n=20, **encoder.to_arrays())
+    yield TestClient(main.app)
+    registry.invalidate("legacy")
+
+
+def test_batch_matches_single_predictions(client):
+    users = ["pooled", "new", "legacy"]
+    tasks = [dict(task, user_id=users[i % 3]) for i in range(3) for task in TASKS]
+
+    response = client.post("/api/predict/batch", json={"tasks": tasks})
+    assert response.status_code == 200
+    batch = response.json()["predictions"]
+
+    single = []
+    for task in tasks:
+        response = client.post("/api/predict", json=task)
+        assert response.status_code == 200
+        single.append(response.json())
+
+    assert batch == single
+    sources = {task["user_id"]: prediction["model_source"] for task, prediction in zip(tasks, batch)}
+    assert sources["pooled"] == "personalized" and sources["new"] != "personalized"
+    assert sources["legacy"] == "personalized"
+    # Same task, three different models
+    assert len({prediction["predicted_minutes"] for prediction in batch[:3 * len(TASKS):len(TASKS)]}) == 3
+
+
+def test_empty_batch(client):
+    response = client.post("/api/predict/batch", json={"tasks": []})
+    assert response.status_code == 200
+    assert response.json() == {"predictions": []}
@@ -0,0 +1,119 @@
+from compiled_encoder import normalize_task
+from improved_predictor import ImprovedTimePredictor
+from model_registry import ModelRegistry
+from pooled_model import PooledPersonalModel
+from prediction_cache import PredictionCache, feature_key
+
+TASK = {"title": "Essay draft", "category": "Writing", "estimated_size": 3, "priority": "High",
+        "complexity": "Hard", "num_pages": 8}
+
+
+def history(n):
+    # Slower than the base model, but inside MAX_CORRECTION so refits stay visible
+    return [dict(TASK, task_id=i, estimated_size=1 + i % 3, actual_time=80 + 5 * (i % 5)) for i in range(n)]
+
+
+def registry_with_pooled(path):
+    registry = ModelRegistry()
+    registry.pooled = PooledPersonalModel(str(path))
+    return registry
+
+
+def test_lru_and_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("prediction_cache.time.monotonic", lambda: now[0])
+    cache = PredictionCache(max_entries=2, ttl_seconds=10)
+    cache.put(("u", "base", "v1", 1), "a")
+    cache.put(("u", "base", "v1", 2), "b")
+    assert cache.get(("u", "base", "v1", 1)) == "a"
+    cache.put(("u", "base", "v1", 3), "c")
+    # 2 was least recently used
+    assert cache.get(("u", "base", "v1", 2)) is None
+    assert cache.get(("u", "base", "v1", 1)) == "a"
+
+    now[0] += 10
+    assert cache.get(("u", "base", "v1", 3)) is None
+    stats = cache.stats()
+    assert (stats["evictions"], stats["expirations"], stats["entries"]) == (1, 1, 1)
+
+
+def test_invalidate_user_keeps_other_users_and_shared_entries():
+    cache = PredictionCache()
+    cache.put(("u1", "personalized", ("pooled", 2, "v1"), 1), "u1")
+    cache.put(("u1", "personalized", ("path", 5), 2), "u1 legacy")
+    cache.put(("u2", "personalized", ("pooled", 2, "v1"), 1), "u2")
+    cache.put((None, "base", "v1", 1), "base")
+    cache.invalidate_user("u1")
+    assert cache.get(("u1", "personalized", ("pooled", 2, "v1"), 1)) is None
+    assert cache.get(("u1", "personalized", ("path", 5), 2)) is None
+    assert cache.get(("u2", "personalized", ("pooled", 2, "v1"), 1)) == "u2"
+    assert cache.get((None, "base", "v1", 1)) == "base"
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_feature_key():
+    features = normalize_task(dict(TASK, num_slides=float("nan")))
+    assert feature_key(features) == feature_key(dict(features))
+    assert feature_key(normalize_task(TASK)) != feature_key(normalize_task(dict(TASK, num_pages=9)))
+    assert feature_key(dict(features, category=["Writing"])) is None
+
+
+def test_repeat_prediction_is_served_from_cache(tmp_path):
+    registry = registry_with_pooled(tmp_path / 'pooled')
+    first = ImprovedTimePredictor("u1", registry=registry).predict(TASK)
+    hits = registry.prediction_cache.hits
+    # Base results are shared by every user of the same base version
+    assert ImprovedTimePredictor("u2", registry=registry).predict(TASK) is first
+    assert registry.prediction_cache.hits == hits + 1
+
+
+def test_training_invalidates_cached_predictions(tmp_path):
+    registry = registry_with_pooled(tmp_path / 'pooled')
+    predictor = ImprovedTimePredictor("u1", registry=registry)
+    base = predictor.predict(TASK)
+    assert base[4] != "personalized"
+
+    assert predictor.train(history(20))
+    personalized = predictor.predict(TASK)
+    assert personalized[4] == "personalized"
+    assert personalized[0] > base[0]
+    assert ImprovedTimePredictor("u1", registry=registry).predict(TASK) == personalized
+
+    # Refit with other history: the next predictor must not get the old result back
+    assert predictor.train([dict(task, actual_time=task["actual_time"] * 3 // 2) for task in history(20)])
+    refit = ImprovedTimePredictor("u1", registry=registry).predict(TASK)
+    assert refit[0] > personalized[0]
+
+    # Other users keep the shared base result
+    assert ImprovedTimePredictor("u2", registry=registry).predict(TASK) == base
+
+
+def test_model_published_by_another_process_is_not_served_stale(tmp_path):
+    registry = registry_with_pooled(tmp_path / 'pooled')
+    before = ImprovedTimePredictor("u1", registry=registry).predict(TASK)
+    entries = registry.prediction_cache.stats()["entries"]
+
+    # e.g. the training queue's worker process: same files, no registry.invalidate()
+    trainer = ImprovedTimePredictor("u1", registry=None)
+    trainer.pooled = PooledPersonalModel(str(tmp_path / 'pooled'))
+    trainer.base_model_version = registry.base_version
+    assert trainer.train(history(20))
+
+    after = ImprovedTimePredictor("u1", registry=registry).predict(TASK)
+    assert after[4] == "personalized" and after[0] != before[0]
+    assert registry.prediction_cache.stats()["entries"] == entries + 1
+
+    # Every write bumps the row's version, so even a same-sized refit gets a new key
+    trainer.train([dict(task, actual_time=task["actual_time"] + 40) for task in history(20)])
+    again = ImprovedTimePredictor("u1", registry=registry).predict(TASK)
+    assert again[0] > after[0]
+
+
+def test_new_base_version_uses_new_keys(tmp_path):
+    registry = registry_with_pooled(tmp_path / 'pooled')
+    predictor = ImprovedTimePredictor(None, registry=registry)
+    key = predictor._cache_key(normalize_task(TASK), "base")
+    registry.base = registry.base._replace(version="v9-000000000000")
+    other = ImprovedTimePredictor(None, registry=registry)._cache_key(normalize_task(TASK), "base")
+    assert key[:2] == other[:2] and key[2] != other[2]
+    assert key[3] == other[3]
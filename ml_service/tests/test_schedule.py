@@ -0,0 +1,33 @@
+from schedule import build_schedule, todays_session
+from task_records import TaskRecord
+
+
+def record(predicted_time, progress=0, deadline=None):
+    return TaskRecord("t", "Essay", predicted_time, progress, deadline, "High", "Medium")
+
+
+def titles(tasks):
+    data = {"routine": {"wake_up": "08:00", "sleep": "22:00"}, "routine_blocks": [], "tasks": tasks}
+    return {entry["task_id"]: entry["title"] for entry in build_schedule(data)["schedule"]}
+
+
+def test_session_parts_follow_the_placed_session():
+    # Fits in today's session: no "Part" suffix
+    _, session = todays_session(record(60), {})
+    assert (session["duration"], session["session_num"], session["total_sessions"]) == (60, 1, 1)
+
+    # 300 minutes at the 90 minute cap: part 1 of 4, and part 3 once 180 are left
+    _, session = todays_session(record(300), {})
+    assert (session["duration"], session["session_num"], session["total_sessions"]) == (90, 1, 4)
+    _, session = todays_session(record(300, progress=40), {})
+    assert (session["session_num"], session["total_sessions"]) == (3, 4)
+    _, session = todays_session(record(300, progress=70), {})
+    assert (session["duration"], session["session_num"], session["total_sessions"]) == (90, 4, 4)
+
+
+def test_entry_titles():
+    tasks = [
+        {"id": "short", "title": "Quiz", "predicted_time": 60, "progress": 0, "priority": "High"},
+        {"id": "long", "title": "Thesis", "predicted_time": 300, "progress": 0, "priority": "High"},
+    ]
+    assert titles(tasks) == {"short": "Quiz", "long": "Thesis (Part 1/4)"}
@@ -0,0 +1,99 @@
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+
+from schedule import build_schedule, plan_today, ordered_entries, keyed_routine_items, schedule_lines, stream_schedule
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def clock(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def random_payload(rng: random.Random, n_tasks=40):
+    blocks = []
+    for i in range(rng.randint(0, 8)):
+        start = rng.randrange(6 * 60, 23 * 60, 15)
+        # Some blocks wrap past midnight, e.g. a late shift
+        end = (start + rng.choice([30, 60, 90, 8 * 60])) % (24 * 60)
+        blocks.append({"id": i, "activity_type": rng.choice(["class", "gym", "work"]),
+                       "start_time": clock(start), "end_time": clock(end)})
+    tasks = [{"id": i, "title": f"Task {i}", "predicted_time": rng.choice([15, 30, 45, 60, 120, 300]),
+              "progress": rng.choice([0, 0, 50, 100]), "deadline": None,
+              "priority": rng.choice(["Low", "Medium", "High", "Urgent"]),
+              "complexity": rng.choice(["Low", "Medium", "High"])} for i in range(n_tasks)]
+    completed = {str(i): rng.choice([10, 20]) for i in rng.sample(range(n_tasks), 5)}
+    return {"user_id": "u", "routine": {"wake_up": "07:00", "sleep": "23:30"}, "routine_blocks": blocks,
+            "completed_today": completed, "tasks": tasks}
+
+
+def previous_sort_key(item):
+    """The previous schedule.py sort: parse the "HH:MM AM/PM" start back, "Done" counts as 0"""
+    try:
+        dt = datetime.strptime(item['start'], "%I:%M %p")
+        return dt.hour * 60 + dt.minute
+    except ValueError:
+        return 0
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_merge_matches_previous_sort(seed):
+    data = random_payload(random.Random(seed))
+    task_items, routine_blocks, _ = plan_today(data)
+    unsorted = [entry for _, entry in task_items] + [entry for _, entry in keyed_routine_items(routine_blocks)]
+    assert list(ordered_entries(task_items, routine_blocks)) == sorted(unsorted, key=previous_sort_key)
+
+
+def test_ties_keep_tasks_first_in_task_order():
+    blocks = [{"id": 1, "activity_type": "gym", "start_time": "09:00", "end_time": "09:30"}]
+    items = [(9 * 60, {"task_id": "b", "start": "09:00 AM"}), (9 * 60, {"task_id": "a", "start": "09:00 AM"}),
+             (0, {"task_id": "done", "start": "Done"})]
+    assert [entry["task_id"] for entry in ordered_entries(items, blocks)] == ["done", "b", "a", "routine-1"]
+
+
+@pytest.mark.parametrize("engine", ["greedy", "local_search"])
+def test_ndjson_lines_match_json_schedule(engine):
+    data = random_payload(random.Random(7), n_tasks=80)
+    data.update(engine=engine, time_budget_ms=0)
+    result = build_schedule(data)
+    lines = list(schedule_lines(data))
+    assert [line["entry"] for line in lines[:-1]] == result["schedule"]
+    assert lines[-1]["end"]["entries"] == len(result["schedule"])
+    assert lines[-1]["end"].get("objective", {}).get("engine") == result.get("objective", {}).get("engine")
+
+
+class CountingOut(io.StringIO):
+    flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+        super().flush()
+
+
+def test_stream_flushes_every_n_lines():
+    data = random_payload(random.Random(8))
+    out = CountingOut()
+    stream_schedule(data, out, flush_every=4)
+    lines = out.getvalue().splitlines()
+    assert [json.loads(line) for line in lines] == list(schedule_lines(data))
+    assert out.flushes == len(lines) // 4 + 1
+
+
+def test_cli_modes_agree():
+    data = json.dumps(random_payload(random.Random(9)))
+
+    def run(*args):
+        return subprocess.run([sys.executable, "schedule.py", *args], input=data, capture_output=True,
+                              text=True, cwd=SERVICE_DIR, check=True).stdout
+
+    schedule = json.loads(run())["schedule"]
+    lines = [json.loads(line) for line in run("--ndjson").splitlines()]
+    assert [line["entry"] for line in lines[:-1]] == schedule
+    assert lines[-1] == {"end": {"entries": len(schedule)}}
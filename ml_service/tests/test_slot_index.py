@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+from benchmarks.slot_index import fragmented_slots, random_session, run_scan, run_index
+from slot_index import FreeSlotIndex
+
+HORIZON = 300
+
+
+def free_intervals(free: list) -> list:
+    """Maximal runs of free minutes, the reference for FreeSlotIndex.slots()"""
+    slots, start = [], None
+    for minute, is_free in enumerate(free + [False]):
+        if is_free and start is None:
+            start = minute
+        elif not is_free and start is not None:
+            slots.append((start, minute))
+            start = None
+    return slots
+
+
+def scan_first_fit(slots: list, length: int, lo: int, hi: int):
+    for start, end in slots:
+        if lo <= start < hi and end - start >= max(length, 1):
+            return start, end
+    return None
+
+
+def scan_containing(slots: list, minute: int):
+    for start, end in slots:
+        if start <= minute < end:
+            return start, end
+    return None
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_linear_scan_over_random_allocations(seed):
+    rng = random.Random(seed)
+    free = [False] * HORIZON
+    index = FreeSlotIndex(horizon=HORIZON)
+    for _ in range(300):
+        start = rng.randrange(HORIZON)
+        end = min(start + rng.randint(1, 40), HORIZON)
+        slot = scan_containing(free_intervals(free), start)
+        if rng.random() < 0.5:
+            if free[start]:
+                continue
+            # release() takes busy ranges only: stop at the next free minute
+            end = next((m for m in range(start, end) if free[m]), end)
+            index.release(start, end)
+            free[start:end] = [True] * (end - start)
+        elif slot is not None:
+            index.allocate(start, end)
+            end = min(end, slot[1])
+            free[start:end] = [False] * (end - start)
+        else:
+            with pytest.raises(ValueError):
+                index.allocate(start, end)
+
+        slots = free_intervals(free)
+        assert index.slots() == slots
+        assert len(index) == len(slots)
+        for _ in range(5):
+            length = rng.randint(0, 60)
+            lo = rng.randrange(HORIZON)
+            hi = rng.randint(lo, HORIZON + 10)
+            assert index.first_fit(length, lo, hi) == scan_first_fit(slots, length, lo, hi)
+            minute = rng.randrange(HORIZON)
+            assert index.containing(minute) == scan_containing(slots, minute)
+
+
+def test_copy_is_independent():
+    index = FreeSlotIndex([(10, 50), (60, 90)], horizon=HORIZON)
+    other = index.copy()
+    other.allocate(10, 20)
+    other.release(50, 60)
+    assert index.slots() == [(10, 50), (60, 90)]
+    assert other.slots() == [(20, 90)]
+
+
+def test_release_clips_to_horizon():
+    index = FreeSlotIndex([(-5, 20), (HORIZON - 10, HORIZON + 30)], horizon=HORIZON)
+    assert index.slots() == [(0, 20), (HORIZON - 10, HORIZON)]
+
+
+@pytest.mark.parametrize("days", [1, 3])
+def test_find_best_slot_matches_previous_scan(days):
+    rng = random.Random(days)
+    slots = fragmented_slots(rng, days)
+    sessions = [random_session(rng) for _ in range(200)]
+    placed = run_index(slots, sessions, days * 1440)
+    assert placed == run_scan(slots, sessions)
+    assert any(start is None for start in placed)
@@ -0,0 +1,110 @@
+import random
+
+import numpy as np
+import pytest
+
+from benchmarks.slot_index import fragmented_slots, random_session, run_matrix, run_scan
+from schedule import place_sessions, find_best_slot, SLOT_BUFFER
+from slot_index import FreeSlotIndex
+from slot_scores import SlotScoreMatrix, score_matrix, slot_score, COMPLEXITY_CODES, OTHER_COMPLEXITY
+from task_records import TaskRecord
+
+COMPLEXITIES = ["Low", "Medium", "High", "Other"]
+PRIORITIES = ["Low", "Medium", "High", "Urgent"]
+
+
+def test_score_matrix_matches_slot_score():
+    starts = list(range(0, 1440, 7))
+    pairs = [(complexity, priority) for complexity in COMPLEXITIES for priority in PRIORITIES]
+    scores = score_matrix(
+        [COMPLEXITY_CODES.get(complexity, OTHER_COMPLEXITY) for complexity, _ in pairs],
+        [priority == "Urgent" for _, priority in pairs],
+        starts
+    )
+    expected = [[slot_score(start, complexity, priority) for start in starts] for complexity, priority in pairs]
+    np.testing.assert_allclose(scores, expected)
+
+
+def scan_best(matrix, i, lo=None, hi=None):
+    """Earliest highest-scoring fitting slot, scoring each slot with slot_score"""
+    best, best_score = None, -float("inf")
+    for j, (start, end) in enumerate(zip(matrix.starts, matrix.ends)):
+        if end - start < matrix.needed[i] or (lo is not None and start < lo) or (hi is not None and start >= hi):
+            continue
+        score = slot_score(int(start), COMPLEXITIES[matrix.complexity_codes[i]], "Urgent" if matrix.urgent[i] else None)
+        if score > best_score:
+            best, best_score = j, score
+    return best
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_best_and_take_match_a_scan(seed):
+    rng = random.Random(seed)
+    slots = fragmented_slots(rng, 1)
+    sessions = [random_session(rng) for _ in range(60)]
+    matrix = SlotScoreMatrix(
+        slots,
+        [COMPLEXITY_CODES[complexity] for _, complexity, _ in sessions],
+        [priority == "Urgent" for _, _, priority in sessions],
+        [duration + SLOT_BUFFER for duration, _, _ in sessions]
+    )
+    for i in range(len(sessions)):
+        lo = rng.choice([None, rng.randrange(7 * 60, 23 * 60)])
+        hi = rng.choice([None, rng.randrange(7 * 60, 24 * 60)])
+        assert matrix.best(i, lo, hi) == scan_best(matrix, i, lo, hi)
+
+        fitting = [scan_best(matrix, k) for k in range(len(sessions))]
+        expected = [-np.inf if j is None else matrix.scores[k, j] for k, j in enumerate(fitting)]
+        np.testing.assert_array_equal(matrix.best_scores(), expected)
+
+        j = matrix.best(i)
+        if j is None:
+            continue
+        start, end = int(matrix.starts[j]), int(matrix.ends[j])
+        copy = matrix.copy()
+        assert matrix.take(i, j) == (start, slot_score(start, sessions[i][1], sessions[i][2]))
+        # Only slot j moved, and its column was rescored at the new start
+        assert matrix.starts[j] == min(start + matrix.needed[i], end)
+        assert (matrix.starts != copy.starts).sum() == 1
+        np.testing.assert_allclose(
+            matrix.scores[:, j],
+            [slot_score(int(matrix.starts[j]), COMPLEXITIES[c], "Urgent" if u else None)
+             for c, u in zip(matrix.complexity_codes, matrix.urgent)]
+        )
+        assert copy.starts[j] == start
+
+
+@pytest.mark.parametrize("days", [1, 3])
+def test_matrix_placement_matches_previous_scan(days):
+    rng = random.Random(10 + days)
+    slots = fragmented_slots(rng, days)
+    sessions = [random_session(rng) for _ in range(200)]
+    assert run_matrix(slots, sessions) == run_scan(slots, sessions)
+
+
+def test_place_sessions_matches_find_best_slot():
+    rng = random.Random(5)
+    free_slots = FreeSlotIndex(fragmented_slots(rng, 1))
+    before = free_slots.slots()
+    sessions = []
+    for duration, complexity, priority in (random_session(rng) for _ in range(80)):
+        task = TaskRecord("t", "Task", duration, 0, None, priority, complexity)
+        sessions.append({"task": task, "duration": duration})
+
+    starts = place_sessions(free_slots, sessions)
+    assert free_slots.slots() == before
+
+    expected = []
+    for s in sessions:
+        slot = find_best_slot(free_slots, s["duration"], s["task"].complexity, s["task"].priority)
+        expected.append(None if slot is None else slot[0])
+        if slot is not None:
+            free_slots.allocate(slot[0], min(slot[0] + s["duration"] + SLOT_BUFFER, slot[1]))
+    assert starts == expected
+    assert None in starts and any(start is not None for start in starts)
+
+
+def test_empty_day():
+    matrix = SlotScoreMatrix([], [0, 2], [False, True], [30, 40])
+    assert matrix.best(0) is None
+    np.testing.assert_array_equal(matrix.best_scores(), [-np.inf, -np.inf])
@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks import workloads
+from benchmarks.startup import CASES, HEAVY_MODULES, REFERENCE, measure
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = 3
+
+# Runs an entry point as __main__ in a fresh interpreter, then reports which heavy packages got imported
+RUN_AND_REPORT = """
+import json, runpy, sys
+sys.argv = [{script!r}] + {args!r}
+try:
+    runpy.run_path({script!r}, run_name='__main__')
+except SystemExit:
+    pass
+heavy = sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))
+print('HEAVY=' + json.dumps(heavy), file=sys.stderr)
+"""
+
+
+def request_for(request):
+    return json.dumps(request or workloads.schedule_payload(42, "fragmented", 50))
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_entry_point_skips_heavy_modules(name):
+    script, args, request, _, forbidden = CASES[name]
+    code = RUN_AND_REPORT.format(script=script, args=args, heavy=list(HEAVY_MODULES))
+    proc = subprocess.run([sys.executable, '-c', code], input=request_for(request),
+                          capture_output=True, text=True, cwd=SERVICE_DIR)
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    assert proc.stdout.strip(), "no response written"
+    report = [line for line in proc.stderr.splitlines() if line.startswith('HEAVY=')]
+    assert report, proc.stderr[-2000:]
+    imported = set(json.loads(report[-1][len('HEAVY='):])) & set(forbidden)
+    assert not imported, f"{name} imports {sorted(imported)}"
+
+
+def test_import_time_relative_to_numpy():
+    reference = measure(*REFERENCE, {}, SAMPLES)["import_ms"]
+    for name, (script, args, request, budget, _) in CASES.items():
+        import_ms = measure(script, args, json.loads(request_for(request)), SAMPLES)["import_ms"]
+        assert import_ms <= budget * reference, (
+            f"{name}: {import_ms} ms of imports, over {budget}x the numpy import ({reference} ms)")
+
+
+def test_api_module_skips_pandas():
+    code = "import sys, main; print(sorted({'pandas', 'sklearn'} & set(sys.modules)))"
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=SERVICE_DIR)
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    assert proc.stdout.strip().splitlines()[-1] == "[]"
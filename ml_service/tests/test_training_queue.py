@@ -0,0 +1,78 @@
+from concurrent.futures import Future
+
+import pytest
+
+from training_queue import TrainingQueue, coalesce_payloads, QUEUED, RUNNING, SUCCEEDED, FAILED
+
+
+class HeldExecutor:
+    """Records submitted fits; the test decides when (and how) each one finishes"""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, user_id, completed_tasks, mode):
+        future = Future()
+        self.calls.append((user_id, completed_tasks, mode, future))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+@pytest.fixture
+def queue():
+    queue = TrainingQueue(max_workers=2)
+    queue._executor = HeldExecutor()
+    return queue
+
+
+def task(task_id, minutes=30):
+    return {"task_id": task_id, "actual_time": minutes}
+
+
+def test_burst_for_one_user_coalesces_into_one_follow_up(queue):
+    running = queue.submit("u1", [task(1)])
+    assert running["status"] == RUNNING
+    jobs = [queue.submit("u1", [task(1), task(i)]) for i in range(2, 6)]
+    assert len({job["job_id"] for job in jobs}) == 1
+    assert jobs[-1]["status"] == QUEUED and jobs[-1]["coalesced"] == 3
+    assert len(queue._executor.calls) == 1
+
+    # The follow-up starts when the running fit finishes, with the newest full history
+    queue._executor.calls[0][3].set_result({"success": True})
+    assert queue.get(running["job_id"])["status"] == SUCCEEDED
+    assert queue.get(jobs[-1]["job_id"])["status"] == RUNNING
+    assert queue._executor.calls[1][1] == [task(1), task(5)]
+    assert queue.stats()["coalesced"] == 3
+
+
+def test_incremental_requests_merge_their_tasks(queue):
+    queue.submit("u1", [task(0)], "incremental")
+    queue.submit("u1", [task(1)], "incremental")
+    queue.submit("u1", [task(2)], "incremental")
+    queue.submit("u1", [task(1, minutes=45)], "incremental")
+    queue._executor.calls[0][3].set_result({"success": True})
+    _, tasks, mode, _ = queue._executor.calls[1]
+    assert mode == "incremental"
+    assert tasks == [task(1, minutes=45), task(2)]
+
+
+def test_coalesce_payloads():
+    history = [task(1), task(2)]
+    # A full request replaces whatever is queued
+    assert coalesce_payloads(([task(9)], "incremental"), (history, "full")) == (history, "full")
+    # New tasks join a queued full retrain, which stays full
+    assert coalesce_payloads((history, "full"), ([task(3)], "incremental")) == (history + [task(3)], "full")
+
+
+def test_at_most_max_workers_fits_and_one_per_user(queue):
+    for user_id in ("u1", "u2", "u3"):
+        queue.submit(user_id, [task(1)])
+    assert [call[0] for call in queue._executor.calls] == ["u1", "u2"]
+    assert queue.stats()["queued"] == 1
+
+    queue._executor.calls[1][3].set_exception(RuntimeError("worker died"))
+    assert [call[0] for call in queue._executor.calls] == ["u1", "u2", "u3"]
+    failed = [job for job in queue._jobs.values() if job["user_id"] == "u2"][0]
+    assert failed["status"] == FAILED and "worker died" in failed["error"]
@@ -2,9 +2,15 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 import json
+import time
+import shutil
+import argparse
+import tempfile
 import joblib
-from sklearn.model_selection import RandomizedSearchCV, train_test_split, KFold
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (enables HalvingRandomSearchCV)
+from sklearn.model_selection import RandomizedSearchCV, HalvingRandomSearchCV, train_test_split, KFold
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder, RobustScaler
@@ -12,17 +18,114 @@ from sklearn.impute import SimpleImputer
 from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
-from improved_predictor import FeatureEngineer
+from feature_engineer import FeatureEngineer
+from calibration import build_calibration, save_calibration
+from compiled_encoder import CompiledFeatureEncoder
+from flat_trees import FlatTreeEnsemble, FlatTreeModel, FLAT_MODEL_FILENAME
+from dataset_store import DatasetStore, DEFAULT_STORE_DIR, TARGET_COL
+from model_store import ModelStore
 
 # 1. DETERMINISM
 SEED = 42
 np.random.seed(SEED)
 
-def train_base_model():
-    print("Starting Base Model Training...")
+# Files of a base model version (besides the flat tree export)
+BASE_ARTIFACTS = ['base_model_metadata.json', 'base_model.joblib', 'base_model_metrics.json',
+                  'base_model_residuals.npy', 'base_model_calibration.json']
+
+# Hyperparameter search space (both search modes)
+PARAM_DISTRIBUTIONS = {
+    'regressor__max_iter': [100, 200, 300],
+    'regressor__max_depth': [3, 5, 7, 10],
+    'regressor__learning_rate': [0.01, 0.05, 0.1],
+    'regressor__l2_regularization': [0.0, 0.1, 1.0]
+}
+
+# "random": RandomizedSearchCV, 10 candidates x 5 folds on all rows.
+# "halving": successive halving (HalvingRandomSearchCV) over more candidates,
+#   starting on a small sample and keeping the best third (HALVING_FACTOR) on
+#   3x the rows each round, so only a few candidates ever see the full data.
+#   The fitted FeatureEngineer/ColumnTransformer are cached (Pipeline
+#   memory=) and shared by every candidate on the same fold, and each
+#   regressor stops early once its validation loss stops improving.
+SEARCH_MODES = ('random', 'halving')
+HALVING_CANDIDATES = 30
+HALVING_FACTOR = 3
+
+def make_pipeline(preprocessor, early_stopping=False, memory=None):
+    # FeatureEngineer first, then ColumnTransformer, then Regressor
+    regressor = HistGradientBoostingRegressor(random_state=SEED)
+    if early_stopping:
+        # max_iter becomes an upper bound; 10% of the rows are held out to stop on
+        regressor.set_params(early_stopping=True, validation_fraction=0.1, n_iter_no_change=10)
+    return Pipeline(steps=[
+        ('features', FeatureEngineer()),
+        ('preprocessor', preprocessor),
+        ('regressor', regressor)
+    ], memory=memory)
+
+def run_search(mode, preprocessor, X_train, y_train_log):
+    """Fit the hyperparameter search of the given mode; returns (search, wall seconds)"""
+    started = time.perf_counter()
+    if mode == 'random':
+        search = RandomizedSearchCV(
+            make_pipeline(preprocessor), 
+            PARAM_DISTRIBUTIONS, 
+            n_iter=10, 
+            cv=5, 
+            scoring='neg_mean_absolute_error', 
+            random_state=SEED,
+            n_jobs=-1
+        )
+        search.fit(X_train, y_train_log)
+        return search, time.perf_counter() - started
     
-    # Paths
-    current_dir = os.path.dirname(__file__)
+    if mode != 'halving':
+        raise ValueError(f"Unknown search mode '{mode}' (expected one of {SEARCH_MODES})")
+    cache_dir = tempfile.mkdtemp(prefix='base_model_transforms_')
+    try:
+        search = HalvingRandomSearchCV(
+            make_pipeline(preprocessor, early_stopping=True, memory=cache_dir),
+            PARAM_DISTRIBUTIONS,
+            n_candidates=HALVING_CANDIDATES,
+            factor=HALVING_FACTOR,
+            resource='n_samples',
+            min_resources='exhaust', # last round uses (almost) all training rows
+            cv=5,
+            scoring='neg_mean_absolute_error',
+            random_state=SEED,
+            n_jobs=-1
+        )
+        search.fit(X_train, y_train_log)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    # The cache directory is gone; don't save a pipeline that points at it
+    search.best_estimator_.set_params(memory=None)
+    return search, time.perf_counter() - started
+
+def evaluate(model, X_test, y_test_log):
+    """Test-set predictions and metrics in minutes: (y_test, y_pred, metrics)"""
+    y_pred_log = model.predict(X_test)
+    y_pred = np.expm1(y_pred_log)
+    y_test = np.expm1(y_test_log)
+    
+    mae = mean_absolute_error(y_test, y_pred)
+    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+    r2 = r2_score(y_test, y_pred)
+    
+    # Calculate Residuals (in minutes) for Confidence Intervals
+    # We compute residuals on the Test set (Simulated 'unseen' data)
+    residuals = y_test - y_pred
+    residual_std = np.std(residuals)
+    
+    return y_test, y_pred, {
+        "MAE": mae,
+        "RMSE": rmse,
+        "R2": r2,
+        "residual_std": residual_std
+    }
+
+def find_dataset(current_dir):
     # Try different locations for the dataset
     possible_paths = [
         os.path.join(current_dir, 'generated_dataset_2000_realistic.csv'),
@@ -30,18 +133,52 @@ def train_base_model():
         '/mnt/data/prediction_ready_dataset.csv',
         os.path.join(current_dir, 'realistic_dataset_2000.csv') # Fallback
     ]
-    
-    data_path = None
     for p in possible_paths:
         if os.path.exists(p):
-            data_path = p
-            break
-            
+            return p
+    return None
+
+def open_dataset(current_dir, data_path=None):
+    """
+    The training DatasetStore (see dataset_store.py). data_path may be a store
+    directory or a CSV, which is converted into a store of its own
+    (data/csv_<name>, rebuilt on every run) so the default store and the
+    task history appended to it are never overwritten. Without data_path the
+    default store is used, created from the first CSV found.
+    """
+    if data_path and os.path.isdir(data_path):
+        return DatasetStore(data_path)
+    if data_path:
+        name = os.path.splitext(os.path.basename(data_path))[0]
+        store_dir = os.path.join(os.path.dirname(DEFAULT_STORE_DIR), f"csv_{name}")
+    else:
+        store_dir = DEFAULT_STORE_DIR
+        if os.path.exists(os.path.join(store_dir, 'schema.json')):
+            return DatasetStore(store_dir)
+    
+    data_path = data_path or find_dataset(current_dir)
     if not data_path:
         raise FileNotFoundError("Could not find prediction_ready_dataset.csv or realistic_dataset_2000.csv")
+    print(f"Converting {data_path} into the dataset store at {store_dir}")
+    return DatasetStore.from_csv(data_path, store_dir)
+
+def train_base_model(search_mode='random', data_path=None, compare=False, max_rows=None):
+    """
+    Train and save the base model. search_mode picks the hyperparameter
+    search (SEARCH_MODES); with compare=True both searches run on the same
+    split and their wall time and MAE are reported (the search_mode model is saved).
+    max_rows trains on a seeded random sample of the dataset.
+    """
+    print("Starting Base Model Training...")
+    
+    # Paths
+    current_dir = os.path.dirname(__file__)
+    store = open_dataset(current_dir, data_path)
+    rows = store.sample_rows(max_rows, SEED) if max_rows else None
     
-    print(f"Loading dataset from: {data_path}")
-    df = pd.read_csv(data_path)
+    print(f"Loading dataset from: {store.path} ({len(store)} rows)")
+    df = store.frame(rows=rows)
+    df = df[df[TARGET_COL].notna()].reset_index(drop=True)
     
     # 2. METADATA & STATS
     # Compute medians for imputation later (though pipeline handles it, we save for reference)
@@ -53,10 +190,6 @@ def train_base_model():
         "categories": {col: df[col].unique().tolist() for col in categorical_cols},
         "feature_order": numeric_cols + categorical_cols
     }
-    
-    os.makedirs(os.path.join(current_dir, 'models'), exist_ok=True)
-    with open(os.path.join(current_dir, 'models', 'base_model_metadata.json'), 'w') as f:
-        json.dump(metadata, f, indent=2)
         
     # 3. SPLIT DATA
     # We use actual_time_minutes as target
@@ -111,70 +244,129 @@ def train_base_model():
         ]
     )
     
-    pipeline = Pipeline(steps=[
-        ('features', FeatureEngineer()),
-        ('preprocessor', preprocessor),
-        ('regressor', HistGradientBoostingRegressor(random_state=SEED))
-    ])
-    
     # 5. HYPERPARAMETER TUNING
-    print("Tuning hyperparameters...")
-    param_distributions = {
-        'regressor__max_iter': [100, 200, 300],
-        'regressor__max_depth': [3, 5, 7, 10],
-        'regressor__learning_rate': [0.01, 0.05, 0.1],
-        'regressor__l2_regularization': [0.0, 0.1, 1.0]
-    }
+    modes = list(SEARCH_MODES) if compare else [search_mode]
+    if search_mode not in modes:
+        modes.append(search_mode)
+    results = {}
+    for mode in modes:
+        print(f"Tuning hyperparameters ({mode} search)...")
+        search, seconds = run_search(mode, preprocessor, X_train, y_train_log)
+        print(f"Best params: {search.best_params_} ({seconds:.1f}s)")
+        
+        # 6. EVALUATION
+        print("Evaluating...")
+        y_test, y_pred, metrics = evaluate(search.best_estimator_, X_test, y_test_log)
+        print(f"Metrics: {metrics}")
+        results[mode] = (search, seconds, y_test, y_pred, metrics)
     
-    search = RandomizedSearchCV(
-        pipeline, 
-        param_distributions, 
-        n_iter=10, 
-        cv=5, 
-        scoring='neg_mean_absolute_error', 
-        random_state=SEED,
-        n_jobs=-1
-    )
+    if compare:
+        print(f"{'search':10s} {'wall s':>8s} {'fits':>6s} {'cv MAE (log)':>13s} {'test MAE (min)':>15s}")
+        for mode, (search, seconds, _, _, metrics) in results.items():
+            fits = len(search.cv_results_['params']) * search.n_splits_
+            print(f"{mode:10s} {seconds:8.1f} {fits:6d} {-search.best_score_:13.4f} {metrics['MAE']:15.2f}")
     
-    search.fit(X_train, y_train_log)
+    search, seconds, y_test, y_pred, metrics = results[search_mode]
     best_model = search.best_estimator_
-    print(f"Best params: {search.best_params_}")
-    
-    # 6. EVALUATION
-    print("Evaluating...")
-    
-    # Predict on Test set
-    y_pred_log = best_model.predict(X_test)
-    y_pred = np.expm1(y_pred_log)
-    y_test = np.expm1(y_test_log)
-    
-    mae = mean_absolute_error(y_test, y_pred)
-    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-    r2 = r2_score(y_test, y_pred)
-    
-    # Calculate Residuals (in minutes) for Confidence Intervals
-    # We compute residuals on the Test set (Simulated 'unseen' data)
     residuals = y_test - y_pred
-    residual_std = np.std(residuals)
-    
-    metrics = {
-        "MAE": mae,
-        "RMSE": rmse,
-        "R2": r2,
-        "residual_std": residual_std
+    metrics["search"] = {
+        "mode": search_mode,
+        "seconds": round(seconds, 2),
+        "best_params": search.best_params_
     }
-    print(f"Metrics: {metrics}")
     
     # 7. SAVE ARTIFACTS
+    # Written into a staging directory and published as one new "base" version
+    # (see model_store.py); running services pick it up atomically.
     print("Saving artifacts...")
-    joblib.dump(best_model, os.path.join(current_dir, 'models', 'base_model.joblib'))
-    
-    with open(os.path.join(current_dir, 'models', 'base_model_metrics.json'), 'w') as f:
-        json.dump(metrics, f, indent=2)
+    store = ModelStore(os.path.join(current_dir, 'models', 'store'))
+    staging = store.staging_dir('base')
+    try:
+        with open(os.path.join(staging, 'base_model_metadata.json'), 'w') as f:
+            json.dump(metadata, f, indent=2)
+        
+        joblib.dump(best_model, os.path.join(staging, 'base_model.joblib'))
+        
+        with open(os.path.join(staging, 'base_model_metrics.json'), 'w') as f:
+            json.dump(metrics, f, indent=2)
+            
+        np.save(os.path.join(staging, 'base_model_residuals.npy'), residuals)
+        
+        # Residual quantile tables (global / per category / per magnitude bucket) for O(1) intervals
+        calibration = build_calibration(residuals, y_pred, X_test['category'].values)
+        save_calibration(calibration, os.path.join(staging, 'base_model_calibration.json'))
         
-    np.save(os.path.join(current_dir, 'models', 'base_model_residuals.npy'), residuals)
+        # Flat array export for sklearn-free inference
+        export_flat_trees(best_model, os.path.join(staging, FLAT_MODEL_FILENAME), X_test, metadata)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    version = store.publish_dir('base', staging)
+    
+    print(f"Training complete. Published base model {version}.")
+
+def export_flat_trees(pipeline, path, X_check, metadata=None):
+    """
+    Export the fitted pipeline as flat numpy arrays (see flat_trees.py).
+    Refuses to write the file unless it reproduces pipeline.predict on X_check.
+    """
+    encoder = CompiledFeatureEncoder.from_pipeline(pipeline, metadata)
+    ensemble = FlatTreeEnsemble.from_regressor(pipeline.named_steps['regressor'])
+    flat_model = FlatTreeModel(encoder, ensemble)
+    
+    expected = pipeline.predict(X_check)
+    actual = flat_model.predict_vectors(encoder.encode_batch(X_check.to_dict('records')))
+    max_error = float(np.max(np.abs(expected - actual)))
+    if max_error > 1e-9:
+        raise ValueError(f"Flat tree export does not match pipeline.predict (max error {max_error})")
+    
+    flat_model.save(path)
+    print(f"Exported {len(ensemble.roots)} trees ({len(ensemble.value)} nodes) to {path}, max error {max_error:.1e} on {len(X_check)} rows")
+
+def export_saved_base_model(n_check=5000):
+    """
+    Export the current base_model.joblib (published version, else models/)
+    without retraining, and publish it with the trees as a new "base" version.
+    Parity is checked on synthetic rows drawn from the metadata value ranges.
+    """
+    current_dir = os.path.dirname(__file__)
+    store = ModelStore(os.path.join(current_dir, 'models', 'store'))
+    model_dir = store.current_path('base') or os.path.join(current_dir, 'models')
+    pipeline = joblib.load(os.path.join(model_dir, 'base_model.joblib'))
+    with open(os.path.join(model_dir, 'base_model_metadata.json'), 'r') as f:
+        metadata = json.load(f)
+    
+    rng = np.random.RandomState(SEED)
+    X_check = pd.DataFrame({
+        'estimated_size': rng.choice([0, 0.5, 1, 2, 3.5, 5, 8, 13], n_check),
+        'title_length': rng.randint(0, 80, n_check),
+        'user_experience_level': rng.randint(1, 6, n_check),
+        'num_pages': rng.randint(0, 40, n_check),
+        'num_slides': rng.randint(0, 30, n_check),
+        'num_questions': rng.randint(0, 30, n_check),
+        **{col: rng.choice(values + ['unknown'], n_check) for col, values in metadata['categories'].items()}
+    })
     
-    print("Training complete.")
+    staging = store.staging_dir('base')
+    try:
+        for filename in BASE_ARTIFACTS:
+            if os.path.exists(os.path.join(model_dir, filename)):
+                shutil.copyfile(os.path.join(model_dir, filename), os.path.join(staging, filename))
+        export_flat_trees(pipeline, os.path.join(staging, FLAT_MODEL_FILENAME), X_check, metadata)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    print(f"Published base model {store.publish_dir('base', staging)}")
 
 if __name__ == "__main__":
-    train_base_model()
+    parser = argparse.ArgumentParser(description='Train the base model (or export the saved one as flat trees).')
+    parser.add_argument('--export-trees', action='store_true', help='Export the current base_model.joblib without retraining')
+    parser.add_argument('--search', choices=SEARCH_MODES, default='random', help='Hyperparameter search')
+    parser.add_argument('--compare', action='store_true', help='Run both searches and report wall time and MAE')
+    parser.add_argument('--data', help='Dataset store directory, or CSV to convert into data/csv_<name> (default: data/training_store)')
+    parser.add_argument('--max-rows', type=int, help='Train on a random sample of this many rows')
+    args = parser.parse_args()
+    if args.export_trees:
+        export_saved_base_model()
+    else:
+        train_base_model(args.search, args.data, args.compare, args.max_rows)
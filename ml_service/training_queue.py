@@ -0,0 +1,203 @@
+"""
+Training Job Queue
+Runs personal-model training in a process pool, off the prediction path.
+
+  - Concurrency is capped at max_workers fits at a time.
+  - Requests for a user who already has a queued job are coalesced into it,
+    so a burst of completions costs one fit per user instead of one per
+    completion. A full request brings the user's whole recent history, so
+    its task list replaces the queued one. An incremental request carries
+    only new tasks, so its list is merged into the queued one by task key
+    (and a queued full job stays full). A request that arrives while the
+    user's fit is running queues exactly one follow-up job.
+  - When a fit finishes, the new artifacts are loaded and swapped into the
+    ModelRegistry in one put(); predictions keep using the previous model
+    until then.
+"""
+
+import itertools
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from incremental_model import task_key
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def coalesce_payloads(queued: tuple, new: tuple) -> tuple:
+    """(completed_tasks, mode) of a queued job after folding in a new request"""
+    (queued_tasks, queued_mode), (new_tasks, new_mode) = queued, new
+    if new_mode != "incremental":
+        return new_tasks, new_mode
+    merged = {task_key(task): task for task in queued_tasks}
+    merged.update((task_key(task), task) for task in new_tasks)
+    return list(merged.values()), queued_mode
+
+
+def _run_training(user_id: str, completed_tasks: list, mode: str) -> dict:
+    """Executed in a worker process; writes the user's artifacts to models/"""
+    from ml_trainer import train_user_model
+    return train_user_model(user_id, completed_tasks, mode=mode)
+
+
+class TrainingQueue:
+    """
+    Per-user deduplicating job queue in front of a ProcessPoolExecutor.
+    """
+
+    def __init__(self, registry=None, max_workers: int = 2, max_finished_jobs: int = 1000):
+        self.registry = registry
+        self.max_workers = max_workers
+        self.max_finished_jobs = max_finished_jobs
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+        # job_id -> job dict (queued and running jobs, plus recent finished ones)
+        self._jobs = OrderedDict()
+        self._payloads = {}  # job_id -> (completed_tasks, mode), until started
+        self._queue = deque()  # queued job_ids, FIFO
+        self._queued_by_user = {}
+        self._running_by_user = {}
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            # spawn: forking a threaded server process is unsafe
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def submit(self, user_id: str, completed_tasks: list, mode: str = "full") -> dict:
+        """
+        Queue a fit for user_id (or fold into the one already queued). Returns the job.
+        """
+        with self._lock:
+            self.submitted += 1
+
+            job_id = self._queued_by_user.get(user_id)
+            if job_id is not None:
+                completed_tasks, mode = coalesce_payloads(self._payloads[job_id], (completed_tasks, mode))
+                self._payloads[job_id] = (completed_tasks, mode)
+                job = self._jobs[job_id]
+                job["mode"] = mode
+                job["coalesced"] += 1
+                self.coalesced += 1
+                return dict(job)
+
+            job_id = str(next(self._ids))
+            job = {
+                "job_id": job_id,
+                "user_id": user_id,
+                "mode": mode,
+                "status": QUEUED,
+                "coalesced": 0,
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None
+            }
+            self._jobs[job_id] = job
+            self._payloads[job_id] = (completed_tasks, mode)
+            self._queue.append(job_id)
+            self._queued_by_user[user_id] = job_id
+
+        self._pump()
+        return self.get(job_id)
+
+    def get(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _pump(self):
+        """Start queued jobs while there are free slots (one running job per user)"""
+        to_start = []
+        with self._lock:
+            skipped = deque()
+            while self._queue and len(self._running_by_user) < self.max_workers:
+                job_id = self._queue.popleft()
+                job = self._jobs[job_id]
+                if job["user_id"] in self._running_by_user:
+                    skipped.append(job_id)
+                    continue
+                del self._queued_by_user[job["user_id"]]
+                self._running_by_user[job["user_id"]] = job_id
+                job["status"] = RUNNING
+                job["started_at"] = time.time()
+                to_start.append((job_id, job["user_id"], self._payloads.pop(job_id)))
+            self._queue.extendleft(reversed(skipped))
+
+        for job_id, user_id, (completed_tasks, mode) in to_start:
+            try:
+                future = self._get_executor().submit(_run_training, user_id, completed_tasks, mode)
+            except Exception as e:
+                self._finish(job_id, None, e)
+                continue
+            future.add_done_callback(lambda f, job_id=job_id: self._on_done(job_id, f))
+
+    def _on_done(self, job_id: str, future):
+        try:
+            result, error = future.result(), None
+        except Exception as e:
+            result, error = None, e
+        self._finish(job_id, result, error)
+
+    def _finish(self, job_id: str, result, error):
+        with self._lock:
+            job = self._jobs[job_id]
+            user_id = job["user_id"]
+
+        succeeded = error is None and bool(result and result.get("success"))
+        if succeeded and self.registry is not None:
+            # Load the new artifacts and swap them in (registry.put under its lock)
+            try:
+                self.registry.get_user_artifacts(user_id)
+            except Exception as e:
+                print(f"Error loading retrained model for {user_id}: {e}")
+
+        with self._lock:
+            job["status"] = SUCCEEDED if succeeded else FAILED
+            job["finished_at"] = time.time()
+            job["result"] = result
+            job["error"] = str(error) if error is not None else None
+            self._running_by_user.pop(user_id, None)
+            if succeeded:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self._trim()
+
+        self._pump()
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in (SUCCEEDED, FAILED)]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": len(self._queue),
+                "running": len(self._running_by_user),
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "completed": self.completed,
+                "failed": self.failed
+            }
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
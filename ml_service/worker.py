@@ -0,0 +1,105 @@
+"""
+Long-lived ML Worker
+Serves predict / schedule / train requests as newline-delimited JSON over stdin/stdout,
+so the Node backend does not pay interpreter boot + pandas/sklearn import + joblib load
+on every call.
+
+Request  (one line):  {"id": 1, "op": "predict" | "schedule" | "train", "data": {...}}
+                      ("train_async" / "train_status" queue a fit in the background
+                      and poll it by job_id, see training_queue.py;
+                      "schedule_update" patches the user's cached plan, see plan_cache.py;
+                      "model_versions" / "rollback" inspect and roll back model
+                      versions, see model_store.py)
+Response (one line):  {"id": 1, "result": {...}}   or   {"id": 1, "error": "..."}
+
+"data" is exactly the JSON the one-shot scripts (predict.py, schedule.py, ml_trainer.py)
+read from stdin, and "result" is exactly what they print.
+"""
+
+import sys
+import json
+
+from model_registry import ModelRegistry, ModelWatcher
+from predict import run_prediction
+from schedule import build_schedule
+from plan_cache import PlanCache
+from ml_trainer import train_user_model
+from training_queue import TrainingQueue
+
+
+def handle_request(request: dict, registry: ModelRegistry, training_queue: TrainingQueue = None,
+                   plan_cache: PlanCache = None) -> dict:
+    op = request.get('op')
+    data = request.get('data') or {}
+
+    if op == 'predict':
+        return run_prediction(data, registry=registry)
+    if op == 'schedule':
+        if plan_cache is None:
+            return build_schedule(data)
+        return plan_cache.schedule(data)
+    if op == 'schedule_update' and plan_cache is not None:
+        return plan_cache.update(data)
+    if op == 'train':
+        return train_user_model(data.get('user_id'), data.get('completed_tasks', []), registry=registry,
+                                mode=data.get('mode', 'full'))
+    if op == 'train_async' and training_queue is not None:
+        return training_queue.submit(data.get('user_id'), data.get('completed_tasks', []), data.get('mode', 'full'))
+    if op == 'train_status' and training_queue is not None:
+        job = training_queue.get(str(data.get('job_id')))
+        if job is None:
+            raise ValueError(f"Unknown training job: {data.get('job_id')}")
+        return job
+    if op == 'model_versions':
+        return registry.store.describe(data.get('name'))
+    if op == 'rollback':
+        version = registry.rollback(data.get('name'), data.get('version'))
+        return {**registry.store.describe(data.get('name')), "rolled_back_to": version}
+    if op == 'stats':
+        stats = registry.stats()
+        if training_queue is not None:
+            stats["training"] = training_queue.stats()
+        if plan_cache is not None:
+            stats["plans"] = plan_cache.stats()
+        return stats
+
+    raise ValueError(f"Unknown op: {op}")
+
+
+def serve(stdin=None, stdout=None):
+    stdin = stdin or sys.stdin
+    out = stdout or sys.stdout
+
+    # Anything the models print must not corrupt the response stream
+    sys.stdout = sys.stderr
+
+    # Models stay loaded for the lifetime of the worker
+    registry = ModelRegistry()
+    training_queue = TrainingQueue(registry)
+    plan_cache = PlanCache()
+    # New model versions published by other processes are swapped in between requests
+    watcher = ModelWatcher(registry).start()
+
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            response = {"id": request_id, "result": handle_request(request, registry, training_queue, plan_cache)}
+        except Exception as e:
+            print(f"Worker Error: {e}", file=sys.stderr)
+            response = {"id": request_id, "error": str(e)}
+
+        out.write(json.dumps(response) + "\n")
+        out.flush()
+
+    watcher.stop()
+    training_queue.shutdown()
+
+
+if __name__ == "__main__":
+    serve()